@@ -1,12 +1,15 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Response, Header, Depends
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Response, Header, Depends, Query
 from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 import os
 import shutil
 import json
 import sys
+import glob
+import asyncio
+from uuid import uuid4
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -14,10 +17,17 @@ load_dotenv()
 # Add root directoy to sys.path to access services
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from services.agent_controller import run_resume_pipeline, generate_resume_from_linkedin
-from services.resume_parser import extract_text
-from services.db.lancedb_client import store_resume, get_or_create_table, search_resumes_semantic, log_activity, get_dashboard_stats
+from services.agent_controller import arun_resume_pipeline, agenerate_resume_from_linkedin
+from services.graph_runtime import run_blocking, shutdown_blocking_executor
+from services.llm_clients import get_chat_model, llm_client_stats
+from services.llm_cache import llm_response_cache, bypass_llm_cache
+from services.db.lancedb_client import search_by_vector, group_chunks_by_document, store_resume, delete_resumes, get_or_create_table, search_resumes as run_resume_search, log_activity, get_dashboard_stats, get_index_report, get_cache_report, schedule_index_maintenance, activity_writer, list_documents, find_duplicate_documents, get_document, tenant_generation, get_embedding_layout, search_resumes_semantic_batch, MAX_SEARCH_LIMIT
+from services.db.maintenance import maintenance_loop, database_report
+from services.db.search_cache import search_cache, search_cache_key
+from services.db.embedding_cache import normalize_query
 from services.export_service import generate_docx
+from services.ingest_jobs import ingest_jobs
+from services.job_definitions import create_job_definition, update_job_definition, get_job_definition, list_job_definitions, delete_job_definition, job_vector
 
 app = FastAPI(title="Resume Intelligence API")
 
@@ -30,21 +40,66 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-UPLOAD_DIR = "data/raw_resumes"
+# Each upload is written to its own directory, UPLOAD_DIR/<upload id>/<n>_<name>, and
+# parsed later by the ingest job: same-named files from other tenants or parallel
+# requests never overwrite it in between. The name is kept only as the document name.
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "data/uploads")
+# Uploads made before per-upload directories (also the share reindex_resumes.py indexes)
+LEGACY_UPLOAD_DIR = "data/raw_resumes"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+@app.on_event("startup")
+async def start_db_maintenance():
+    # Creates scalar indexes on tables that predate them
+    schedule_index_maintenance()
+    # Periodic fragment compaction and old-version cleanup
+    app.state.maintenance_task = asyncio.create_task(maintenance_loop())
+
+@app.on_event("shutdown")
+def shutdown_background_work():
+    app.state.maintenance_task.cancel()
+    ingest_jobs.shutdown()
+    # Write buffered activity events before the process exits
+    activity_writer.close()
+    shutdown_blocking_executor()
+
 class LoginRequest(BaseModel):
     username: str
     password: str
 
 class SearchRequest(BaseModel):
     query: str
+    limit: int = Field(10, ge=1, le=MAX_SEARCH_LIMIT)
+    # Return top-k distinct resumes (best snippets each) instead of top-k chunks
+    group_by_document: Optional[bool] = True
+    reducer: Optional[str] = "max" # 'max', 'mean_top_n' or 'rrf'
+    mode: Optional[str] = "semantic" # 'semantic', 'keyword' (no embedding call) or 'hybrid'
+    # LLM re-ranking of the retrieved resumes; defaults to off for keyword mode
+    rerank: Optional[bool] = None
+
+class BatchSearchRequest(BaseModel):
+    queries: List[str]
+    limit: int = Field(10, ge=1, le=MAX_SEARCH_LIMIT)
+    group_by_document: Optional[bool] = True
+    reducer: Optional[str] = "max"
 
 class AnalyzeRequest(BaseModel):
     resume_text: str
     jd_text: Optional[str] = None
+    # Saved job definition; its precomputed skills (gap) or digest (screen) replace jd_text
+    job_id: Optional[str] = None
     threshold: Optional[int] = 75
 
+class JobDefinitionRequest(BaseModel):
+    title: str
+    description: str
+    status: Optional[str] = "active"
+
+class JobDefinitionUpdate(BaseModel):
+    title: Optional[str] = None
+    description: Optional[str] = None
+    status: Optional[str] = None
+
 class GenerateRequest(BaseModel):
     profile: str
 
@@ -61,6 +116,21 @@ async def get_current_user(authorization: Optional[str] = Header(None)):
     print(f"DEBUG: [auth] Resolved User ID: {user_id}")
     return user_id
 
+# Admin endpoints expose storage paths, table stats and cache contents across
+# tenants. They are off unless ADMIN_API_TOKEN is set, and then require it in X-Admin-Token.
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN")
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    import hmac
+    if not ADMIN_API_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_API_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+def cache_bypass(x_cache_bypass: Optional[str] = Header(None)) -> bool:
+    """X-Cache-Bypass: true skips cached search results and LLM responses (fresh results are still cached)."""
+    return (x_cache_bypass or "").strip().lower() in ("1", "true", "yes")
+
 @app.post("/api/auth/login")
 async def login(request: LoginRequest):
     # Mock authentication
@@ -221,8 +291,7 @@ async def auth_linkedin_callback(code: str, background_tasks: BackgroundTasks):
     # NUCLEAR WIPE: Delete any old LinkedIn profiles for this user to force a fresh sync
     print(f"--- [Wipe] Clearing stale LinkedIn records for {user_id} ---")
     try:
-        table = get_or_create_table()
-        table.delete(f"user_id = '{user_id}' AND filename = 'LinkedIn_Profile.pdf'")
+        await run_blocking(delete_resumes, user_id, ["LinkedIn_Profile.pdf"])
     except Exception as e:
         print(f"DEBUG: Wipe failed (might be first time): {e}")
 
@@ -252,63 +321,177 @@ async def upload_resumes(
     user_id: str = Depends(get_current_user)
 ):
     print(f"--- Uploading {len(files)} files for user {user_id} ---")
-    results = []
     store_db_bool = store_db.lower() == "true"
     
-    for file in files:
-        try:
-            print(f"Processing: {file.filename}")
-            file_path = os.path.join(UPLOAD_DIR, file.filename)
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            
-            text = extract_text(file_path)
-            if store_db_bool:
-                print(f"Storing in DB: {file.filename}")
-                # Pass the key to store_resume so it can compute embeddings
-                store_resume(file.filename, text, user_id, api_key=x_openrouter_key)
-            
-            results.append({"filename": file.filename, "status": "indexed"})
-            # Log activity
-            log_activity(user_id, "upload", file.filename, 0, "N/A")
-
-            print(f"Completed: {file.filename}")
-        except Exception as e:
-            print(f"Error processing {file.filename}: {e}")
-            results.append({"filename": file.filename, "status": "error", "error": str(e)})
-    
-    return {"success": True, "processed": results}
+    # Document names must be unique within an upload: the later file would replace the earlier one
+    filenames = [os.path.basename(file.filename or "") for file in files]
+    duplicates = sorted({name for name in filenames if filenames.count(name) > 1})
+    if duplicates:
+        raise HTTPException(status_code=400, detail=f"Duplicate file names in upload: {', '.join(duplicates)}")
+
+    # Stream files to disk off the event loop; parsing, embedding and storage run in the job queue
+    upload_dir = os.path.join(UPLOAD_DIR, uuid4().hex)
+    os.makedirs(upload_dir)
+    saved = []
+    for n, (file, filename) in enumerate(zip(files, filenames)):
+        file_path = os.path.join(upload_dir, f"{n}_{filename}")
+
+        def save(src=file.file, dst=file_path):
+            with open(dst, "wb") as buffer:
+                shutil.copyfileobj(src, buffer)
+
+        await run_blocking(save)
+        saved.append((filename, file_path))
+
+    job = ingest_jobs.submit(user_id, saved, store_db=store_db_bool, api_key=x_openrouter_key)
+    status = job.to_dict()
+    return {"success": True, "job_id": job.id, "status": status["status"], "processed": status["files"]}
+
+@app.get("/api/resumes")
+async def list_resumes(user_id: str = Depends(get_current_user)):
+    documents = await run_blocking(list_documents, user_id)
+    duplicates = await run_blocking(find_duplicate_documents, user_id)
+    return {"total": len(documents), "resumes": documents, "duplicates": duplicates}
+
+@app.get("/api/jobs/{job_id}")
+async def get_job_status(job_id: str, user_id: str = Depends(get_current_user)):
+    job = ingest_jobs.get(job_id, user_id=user_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_status(job_id: str, user_id: str = Depends(get_current_user)):
+    job = ingest_jobs.get(job_id, user_id=user_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        last_version = -1
+        while True:
+            if job.version != last_version:
+                last_version = job.version
+                yield f"data: {json.dumps(job.to_dict())}\n\n"
+            if job.done:
+                return
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
 
 @app.get("/api/dashboard/stats")
 async def dashboard_stats(user_id: str = Depends(get_current_user)):
-    return get_dashboard_stats(user_id)
+    return await run_blocking(get_dashboard_stats, user_id)
+
+@app.get("/api/admin/indexes", dependencies=[Depends(require_admin)])
+async def index_report():
+    return await run_blocking(get_index_report)
+
+@app.get("/api/admin/caches", dependencies=[Depends(require_admin)])
+async def cache_report():
+    report = await run_blocking(get_cache_report)
+    report["llm_clients"] = llm_client_stats()
+    report["llm_responses"] = await run_blocking(llm_response_cache.stats) if llm_response_cache else None
+    return report
+
+@app.get("/api/admin/storage", dependencies=[Depends(require_admin)])
+async def storage_report():
+    return await run_blocking(database_report)
+
+def retrieval_results(df):
+    """Search hits without LLM re-ranking: relevance scaled to 0-100 against the best hit."""
+    score_col = next((c for c in ("score", "_relevance_score", "_score") if c in df.columns), None)
+    top_score = df[score_col].max() if score_col else 0
+    results = []
+    for record in df.to_dict("records"):
+        score = int(round(100 * record[score_col] / top_score)) if score_col and top_score > 0 else 0
+        results.append({
+            "filename": record["filename"],
+            "score": score,
+            "justification": record["text"][:300],
+            "missing_skills": [],
+            "auto_screen": "N/A"
+        })
+    return results
+
+@app.post("/api/search/batch")
+async def search_resumes_batch(
+    request: BatchSearchRequest,
+    x_openrouter_key: Optional[str] = Header(None),
+    user_id: str = Depends(get_current_user)
+):
+    """Runs several saved searches in one embedding call and one vector query (no LLM re-ranking)."""
+    import time
+    start_time = time.time()
+    try:
+        frames = await run_blocking(
+            search_resumes_semantic_batch, request.queries, user_id, limit=request.limit, api_key=x_openrouter_key,
+            group_by_document=request.group_by_document, reducer=request.reducer
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    print(f"--- [Batch Search] {len(request.queries)} queries for user {user_id} in {time.time() - start_time:.2f}s ---")
+    return {
+        "results": [
+            {"query": query, "results": retrieval_results(df) if not df.empty else []}
+            for query, df in zip(request.queries, frames)
+        ]
+    }
 
 @app.post("/api/search")
 async def search_resumes(
     request: SearchRequest,
     x_openrouter_key: Optional[str] = Header(None),
     x_llm_model: Optional[str] = Header(None),
-    user_id: str = Depends(get_current_user)
+    user_id: str = Depends(get_current_user),
+    bypass: bool = Depends(cache_bypass)
 ):
     import time
     start_time = time.time()
     print(f"--- [Search Start] Query: '{request.query}' for user {user_id} ---")
+
+    rerank = request.rerank if request.rerank is not None else request.mode != "keyword"
+    # Identical searches over unchanged tenant data reuse the previous (LLM-ranked) response
+    generation, layout = await run_blocking(
+        lambda: (tenant_generation(user_id), get_embedding_layout(get_or_create_table()))
+    )
+    cache_key = search_cache_key(
+        user_id, generation,
+        query=normalize_query(request.query), limit=request.limit, mode=request.mode,
+        group_by_document=request.group_by_document, reducer=request.reducer, rerank=rerank,
+        llm_model=(x_llm_model or "gpt-4o-mini") if rerank else None,
+        embedding=layout
+    )
+    cached = None if bypass else await run_blocking(search_cache.get, cache_key)
+    if cached is not None:
+        print(f"--- [Search End] Served from cache in {time.time() - start_time:.3f}s ---")
+        return cached
     
-    # Perform semantic search to filter relevant resumes/chunks
+    # Perform semantic / keyword / hybrid search to filter relevant resumes/chunks
     db_start = time.time()
-    df = search_resumes_semantic(request.query, user_id, limit=10, api_key=x_openrouter_key)
+    try:
+        df = await run_blocking(
+            run_resume_search, request.query, user_id, limit=request.limit, api_key=x_openrouter_key, mode=request.mode,
+            group_by_document=request.group_by_document, reducer=request.reducer
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     db_end = time.time()
-    print(f"DEBUG: LanceDB search took {db_end - db_start:.2f}s. Found {len(df)} results.")
+    print(f"DEBUG: LanceDB {request.mode} search took {db_end - db_start:.2f}s. Found {len(df)} results.")
     
     if df.empty:
         return {"results": []}
 
+    if not rerank:
+        results = retrieval_results(df)
+        print(f"--- [Search End] Total time: {time.time() - start_time:.2f}s (no LLM re-ranking) ---")
+        await run_blocking(search_cache.put, cache_key, {"results": results})
+        return {"results": results}
+
     # Format the filtered results for the Agentic AI
     resumes_text = ""
     for _, row in df.iterrows():
         resumes_text += f"Filename: {row['filename']}\nExcerpt:\n{row['text']}\n--------------------\n"
     
-    from langchain_openai import ChatOpenAI
     from langchain_core.prompts import PromptTemplate
     from langchain_core.output_parsers import StrOutputParser
 
@@ -327,17 +510,19 @@ async def search_resumes(
     llm_start = time.time()
     print(f"DEBUG: Passing {len(df)} results to LLM ({x_llm_model or 'gpt-4o-mini'})...")
     
-    # Initialize LLM with dynamic config if available
-    llm = ChatOpenAI(
+    # Shared pooled client for the dynamic config; the timeout prevents infinite hanging.
+    # Temperature 0 keeps the ranking stable and lets repeated excerpts hit the LLM cache.
+    llm = get_chat_model(
         model=x_llm_model or "gpt-4o-mini",
+        temperature=0,
         api_key=x_openrouter_key or os.getenv("OPEN_ROUTER_KEY"),
-        base_url="https://openrouter.ai/api/v1",
-        timeout=30 # Add a timeout to prevent infinite hanging
+        timeout=30
     )
     
     try:
         chain = prompt | llm | StrOutputParser()
-        raw_result = chain.invoke({"resumes": resumes_text, "query": request.query})
+        with bypass_llm_cache(bypass):
+            raw_result = await chain.ainvoke({"resumes": resumes_text, "query": request.query})
         llm_end = time.time()
         print(f"DEBUG: LLM response received in {llm_end - llm_start:.2f}s.")
         print(f"DEBUG: LLM Raw Output (first 100 char): {raw_result[:100]}...")
@@ -348,20 +533,103 @@ async def search_resumes(
         
         total_time = time.time() - start_time
         print(f"--- [Search End] Total time: {total_time:.2f}s ---")
+        await run_blocking(search_cache.put, cache_key, parsed_result)
         return parsed_result
     except Exception as e:
         print(f"DEBUG: Error during LLM processing: {e}")
         return {"results": [], "error": f"Search failed or timed out: {str(e)}"}
 
+@app.post("/api/job-definitions")
+async def create_job(
+    request: JobDefinitionRequest,
+    x_openrouter_key: Optional[str] = Header(None),
+    x_llm_model: Optional[str] = Header(None),
+    user_id: str = Depends(get_current_user)
+):
+    """Saves a job description; its skills, screening digest and embedding are computed once, here."""
+    llm_config = {"api_key": x_openrouter_key, "model": x_llm_model} if x_openrouter_key else None
+    try:
+        return await create_job_definition(user_id, request.title, request.description, status=request.status,
+                                           llm_config=llm_config, api_key=x_openrouter_key)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/job-definitions")
+async def list_jobs(user_id: str = Depends(get_current_user)):
+    jobs = await run_blocking(list_job_definitions, user_id)
+    return {"total": len(jobs), "jobs": jobs}
+
+@app.get("/api/job-definitions/{job_id}")
+async def get_job(job_id: str, user_id: str = Depends(get_current_user)):
+    job = await run_blocking(get_job_definition, user_id, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job definition not found")
+    return job
+
+@app.put("/api/job-definitions/{job_id}")
+async def update_job(
+    job_id: str,
+    request: JobDefinitionUpdate,
+    x_openrouter_key: Optional[str] = Header(None),
+    x_llm_model: Optional[str] = Header(None),
+    user_id: str = Depends(get_current_user)
+):
+    llm_config = {"api_key": x_openrouter_key, "model": x_llm_model} if x_openrouter_key else None
+    try:
+        job = await update_job_definition(user_id, job_id, title=request.title, description=request.description,
+                                          status=request.status, llm_config=llm_config, api_key=x_openrouter_key)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job definition not found")
+    return job
+
+@app.delete("/api/job-definitions/{job_id}")
+async def delete_job(job_id: str, user_id: str = Depends(get_current_user)):
+    if not await run_blocking(delete_job_definition, user_id, job_id):
+        raise HTTPException(status_code=404, detail="Job definition not found")
+    return {"success": True}
+
+@app.get("/api/job-definitions/{job_id}/candidates")
+async def job_candidates(
+    job_id: str,
+    limit: int = Query(10, ge=1, le=MAX_SEARCH_LIMIT),
+    x_openrouter_key: Optional[str] = Header(None),
+    user_id: str = Depends(get_current_user)
+):
+    """Resumes closest to the job, searched with its stored embedding (no LLM or embedding call)."""
+    job = await run_blocking(get_job_definition, user_id, job_id, True)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job definition not found")
+
+    def search():
+        vector = job_vector(job, api_key=x_openrouter_key)
+        chunks = search_by_vector(vector, user_id, limit * 5, columns=["filename", "text"])
+        return group_chunks_by_document(chunks, limit=limit)
+
+    df = await run_blocking(search)
+    return {"job_id": job_id, "results": retrieval_results(df) if not df.empty else []}
+
+async def resolve_job_definition(request: AnalyzeRequest, user_id: str):
+    """The saved job an analysis refers to, if any; 404 for unknown ids."""
+    if not request.job_id:
+        return None
+    job = await run_blocking(get_job_definition, user_id, request.job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job definition not found")
+    return job
+
 @app.post("/api/analyze/quality")
 async def analyze_quality(
     request: AnalyzeRequest,
     x_openrouter_key: Optional[str] = Header(None),
     x_llm_model: Optional[str] = Header(None),
-    user_id: str = Depends(get_current_user)
+    user_id: str = Depends(get_current_user),
+    bypass: bool = Depends(cache_bypass)
 ):
     llm_config = {"api_key": x_openrouter_key, "model": x_llm_model} if x_openrouter_key else None
-    output = run_resume_pipeline(task="score", resumes=[request.resume_text], llm_config=llm_config)
+    with bypass_llm_cache(bypass):
+        output = await arun_resume_pipeline(task="score", resumes=[request.resume_text], llm_config=llm_config)
     
     # Log activity
     try:
@@ -377,15 +645,25 @@ async def analyze_gap(
     request: AnalyzeRequest,
     x_openrouter_key: Optional[str] = Header(None),
     x_llm_model: Optional[str] = Header(None),
-    user_id: str = Depends(get_current_user)
+    user_id: str = Depends(get_current_user),
+    bypass: bool = Depends(cache_bypass)
 ):
     llm_config = {"api_key": x_openrouter_key, "model": x_llm_model} if x_openrouter_key else None
-    output = run_resume_pipeline(task="skill_gap", resumes=[request.resume_text], query=request.jd_text, llm_config=llm_config)
+    job = await resolve_job_definition(request, user_id)
+    with bypass_llm_cache(bypass):
+        # A saved job's skills were extracted when it was saved: only the resume costs an LLM call
+        output = await arun_resume_pipeline(
+            task="skill_gap",
+            resumes=[request.resume_text],
+            query=job["description"] if job else request.jd_text,
+            llm_config=llm_config,
+            jd_skills=job["skills"] if job else None
+        )
     
     # Log activity
     try:
         score = output.get("match_score", 0)
-        log_activity(user_id, "skill_gap", "Manual Input", score)
+        log_activity(user_id, "skill_gap", job["title"] if job else "Manual Input", score)
     except Exception as e:
         print(f"DEBUG: Failed to log skill_gap activity: {e}")
 
@@ -396,22 +674,26 @@ async def analyze_screen(
     request: AnalyzeRequest,
     x_openrouter_key: Optional[str] = Header(None),
     x_llm_model: Optional[str] = Header(None),
-    user_id: str = Depends(get_current_user)
+    user_id: str = Depends(get_current_user),
+    bypass: bool = Depends(cache_bypass)
 ):
     llm_config = {"api_key": x_openrouter_key, "model": x_llm_model} if x_openrouter_key else None
-    output = run_resume_pipeline(
-        task="screen", 
-        resumes=[request.resume_text], 
-        query=request.jd_text, 
-        llm_config=llm_config,
-        threshold=request.threshold
-    )
+    job = await resolve_job_definition(request, user_id)
+    with bypass_llm_cache(bypass):
+        output = await arun_resume_pipeline(
+            task="screen", 
+            resumes=[request.resume_text], 
+            # The saved job's compact digest keeps every screening prompt short
+            query=(job["digest"] or job["description"]) if job else request.jd_text, 
+            llm_config=llm_config,
+            threshold=request.threshold
+        )
     
     # Log activity
     try:
         score = output.get("score", {}).get("overall", 0)
         decision = "SELECTED" if output.get("decision", {}).get("selected") else "REJECTED"
-        log_activity(user_id, "screen", "Manual Input", score, decision)
+        log_activity(user_id, "screen", job["title"] if job else "Manual Input", score, decision)
     except Exception as e:
         print(f"DEBUG: Failed to log screen activity: {e}")
 
@@ -424,7 +706,7 @@ async def generate_resume_endpoint(
     x_llm_model: Optional[str] = Header(None)
 ):
     llm_config = {"api_key": x_openrouter_key, "model": x_llm_model} if x_openrouter_key else None
-    output = run_resume_pipeline(task="generate", query=request.profile, llm_config=llm_config)
+    output = await arun_resume_pipeline(task="generate", query=request.profile, llm_config=llm_config)
     return output
 
 @app.post("/api/linkedin/scrape")
@@ -437,13 +719,23 @@ async def linkedin_scrape(
 ):
     llm_config = {"api_key": x_openrouter_key, "model": x_llm_model} if x_openrouter_key else None
     linkedin_creds = {"email": x_linkedin_user, "password": x_linkedin_pass} if x_linkedin_user and x_linkedin_pass else None
-    output = generate_resume_from_linkedin(request.query, llm_config=llm_config, linkedin_creds=linkedin_creds)
+    output = await agenerate_resume_from_linkedin(request.query, llm_config=llm_config, linkedin_creds=linkedin_creds)
     return output
 
+def find_uploaded_file(filename: str):
+    """Path of the most recent upload stored under this document name, or None."""
+    pattern = os.path.join(glob.escape(UPLOAD_DIR), "*", f"*_{glob.escape(filename)}")
+    # <n>_<name>: the name must match exactly, not just end the stored file name
+    matches = [p for p in glob.glob(pattern) if os.path.basename(p).split("_", 1)[1] == filename]
+    if matches:
+        return max(matches, key=os.path.getmtime)
+    legacy_path = os.path.join(LEGACY_UPLOAD_DIR, filename)
+    return legacy_path if os.path.isfile(legacy_path) else None
+
 @app.get("/api/resumes/download/{filename}")
 async def download_resume(filename: str):
-    file_path = os.path.join(UPLOAD_DIR, filename)
-    if not os.path.exists(file_path):
+    file_path = await run_blocking(find_uploaded_file, filename)
+    if file_path is None:
         raise HTTPException(status_code=404, detail="File not found")
     return FileResponse(path=file_path, filename=filename, media_type='application/octet-stream')
 
@@ -506,28 +798,9 @@ async def get_user_synced_profile(user_id: str = Depends(get_current_user)):
     """
     Fetches the most recent 'LinkedIn_Profile.pdf' content for the user.
     """
-    # We can search specifically for this filename
-    # Or just use the search function with a specific filter
-    # Ideally, store_resume should facilitate retrieval. 
-    # Let's simple-search the DB for this user and filename
-    
-    # Check if we have an endpoint or service query for this. 
-    # We'll use search_resumes_semantic with a special "filename" filter if possible, 
-    # or just iterate dashboard stats? No, dashboard stats is aggregate.
-    
-    # Let's implement a direct fetch helper in lancedb_client or here.
-    # For now, quick hack: use existing search but rely on filename match if we had one.
-    # actually, allow's just use the `download_resume` logic if it were a file, but it's in DB.
-    
-    # Better: Query DB directly.
-    from services.db.lancedb_client import get_or_create_table
-    table = get_or_create_table()
-    
-    # Filter by user_id AND filename
-    # distinct filename? 
-    results = table.search([0]*1536).where(f"user_id = '{user_id}' AND filename = 'LinkedIn_Profile.pdf'").limit(1).to_pandas()
-    
-    if results.empty:
+    # Keyed lookup of the whole stored profile (all chunks, reassembled)
+    document = await run_blocking(get_document, user_id, "LinkedIn_Profile.pdf")
+    if document is None:
         return {"found": False}
         
     # We found it. Now we need to parse it back to JSON for the frontend
@@ -540,8 +813,7 @@ async def get_user_synced_profile(user_id: str = Depends(get_current_user)):
     # If the stored content is just text, we return a mock-like structure wrapping that text 
     # so the frontend can at least show something, or we trigger a quick parse.
     
-    row = results.iloc[0]
-    text_content = row['text']
+    text_content = document["text"]
     
     try:
         # Try to parse the stored JSON
@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+# Add root to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Benchmark against a throwaway database, never data/lancedb
+BENCH_DB = tempfile.mkdtemp(prefix="bench_lancedb_")
+os.environ["LANCEDB_PATH"] = BENCH_DB
+# The engine is off by default; the benchmark measures it for every tenant size
+os.environ.setdefault("MEMORY_INDEX_MAX_CHUNKS", "20000")
+
+import numpy as np
+import pyarrow as pa
+
+from services.db.lancedb_client import (
+    get_or_create_table, get_or_create_documents_table, migrate_to_documents, search_by_vector, memory_engine, resume_schema, EMBEDDING_DIM
+)
+from services.db.vector_migration import vector_array
+from bench_vector_layout import synthetic_vectors
+
+K = 10
+
+def populate(tenants, chunks_per_tenant, dim):
+    """Stores tenants x chunks_per_tenant synthetic chunks (4 chunks per resume)."""
+    table = get_or_create_table()
+    for t in range(tenants):
+        vectors = synthetic_vectors(chunks_per_tenant, dim=dim, seed=t)
+        n = len(vectors)
+        table.add(pa.table({
+            "id": [f"t{t}-chunk-{i}" for i in range(n)],
+            "user_id": [f"tenant-{t}"] * n,
+            "filename": [f"resume-{i // 4}.pdf" for i in range(n)],
+            "text": [f"chunk {i}" for i in range(n)],
+            "vector": vector_array(vectors, dim, "float32"),
+            "doc_id": pa.nulls(n, pa.string()),
+            "chunk_index": pa.nulls(n, pa.int32())
+        }, schema=resume_schema))
+    # Fills doc_id/chunk_index and the documents table, which the engine's coherence key is built from
+    migrate_to_documents(table)
+
+def measure(queries, user_id, use_memory):
+    latencies = []
+    results = []
+    for q in queries:
+        start = time.perf_counter()
+        result = search_by_vector(q.tolist(), user_id, K, columns=["id", "filename"], use_memory=use_memory)
+        latencies.append(time.perf_counter() - start)
+        results.append(result["id"].to_pylist())
+    return results, float(np.median(latencies)) * 1000, float(np.percentile(latencies, 95)) * 1000
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the in-memory tenant engine with LanceDB search.")
+    parser.add_argument("--tenants", type=int, default=4)
+    parser.add_argument("--chunks", type=int, nargs="+", default=[500, 2000, 5000], help="Chunks per tenant")
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+
+    try:
+        print(f"{'chunks':>7} {'lancedb p50':>12} {'p95':>7} {'memory p50':>11} {'p95':>7} {'load ms':>8} {'overlap':>8}")
+        for chunks in args.chunks:
+            get_or_create_table().delete("true")
+            get_or_create_documents_table().delete("true")
+            memory_engine.clear()
+            populate(args.tenants, chunks, EMBEDDING_DIM)
+            queries = synthetic_vectors(args.queries, dim=EMBEDDING_DIM, seed=1000 + chunks)
+
+            lance_results, lance_p50, lance_p95 = measure(queries, "tenant-0", use_memory=False)
+            start = time.perf_counter()
+            search_by_vector(queries[0].tolist(), "tenant-0", K, use_memory=True)
+            load_ms = (time.perf_counter() - start) * 1000
+            memory_results, memory_p50, memory_p95 = measure(queries, "tenant-0", use_memory=True)
+
+            # Both paths are exact searches here (no vector index), so the top-k should match
+            overlap = np.mean([len(set(a) & set(b)) / K for a, b in zip(lance_results, memory_results)])
+            print(f"{chunks:>7} {lance_p50:12.2f} {lance_p95:7.2f} {memory_p50:11.2f} {memory_p95:7.2f} "
+                  f"{load_ms:8.1f} {overlap:8.3f}")
+        print(f"\n{memory_engine.stats()}")
+    finally:
+        shutil.rmtree(BENCH_DB, ignore_errors=True)
@@ -0,0 +1,111 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+# Add root to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Benchmark against a throwaway database, never data/lancedb
+BENCH_DB = tempfile.mkdtemp(prefix="bench_lancedb_")
+SOURCE_DB = os.getenv("LANCEDB_PATH", "data/lancedb")
+os.environ["LANCEDB_PATH"] = BENCH_DB
+
+import numpy as np
+import pyarrow as pa
+import lancedb
+
+from services.db.lancedb_client import db, make_resume_schema, _ivf_pq_config, VECTOR_INDEX_NAME
+from services.db.vector_migration import convert_batch, vector_array
+from services.db.maintenance import _dir_size
+
+LAYOUTS = [(1536, "float32"), (1536, "float16"), (512, "float32"), (512, "float16")]
+K = 10
+
+def synthetic_vectors(rows, dim=1536, clusters=200, seed=0):
+    """
+    Clustered unit vectors whose variance decays along the dimensions, like
+    text-embedding-3 (Matryoshka) outputs where leading components carry most
+    of the signal. Pass --source to measure real embeddings instead.
+    """
+    rng = np.random.default_rng(seed)
+    scale = (1 + np.arange(dim) / 64) ** -0.75
+    centers = rng.standard_normal((clusters, dim)) * scale
+    vectors = centers[rng.integers(0, clusters, rows)] + 0.6 * rng.standard_normal((rows, dim)) * scale
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+def stored_vectors(path, rows):
+    table = lancedb.connect(path).open_table("resumes")
+    column = table.search().select(["vector"]).limit(rows).to_arrow()["vector"].combine_chunks()
+    vectors = column.flatten().to_numpy(zero_copy_only=False).astype(np.float32).reshape(-1, column.type.list_size)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def base_table(vectors):
+    n, dim = vectors.shape
+    schema = make_resume_schema(dim=dim, dtype="float32")
+    return pa.table({
+        "id": [f"chunk-{i}" for i in range(n)],
+        "user_id": ["tenant-0"] * n,
+        "filename": [f"resume-{i // 4}.pdf" for i in range(n)],
+        "text": [""] * n,
+        "vector": vector_array(vectors, dim, "float32"),
+        "doc_id": [f"doc-{i // 4}" for i in range(n)],
+        "chunk_index": pa.array(np.arange(n) % 4, pa.int32())
+    }, schema=schema)
+
+def measure(table, queries, truth, dim):
+    latencies = []
+    hits = 0
+    for q, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = table.search(q[:dim].tolist()).limit(K).select(["id"]).to_arrow()
+        latencies.append(time.perf_counter() - start)
+        hits += len(set(result["id"].to_pylist()) & expected)
+    return hits / (len(queries) * K), float(np.median(latencies)) * 1000
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare size, scan speed and recall of vector layouts.")
+    parser.add_argument("--rows", type=int, default=20000, help="Chunk vectors to test with")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--source", action="store_true",
+                        help=f"Use real vectors from the resumes table at {SOURCE_DB} (read only)")
+    parser.add_argument("--index", action="store_true", help="Also build and measure an IVF-PQ index per layout")
+    args = parser.parse_args()
+
+    try:
+        vectors = stored_vectors(SOURCE_DB, args.rows) if args.source else synthetic_vectors(args.rows)
+        rng = np.random.default_rng(1)
+        # Queries: perturbed copies of stored chunks; ground truth is exact float32 1536-d cosine
+        queries = vectors[rng.choice(len(vectors), args.queries, replace=False)]
+        queries = queries + 0.05 * rng.standard_normal(queries.shape).astype(np.float32) / np.sqrt(queries.shape[1])
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+        ids = np.array([f"chunk-{i}" for i in range(len(vectors))])
+        truth = [set(ids[np.argsort(-(vectors @ q))[:K]]) for q in queries]
+
+        source = base_table(vectors)
+        print(f"{len(vectors)} vectors, {args.queries} queries, recall@{K} against exact float32 1536-d search\n")
+        print(f"{'layout':<14} {'table MB':>9} {'scan ms':>8} {'recall':>7}" + (f" {'index MB':>9} {'ann ms':>7} {'recall':>7}" if args.index else ""))
+        baseline = None
+        for dim, dtype in LAYOUTS:
+            if dim > vectors.shape[1]:
+                continue
+            name = f"layout_{dim}_{dtype}"
+            schema = make_resume_schema(dim=dim, dtype=dtype)
+            table = db.create_table(name, schema=schema, mode="overwrite")
+            for batch in source.to_batches(max_chunksize=5000):
+                table.add(convert_batch(batch, schema))
+            size = _dir_size(os.path.join(BENCH_DB, f"{name}.lance"))
+            recall, latency = measure(table, queries, truth, dim)
+            baseline = baseline or size
+            line = f"{dim:>4}-d {dtype:<8} {size / 1e6:9.1f} {latency:8.2f} {recall:7.3f}"
+            if args.index:
+                before = _dir_size(os.path.join(BENCH_DB, f"{name}.lance", "_indices"))
+                table.create_index("vector", config=_ivf_pq_config(len(vectors), dim), name=VECTOR_INDEX_NAME)
+                index_size = _dir_size(os.path.join(BENCH_DB, f"{name}.lance", "_indices")) - before
+                ann_recall, ann_latency = measure(table, queries, truth, dim)
+                line += f" {index_size / 1e6:9.1f} {ann_latency:7.2f} {ann_recall:7.3f}"
+            print(line + f"   ({baseline / size:.1f}x smaller)")
+    finally:
+        shutil.rmtree(BENCH_DB, ignore_errors=True)
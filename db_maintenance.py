@@ -0,0 +1,86 @@
+import os
+import sys
+import argparse
+from dotenv import load_dotenv
+
+# Add root to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+load_dotenv()
+
+from services.db.lancedb_client import DB_PATH, get_index_report, ensure_vector_index, migrate_to_documents
+from services.db.vector_migration import migrate_vector_layout
+from services.db.maintenance import database_report, needs_compaction, run_maintenance, VERSION_RETENTION_HOURS
+
+def _format_bytes(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024:
+            return f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
+
+def print_report():
+    print(f"--- LanceDB at {DB_PATH} ---")
+    reports = database_report()
+    if not reports:
+        print("No tables found.")
+        return
+
+    for r in reports:
+        flag = "  (needs compaction)" if needs_compaction(r) else ""
+        print(f"{r['table']}: {r['rows']} rows, {r['fragments']} fragments ({r['small_fragments']} small), "
+              f"{r['versions']} versions, {_format_bytes(r['disk_bytes'])} on disk{flag}")
+
+    if any(r["table"] == "resumes" for r in reports):
+        report = get_index_report()
+        embedding = report["embedding"]
+        print(f"\nEmbedding layout of '{report['table']}': {embedding['model']}, {embedding['dim']}-d {embedding['dtype']}")
+        print(f"Index coverage for '{report['table']}' (ANN threshold {report['index_threshold']} rows):")
+        vector_index = report["vector_index"]
+        if vector_index is None:
+            print("  No vector index (queries use brute-force scans).")
+        else:
+            print(f"  {vector_index['index_type']} ({vector_index['distance_type']}): "
+                  f"{vector_index['indexed_rows']} indexed, {vector_index['unindexed_rows']} unindexed "
+                  f"({vector_index['coverage']:.1%} coverage)")
+        for idx in report["indices"]:
+            print(f"  - {idx['name']}: {idx['type']} on {', '.join(idx['columns'])} "
+                  f"({idx['indexed_rows']} indexed, {idx['unindexed_rows']} unindexed)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect and maintain the LanceDB tables.")
+    sub = parser.add_subparsers(dest="command")
+    sub.add_parser("report", help="Show rows, fragments, versions, disk size and index coverage (default)")
+    compact = sub.add_parser("compact", help="Compact fragments and prune old versions")
+    compact.add_argument("--force", action="store_true", help="Compact every table, not only those over the thresholds")
+    compact.add_argument("--retention-hours", type=float, default=VERSION_RETENTION_HOURS,
+                         help="Keep table versions newer than this many hours")
+    sub.add_parser("build-index", help="(Re)build the resumes vector index")
+    sub.add_parser("migrate-documents", help="Backfill doc_id/chunk_index and the documents table from existing chunks")
+    embeddings = sub.add_parser("migrate-embeddings", help="Rewrite the resumes vectors into a new model/dimension/dtype layout")
+    embeddings.add_argument("--dim", type=int, required=True, help="Target embedding dimension, e.g. 512")
+    embeddings.add_argument("--dtype", choices=["float32", "float16"], default="float32", help="Vector storage dtype")
+    embeddings.add_argument("--model", default=None, help="Target embedding model (default: keep the current one)")
+    embeddings.add_argument("--reembed", action="store_true",
+                            help="Recompute vectors through the API instead of re-projecting the stored ones")
+    args = parser.parse_args()
+
+    if args.command == "compact":
+        results = run_maintenance(force=args.force, retention_hours=args.retention_hours)
+        if not results:
+            print("Nothing to compact.")
+        print_report()
+    elif args.command == "build-index":
+        action = ensure_vector_index(rebuild=True)
+        print(f"Vector index: {action or 'skipped (fewer than 256 rows)'}.")
+        print_report()
+    elif args.command == "migrate-embeddings":
+        result = migrate_vector_layout(args.dim, dtype=args.dtype, model=args.model, reembed=args.reembed)
+        print(f"Migrated {result['rows']} rows from {result['from']} to {result['to']}.")
+        print_report()
+    elif args.command == "migrate-documents":
+        result = migrate_to_documents()
+        print(f"Migrated {result['chunks']} chunks into {result['documents']} documents.")
+        print_report()
+    else:
+        print_report()
@@ -33,8 +33,21 @@ const ResumeUpload = () => {
             console.log("Sending request to /resumes/upload");
             const response = await api.post('/resumes/upload', formData);
             console.log("Upload response:", response.data);
-            setResults(response.data.processed);
-            setFiles(prev => prev.map(f => ({ ...f, status: 'indexed' })));
+
+            // Upload returns a job id immediately; poll it for per-file progress
+            const jobId = response.data.job_id;
+            let job = response.data;
+            while (job.status !== 'completed' && job.status !== 'failed') {
+                await new Promise(resolve => setTimeout(resolve, 1000));
+                job = (await api.get(`/jobs/${jobId}`)).data;
+                const statuses: Record<string, string> = {};
+                (job.files || []).forEach((f: any) => { statuses[f.filename] = f.status; });
+                setFiles(prev => prev.map(f => ({ ...f, status: statuses[f.name] || f.status })));
+            }
+            setResults((job.files || []).filter((f: any) => f.status === 'indexed'));
+            if (job.status === 'failed') {
+                setFiles(prev => prev.map(f => f.status === 'indexed' ? f : { ...f, status: 'error' }));
+            }
         } catch (err: any) {
             console.error("Upload error details:", err.response?.data || err.message);
             setFiles(prev => prev.map(f => ({ ...f, status: 'error' })));
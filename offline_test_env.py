@@ -0,0 +1,25 @@
+"""
+Offline environment shared by the test modules: throwaway LanceDB, upload and
+LLM response cache directories, and the local hashing embedder. Import it before
+any services module; under pytest all test modules share one directory, which
+is removed when the process exits.
+"""
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+# Add root to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+TEST_DIR = tempfile.mkdtemp(prefix="test_resume_intelligence_")
+atexit.register(shutil.rmtree, TEST_DIR, ignore_errors=True)
+
+os.environ["LANCEDB_PATH"] = os.path.join(TEST_DIR, "lancedb")
+os.environ["UPLOAD_DIR"] = os.path.join(TEST_DIR, "uploads")
+os.environ["LLM_CACHE_PATH"] = os.path.join(TEST_DIR, "llm_cache.sqlite")
+os.environ["EMBEDDING_PROVIDER"] = "hashing"
+os.environ["EMBEDDING_DIM"] = "256"
+os.environ.pop("EMBEDDING_MODEL", None)
+os.environ.pop("OPEN_ROUTER_KEY", None)
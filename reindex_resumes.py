@@ -1,5 +1,13 @@
 import os
 import sys
+import json
+import time
+import queue
+import hashlib
+import argparse
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from dotenv import load_dotenv
 
 # Add root to sys.path
@@ -7,57 +15,282 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 load_dotenv()
 
-from services.db.lancedb_client import store_resume, db, get_or_create_table
-from services.resume_parser import extract_text
+from services.db.lancedb_client import store_resumes, delete_resumes, db, get_or_create_table, get_embedding_layout, EMBEDDING_MODEL
+from services.db.embedding_providers import resolve_provider
+from services.resume_parser import extract_document
 
 RESUME_DIR = "data/raw_resumes"
+# Fingerprints of indexed files, keyed by their path relative to the resume
+# directory (also their document name); rewritten after every committed batch so
+# an interrupted run resumes where it stopped.
+MANIFEST_PATH = "data/reindex_manifest.json"
+# Re-indexed resumes are owned by this tenant (the default dashboard user)
+REINDEX_USER_ID = os.getenv("REINDEX_USER_ID", "user_alex_chen_123")
+# Number of files whose chunks are embedded and stored together
+FILES_PER_BATCH = 16
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt')
 
-def reindex_all():
+# ---------- FINGERPRINTS ----------
+def load_manifest(path, user_id):
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("user_id") == user_id:
+            return manifest
+        print(f"Manifest {path} belongs to another user, starting fresh.")
+    return {"user_id": user_id, "files": {}}
+
+def save_manifest(manifest, path):
+    # Write to a temp file and rename so a crash never leaves a torn checkpoint
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, path)
+
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def scan_files(resume_dir, manifest, full=False):
+    """
+    Splits the directory tree into (candidates, unchanged, missing) using path,
+    size and mtime. missing: manifest entries whose file no longer exists.
+    """
+    candidates = []
+    unchanged = []
+    seen = set()
+    for root, dirs, files in os.walk(resume_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.endswith(SUPPORTED_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            # Relative path, so same-named files in different folders stay separate documents
+            filename = os.path.relpath(path, resume_dir).replace(os.sep, "/")
+            seen.add(filename)
+            st = os.stat(path)
+            fingerprint = {"size": st.st_size, "mtime": st.st_mtime}
+            previous = manifest["files"].get(filename)
+            if (not full and previous
+                    and previous["size"] == st.st_size
+                    and previous["mtime"] == st.st_mtime):
+                unchanged.append(filename)
+            else:
+                candidates.append((filename, path, fingerprint, previous))
+    missing = sorted(set(manifest["files"]) - seen)
+    return candidates, unchanged, missing
+
+# ---------- PARSING (runs in worker processes) ----------
+def parse_file(filename, file_path, previous_hash):
+    """Hashes and extracts a file; text extraction is skipped when the content hash is unchanged."""
+    try:
+        content_hash = file_sha256(file_path)
+        if previous_hash == content_hash:
+            return {"filename": filename, "sha256": content_hash, "unchanged": True}
+        return dict(extract_document(file_path), filename=filename, sha256=content_hash)
+    except Exception as e:
+        return {"filename": filename, "error": str(e)}
+
+# ---------- PIPELINE ----------
+class ReindexStats:
+    def __init__(self):
+        self.indexed = 0
+        self.unchanged = 0
+        self.same_text = 0 # Modified files whose extracted text was already stored
+        self.empty = 0
+        self.errors = 0
+
+def embed_consumer(batches, manifest, manifest_path, user_id, stats, lock, full=False):
+    """Embeds and stores parsed batches while the process pool keeps parsing."""
+    while True:
+        batch = batches.get()
+        if batch is None:
+            return
+        try:
+            # --full re-chunks and re-embeds even when the stored text is identical
+            written = set(store_resumes([{k: v for k, v in d.items() if k != "fingerprint"} for d in batch],
+                                        user_id, replace=True, force=full))
+        except Exception as e:
+            with lock:
+                stats.errors += len(batch)
+            print(f"  Error indexing batch of {len(batch)} files: {e}")
+            continue
+
+        with lock:
+            for doc in batch:
+                manifest["files"][doc["filename"]] = doc["fingerprint"]
+                if doc["filename"] in written:
+                    stats.indexed += 1
+                    print(f"  Successfully indexed {doc['filename']}")
+                else:
+                    stats.same_text += 1
+                    print(f"  Text unchanged, kept stored rows of {doc['filename']}")
+            save_manifest(manifest, manifest_path)
+
+def reindex_all(resume_dir=RESUME_DIR, workers=None, full=False, dry_run=False,
+                manifest_path=MANIFEST_PATH, user_id=REINDEX_USER_ID):
     print("--- Re-indexing All Resumes ---")
-    
-    if not os.path.exists(RESUME_DIR):
-        print(f"Error: {RESUME_DIR} not found.")
-        return
 
-    # Check for API key
-    if not os.getenv("OPEN_ROUTER_KEY"):
-        print("ERROR: OPEN_ROUTER_KEY not found in environment or .env file.")
-        print("Please set it first before running this script.")
+    if not os.path.exists(resume_dir):
+        print(f"Error: {resume_dir} not found.")
         return
 
-    # Reset table if needed or just add to it
-    # For a clean start with the new schema, we might want to drop it
-    if "resumes" in db.list_tables():
-        print("Table 'resumes' exists. Keeping it and adding new entries.")
-        # table = db.open_table("resumes")
+    if "resumes" in db.table_names():
+        print("Table 'resumes' exists. Changed files will have their rows replaced.")
+        # Files are embedded with the model the table was built with, not the env default
+        model = get_embedding_layout(get_or_create_table())["model"]
     else:
         print("Table 'resumes' does not exist. It will be created during first store.")
+        model = EMBEDDING_MODEL
+
+    # Check for API key
+    if not dry_run:
+        try:
+            requires_key = resolve_provider(model)["requires_key"]
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            return
+        if requires_key and not os.getenv("OPEN_ROUTER_KEY"):
+            print("ERROR: OPEN_ROUTER_KEY not found in environment or .env file.")
+            print("Please set it first before running this script.")
+            return
+
+    manifest = load_manifest(manifest_path, user_id)
+    candidates, unchanged, missing = scan_files(resume_dir, manifest, full=full)
+    print(f"Found {len(candidates) + len(unchanged)} resumes: {len(unchanged)} unchanged, {len(candidates)} new or modified, "
+          f"{len(missing)} deleted.")
+
+    if dry_run:
+        for filename, _, _, previous in candidates:
+            print(f"  would {'reindex' if previous else 'index'} {filename}")
+        if full:
+            for filename in missing:
+                print(f"  would delete the rows of {filename}")
+        print("Dry run: nothing was written.")
+        return
+
+    # Rows of deleted files are removed by --full, which also drops them from the
+    # manifest; incremental runs keep both so a later --full still finds them
+    if missing and full:
+        delete_resumes(user_id, missing)
+        for filename in missing:
+            del manifest["files"][filename]
+        save_manifest(manifest, manifest_path)
+        print(f"Deleted the rows of {len(missing)} files that no longer exist.")
+    elif missing:
+        print(f"{len(missing)} indexed files no longer exist; run with --full to delete their rows.")
+
+    stats = ReindexStats()
+    stats.unchanged = len(unchanged)
+    lock = threading.Lock()
+    batches = queue.Queue(maxsize=4)
+    consumer = threading.Thread(
+        target=embed_consumer,
+        args=(batches, manifest, manifest_path, user_id, stats, lock, full),
+        daemon=True
+    )
+    consumer.start()
+
+    workers = workers or os.cpu_count() or 1
+    start_time = time.time()
+    pending_batch = []
+    interrupted = False
+
+    # spawn: forking a process that holds LanceDB handles is unsafe
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        # Keep a bounded window of submitted files so huge shares do not pile up in memory
+        todo = iter(candidates)
+        in_flight = {}
 
-    files = [f for f in os.listdir(RESUME_DIR) if f.endswith(('.pdf', '.docx', '.txt'))]
-    print(f"Found {len(files)} resumes to index.")
+        def submit_next():
+            for filename, file_path, fingerprint, previous in todo:
+                previous_hash = None if full or not previous else previous.get("sha256")
+                future = pool.submit(parse_file, filename, file_path, previous_hash)
+                in_flight[future] = fingerprint
+                return True
+            return False
 
-    success_count = 0
-    error_count = 0
+        for _ in range(workers * 4):
+            if not submit_next():
+                break
 
-    for filename in files:
-        file_path = os.path.join(RESUME_DIR, filename)
         try:
-            print(f"Indexing {filename}...")
-            text = extract_text(file_path)
-            if not text:
-                print(f"  Warning: No text extracted from {filename}")
-                continue
-                
-            store_resume(filename, text)
-            success_count += 1
-            print(f"  Successfully indexed {filename}")
-        except Exception as e:
-            error_count += 1
-            print(f"  Error indexing {filename}: {e}")
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    fingerprint = in_flight.pop(future)
+                    result = future.result()
+                    submit_next()
+
+                    filename = result["filename"]
+                    if "error" in result:
+                        with lock:
+                            stats.errors += 1
+                        print(f"  Error indexing {filename}: {result['error']}")
+                        continue
+
+                    fingerprint = dict(fingerprint, sha256=result["sha256"])
+                    if result.get("unchanged"):
+                        # Only the mtime moved; record it so the next run skips hashing
+                        with lock:
+                            stats.unchanged += 1
+                            manifest["files"][filename] = fingerprint
+                        continue
+                    if not result["text"]:
+                        with lock:
+                            stats.empty += 1
+                        print(f"  Warning: No text extracted from {filename}")
+                        continue
 
-    print(f"\nRe-indexing Complete!")
-    print(f"Success: {success_count}")
-    print(f"Errors: {error_count}")
+                    pending_batch.append({
+                        "filename": filename,
+                        "text": result["text"],
+                        "page_count": result["page_count"],
+                        "size_bytes": result["size_bytes"],
+                        "fingerprint": fingerprint
+                    })
+                    if len(pending_batch) >= FILES_PER_BATCH:
+                        batches.put(pending_batch)
+                        pending_batch = []
+        except KeyboardInterrupt:
+            interrupted = True
+            print("\nInterrupted: finishing the current batch and saving checkpoint...")
+            for future in in_flight:
+                future.cancel()
+
+    if pending_batch and not interrupted:
+        batches.put(pending_batch)
+    batches.put(None)
+    consumer.join()
+    with lock:
+        save_manifest(manifest, manifest_path)
+
+    print(f"\nRe-indexing {'Interrupted' if interrupted else 'Complete'}! ({time.time() - start_time:.1f}s)")
+    print(f"Indexed: {stats.indexed}")
+    print(f"Unchanged: {stats.unchanged}")
+    print(f"Text unchanged (not re-embedded): {stats.same_text}")
+    print(f"Deleted: {len(missing) if full else 0}")
+    print(f"Empty: {stats.empty}")
+    print(f"Errors: {stats.errors}")
 
 if __name__ == "__main__":
-    reindex_all()
+    parser = argparse.ArgumentParser(description="Incrementally re-index resumes into LanceDB.")
+    parser.add_argument("--dir", default=RESUME_DIR, help="Directory containing resumes")
+    parser.add_argument("--workers", type=int, default=None, help="Text extraction processes (default: CPU count)")
+    parser.add_argument("--full", action="store_true", help="Ignore fingerprints and reindex every file")
+    parser.add_argument("--dry-run", action="store_true", help="Only report which files would be indexed")
+    parser.add_argument("--user-id", default=REINDEX_USER_ID, help="Tenant that owns the indexed resumes")
+    parser.add_argument("--manifest", default=MANIFEST_PATH, help="Checkpoint file with file fingerprints")
+    args = parser.parse_args()
+
+    reindex_all(
+        resume_dir=args.dir,
+        workers=args.workers,
+        full=args.full,
+        dry_run=args.dry_run,
+        manifest_path=args.manifest,
+        user_id=args.user_id
+    )
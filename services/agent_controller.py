@@ -12,35 +12,54 @@ _screening_graph = build_screening_graph()
 _generator_graph = build_resume_generator_graph()
 graph = build_resume_graph()
 
-def run_resume_pipeline(task: str, resumes: list = None, query: str = None, llm_config: dict = None, threshold: int = 75):
+def _pipeline_call(task: str, resumes: list = None, query: str = None, llm_config: dict = None, threshold: int = 75,
+                   jd_skills: list = None):
+    """(graph, input state) for a pipeline task. jd_skills: precomputed JD skills for skill_gap."""
     if task == "score":
-        return _quality_graph.invoke(
-            {"resumes": resumes, "config": llm_config}
-        )
+        return _quality_graph, {"resumes": resumes, "config": llm_config}
     elif task == "skill_gap":
-        return _skill_gap_graph.invoke({
+        return _skill_gap_graph, {
             "resume_text": resumes[0],
             "jd_text": query,
-            "config": llm_config
-        })
+            "jd_skills": jd_skills,
+            "config": llm_config,
+            "errors": []
+        }
     elif task == "screen":
-        return _screening_graph.invoke({
+        return _screening_graph, {
             "resume_text": resumes[0],
             "jd_text": query,
             "config": llm_config,
             "threshold": threshold
-        })
+        }
     elif task == "generate":
-        return _generator_graph.invoke({
+        return _generator_graph, {
             "profile_description": query,
             "config": llm_config
-        })
+        }
     
     raise ValueError(f"Unknown task: {task}")
 
-def generate_resume_from_linkedin(url: str, llm_config: dict = None, linkedin_creds: dict = None):
-    return _linkedin_graph.invoke({
+def run_resume_pipeline(task: str, resumes: list = None, query: str = None, llm_config: dict = None, threshold: int = 75,
+                        jd_skills: list = None):
+    graph, state = _pipeline_call(task, resumes, query, llm_config, threshold, jd_skills)
+    return graph.invoke(state)
+
+async def arun_resume_pipeline(task: str, resumes: list = None, query: str = None, llm_config: dict = None, threshold: int = 75,
+                               jd_skills: list = None):
+    """Async run_resume_pipeline: LLM calls are awaited, so the event loop stays free."""
+    graph, state = _pipeline_call(task, resumes, query, llm_config, threshold, jd_skills)
+    return await graph.ainvoke(state)
+
+def _linkedin_state(url: str, llm_config: dict = None, linkedin_creds: dict = None):
+    return {
         "linkedin_url": url,
         "config": llm_config,
         "linkedin_creds": linkedin_creds
-    })
+    }
+
+def generate_resume_from_linkedin(url: str, llm_config: dict = None, linkedin_creds: dict = None):
+    return _linkedin_graph.invoke(_linkedin_state(url, llm_config, linkedin_creds))
+
+async def agenerate_resume_from_linkedin(url: str, llm_config: dict = None, linkedin_creds: dict = None):
+    return await _linkedin_graph.ainvoke(_linkedin_state(url, llm_config, linkedin_creds))
@@ -0,0 +1,146 @@
+import atexit
+import os
+import threading
+import time
+
+# ---------- SETTINGS ----------
+# Events are committed together once this many are queued or the oldest
+# queued event is this old, whichever comes first.
+ACTIVITY_FLUSH_MAX_EVENTS = int(os.getenv("ACTIVITY_FLUSH_MAX_EVENTS", "256"))
+ACTIVITY_FLUSH_INTERVAL_SECONDS = float(os.getenv("ACTIVITY_FLUSH_INTERVAL_SECONDS", "2"))
+# Upper bound on queued events while the table is unwritable; the oldest are dropped beyond it
+ACTIVITY_MAX_PENDING = int(os.getenv("ACTIVITY_MAX_PENDING", "100000"))
+
+class ActivityWriter:
+    """
+    Buffers activity rows in memory and appends them to the activity table in
+    batches from a background thread, so callers never wait on a LanceDB
+    commit and the table grows by a few large fragments instead of one per event.
+    """
+
+    def __init__(self, get_table, on_flush=None,
+                 max_events: int = ACTIVITY_FLUSH_MAX_EVENTS,
+                 interval_seconds: float = ACTIVITY_FLUSH_INTERVAL_SECONDS,
+                 max_pending: int = ACTIVITY_MAX_PENDING):
+        self.get_table = get_table
+        self.on_flush = on_flush
+        self.max_events = max_events
+        self.interval_seconds = interval_seconds
+        self.max_pending = max_pending
+        self.flushed = 0
+        self.flushes = 0
+        self.dropped = 0
+        self._pending = []
+        self._oldest = None
+        # After a failed flush the background thread waits an interval before retrying
+        self._retry_at = 0.0
+        self._closed = False
+        self._thread = None
+        self._cond = threading.Condition()
+        # Serialises table writes between the background thread and flush()
+        self._flush_lock = threading.Lock()
+        atexit.register(self.close)
+
+    def add(self, row: dict):
+        with self._cond:
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.append(row)
+            if len(self._pending) > self.max_pending:
+                overflow = len(self._pending) - self.max_pending
+                del self._pending[:overflow]
+                self.dropped += overflow
+                print(f"DEBUG: [activity] Buffer full, dropped {overflow} oldest events")
+            closed = self._closed
+            if not closed:
+                self._ensure_thread()
+                if len(self._pending) >= self.max_events:
+                    self._cond.notify()
+        if closed:
+            # Events logged during interpreter shutdown are written straight through
+            self.flush()
+
+    def pending(self, user_id: str = None) -> list:
+        """Events queued but not yet written, optionally for a single user."""
+        with self._cond:
+            return [r for r in self._pending if user_id is None or r.get("user_id") == user_id]
+
+    def flush(self) -> int:
+        """Synchronously writes every queued event. Returns the number of rows written."""
+        with self._flush_lock:
+            with self._cond:
+                batch = self._pending
+                self._pending = []
+                self._oldest = None
+            if not batch:
+                return 0
+            try:
+                table = self.get_table()
+                table.add(batch)
+            except Exception as e:
+                # Put the batch back in front of newer events and retry on the next flush
+                with self._cond:
+                    self._pending[:0] = batch
+                    self._oldest = time.monotonic()
+                    self._retry_at = self._oldest + self.interval_seconds
+                print(f"DEBUG: [activity] Flush of {len(batch)} events failed: {e}")
+                return 0
+            self.flushed += len(batch)
+            self.flushes += 1
+            self._retry_at = 0.0
+        print(f"DEBUG: [activity] Flushed {len(batch)} events")
+        if self.on_flush is not None:
+            try:
+                self.on_flush(table)
+            except Exception as e:
+                print(f"DEBUG: [activity] Post-flush hook failed: {e}")
+        return len(batch)
+
+    def _ensure_thread(self):
+        # Called with self._cond held
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="activity-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    backoff = self._retry_at - time.monotonic()
+                    if backoff > 0:
+                        wait = backoff
+                    elif len(self._pending) >= self.max_events:
+                        break
+                    if self._pending:
+                        wait = self._oldest + self.interval_seconds - time.monotonic()
+                        if wait <= 0:
+                            break
+                    else:
+                        wait = None
+                    self._cond.wait(wait)
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+    def close(self):
+        """Stops the background thread and writes whatever is still queued."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=10)
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._cond:
+            pending = len(self._pending)
+        return {
+            "pending": pending,
+            "flushed": self.flushed,
+            "flushes": self.flushes,
+            "dropped": self.dropped,
+            "max_events": self.max_events,
+            "interval_seconds": self.interval_seconds
+        }
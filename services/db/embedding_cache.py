@@ -0,0 +1,284 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List
+
+import pyarrow as pa
+from langchain_core.embeddings import Embeddings
+
+from services.db.filters import where_eq, where_in, where_all
+
+# ---------- SCHEMA ----------
+# Vectors are stored as variable-length lists so one cache can hold several models.
+embedding_cache_schema = pa.schema([
+    pa.field("model", pa.string()),
+    pa.field("text_hash", pa.string()), # SHA-256 of the embedded text
+    pa.field("vector", pa.list_(pa.float32())),
+    pa.field("created_at", pa.float64())
+])
+
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "500000"))
+# In-process cache of search query embeddings
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "2048"))
+QUERY_CACHE_TTL_SECONDS = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "86400"))
+# Keep IN (...) filters at a reasonable length
+_LOOKUP_BATCH = 500
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def normalize_query(text: str) -> str:
+    """Case- and whitespace-insensitive form of a search query."""
+    return " ".join(text.split()).casefold()
+
+class EmbeddingCache:
+    """
+    Content-addressed on-disk embedding cache stored as a LanceDB table.
+    Entries are keyed by (model, sha256(text)); once the table grows past
+    max_entries the oldest entries are evicted.
+    on_open(table) runs once when the table handle is first made (e.g. to create
+    its indexes); on_write(table) after every write (e.g. to keep them current).
+    """
+
+    def __init__(self, db, table_name: str = "embedding_cache", max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES,
+                 on_open=None, on_write=None):
+        self.db = db
+        self.table_name = table_name
+        self.max_entries = max_entries
+        self.on_open = on_open
+        self.on_write = on_write
+        self.hits = 0
+        self.misses = 0
+        self._table = None
+        self._lock = threading.Lock()
+
+    def _get_table(self):
+        if self._table is None:
+            with self._lock:
+                if self._table is None:
+                    table = self.db.create_table(self.table_name, schema=embedding_cache_schema, exist_ok=True)
+                    if self.on_open:
+                        self.on_open(table)
+                    self._table = table
+        return self._table
+
+    def get_many(self, model: str, hashes: List[str]) -> dict:
+        """Returns {text_hash: vector} for the hashes present in the cache."""
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        table = self._get_table()
+        for i in range(0, len(unique), _LOOKUP_BATCH):
+            batch = unique[i:i + _LOOKUP_BATCH]
+            rows = (
+                table.search()
+                .where(where_all(where_eq(model=model), where_in("text_hash", batch)))
+                .select(["text_hash", "vector"])
+                .limit(len(batch) * 2)
+                .to_arrow()
+            )
+            for h, vector in zip(rows["text_hash"].to_pylist(), rows["vector"].to_pylist()):
+                found[h] = vector
+
+        with self._lock:
+            self.hits += sum(1 for h in hashes if h in found)
+            self.misses += sum(1 for h in hashes if h not in found)
+        return found
+
+    def put_many(self, model: str, entries: dict):
+        """Stores {text_hash: vector} entries that are not cached yet."""
+        if not entries:
+            return
+        now = time.time()
+        data = pa.table({
+            "model": [model] * len(entries),
+            "text_hash": list(entries.keys()),
+            "vector": [list(map(float, v)) for v in entries.values()],
+            "created_at": [now] * len(entries)
+        }, schema=embedding_cache_schema)
+
+        table = self._get_table()
+        # merge_insert keeps concurrent writers from inserting the same key twice
+        (
+            table.merge_insert(["model", "text_hash"])
+            .when_not_matched_insert_all()
+            .execute(data)
+        )
+        self._evict(table)
+        if self.on_write:
+            self.on_write(table)
+
+    def _evict(self, table):
+        total = table.count_rows()
+        if total <= self.max_entries:
+            return
+        import numpy as np
+        created = table.search().select(["created_at"]).limit(total).to_arrow()["created_at"].to_numpy()
+        overflow = total - self.max_entries
+        cutoff = np.partition(created, overflow - 1)[overflow - 1]
+        # Entries written in the same batch share a timestamp and are evicted together
+        table.delete(f"created_at <= {float(cutoff)!r}")
+        print(f"DEBUG: [embedding_cache] Evicted {total - table.count_rows()} entries (cache size limit {self.max_entries})")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": self._get_table().count_rows(),
+            "max_entries": self.max_entries
+        }
+
+class QueryEmbeddingCache:
+    """
+    In-memory LRU of query embeddings keyed by (model, normalized query), with a
+    TTL. Expired entries stay in the LRU so they can still be served when the
+    embeddings API is unreachable.
+    """
+
+    def __init__(self, max_entries: int = QUERY_CACHE_MAX_ENTRIES, ttl_seconds: float = QUERY_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, model: str, query: str, allow_stale: bool = False):
+        key = (model, query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if not allow_stale:
+                    self.misses += 1
+                return None
+            vector, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                if allow_stale:
+                    self.stale_hits += 1
+                    return vector
+                self.misses += 1
+                return None
+            if not allow_stale:
+                self.hits += 1
+            self._entries.move_to_end(key)
+            return vector
+
+    def put(self, model: str, query: str, vector):
+        with self._lock:
+            self._entries[(model, query)] = (vector, time.monotonic())
+            self._entries.move_to_end((model, query))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale_hits": self.stale_hits,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds
+            }
+
+class CachedEmbeddings(Embeddings):
+    """Wraps an embeddings client and serves repeated texts from an EmbeddingCache."""
+
+    def __init__(self, embeddings: Embeddings, model: str, cache: EmbeddingCache,
+                 query_cache: QueryEmbeddingCache = None):
+        self.embeddings = embeddings
+        self.model = model
+        self.cache = cache
+        self.query_cache = query_cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [text_hash(t) for t in texts]
+        try:
+            cached = self.cache.get_many(self.model, hashes)
+        except Exception as e:
+            print(f"DEBUG: [embedding_cache] Lookup failed, embedding without cache: {e}")
+            return self.embeddings.embed_documents(texts)
+
+        missing = {}
+        for h, t in zip(hashes, texts):
+            if h not in cached and h not in missing:
+                missing[h] = t
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            try:
+                self.cache.put_many(self.model, computed)
+            except Exception as e:
+                print(f"DEBUG: [embedding_cache] Write failed: {e}")
+            cached.update(computed)
+
+        return [cached[h] for h in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        # Trivially different spellings share an LRU entry, but the model always sees the text as typed
+        key = normalize_query(text)
+        if self.query_cache is not None:
+            vector = self.query_cache.get(self.model, key)
+            if vector is not None:
+                return vector
+        try:
+            vector = self._embed_query_persistent(text)
+        except Exception:
+            # Serve an expired entry rather than failing the search
+            stale = self.query_cache.get(self.model, key, allow_stale=True) if self.query_cache is not None else None
+            if stale is None:
+                raise
+            print("DEBUG: [embedding_cache] Query embedding failed, serving expired cache entry")
+            return stale
+        if self.query_cache is not None:
+            self.query_cache.put(self.model, key, vector)
+        return vector
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embeds several search queries; the ones not cached go out in a single embed_documents call."""
+        keys = [normalize_query(t) for t in texts]
+        # First spelling of each normalized query, embedded as typed
+        originals = {}
+        for key, text in zip(keys, texts):
+            originals.setdefault(key, text)
+        vectors = {}
+        if self.query_cache is not None:
+            for key in originals:
+                vector = self.query_cache.get(self.model, key)
+                if vector is not None:
+                    vectors[key] = vector
+        missing = [k for k in originals if k not in vectors]
+        if missing:
+            for key, vector in zip(missing, self.embed_documents([originals[k] for k in missing])):
+                vectors[key] = vector
+                if self.query_cache is not None:
+                    self.query_cache.put(self.model, key, vector)
+        return [vectors[k] for k in keys]
+
+    def _embed_query_persistent(self, text: str) -> List[float]:
+        h = text_hash(text)
+        try:
+            cached = self.cache.get_many(self.model, [h])
+        except Exception as e:
+            print(f"DEBUG: [embedding_cache] Lookup failed, embedding without cache: {e}")
+            return self.embeddings.embed_query(text)
+        if h in cached:
+            return cached[h]
+
+        vector = self.embeddings.embed_query(text)
+        try:
+            self.cache.put_many(self.model, {h: vector})
+        except Exception as e:
+            print(f"DEBUG: [embedding_cache] Write failed: {e}")
+        return vector
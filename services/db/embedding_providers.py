@@ -0,0 +1,139 @@
+import os
+import re
+import zlib
+from fnmatch import fnmatchcase
+from collections import Counter
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from services.llm_clients import http_pool
+
+# ---------- SETTINGS ----------
+# Provider every embedding call goes through; it must serve the table's recorded model
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openrouter")
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+# Endpoint of the generic OpenAI-compatible provider, e.g. a local stand-in server
+EMBEDDING_BASE_URL = os.getenv("EMBEDDING_BASE_URL", "https://api.openai.com/v1")
+# Extra model names (comma-separated) that endpoint serves, e.g. a local server's own models
+EMBEDDING_SERVED_MODELS = [m.strip() for m in os.getenv("EMBEDDING_SERVED_MODELS", "").split(",") if m.strip()]
+EMBEDDING_REQUEST_TIMEOUT = float(os.getenv("EMBEDDING_REQUEST_TIMEOUT", "15"))
+HASHING_MODEL = "hashing-ngram-v1"
+
+# ---------- LOCAL HASHING EMBEDDER ----------
+_TOKEN_RE = re.compile(r"\w+")
+
+class HashingEmbeddings(Embeddings):
+    """
+    Offline embedder: word unigrams, word bigrams and character trigrams are
+    hashed (CRC32, signed) into `dim` buckets with sublinear term frequency,
+    then L2-normalised. No model, no network, and stable across processes, so
+    stored vectors stay valid. There is no IDF weighting: vectors must not
+    depend on what else is in the corpus.
+    """
+
+    def __init__(self, dim: int = 1536):
+        self.dim = dim
+
+    def _features(self, text: str) -> Counter:
+        words = _TOKEN_RE.findall(text.lower())
+        features = Counter(words)
+        features.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+        for word in words:
+            padded = f"#{word}#"
+            features.update(f"~{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        return features
+
+    def _embed(self, text: str) -> List[float]:
+        features = self._features(text)
+        vector = np.zeros(self.dim, dtype=np.float32)
+        if not features:
+            return vector.tolist()
+        hashes = np.fromiter((zlib.crc32(f.encode("utf-8")) for f in features), dtype=np.uint64, count=len(features))
+        weights = 1 + np.log(np.fromiter(features.values(), dtype=np.float32, count=len(features)))
+        signs = np.where(hashes & (1 << 31), -1.0, 1.0).astype(np.float32)
+        np.add.at(vector, (hashes % self.dim).astype(np.intp), signs * weights)
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+# ---------- PROVIDER REGISTRY ----------
+# name -> {"create": factory(model, dimensions, api_key), "models": glob patterns of the model
+#          names it serves, "requires_key": bool, "cache": whether vectors go through the embedding caches}
+EMBEDDING_PROVIDERS = {}
+
+def register_embedding_provider(name: str, create, models=(), requires_key: bool = True, cache: bool = True):
+    EMBEDDING_PROVIDERS[name] = {
+        "name": name, "create": create, "models": tuple(models), "requires_key": requires_key, "cache": cache
+    }
+
+def serves(provider: dict, model: str) -> bool:
+    return any(fnmatchcase(model, pattern) for pattern in provider["models"])
+
+def resolve_provider(model: str) -> dict:
+    """
+    EMBEDDING_PROVIDER, provided it serves the model. Vectors of another model
+    live in a different space even at the same dimension, so a table whose
+    recorded model the provider does not serve is an error, never a substitution.
+    """
+    if EMBEDDING_PROVIDER not in EMBEDDING_PROVIDERS:
+        raise ValueError(f"Unknown embedding provider '{EMBEDDING_PROVIDER}'. "
+                         f"Use one of: {', '.join(EMBEDDING_PROVIDERS)}")
+    provider = EMBEDDING_PROVIDERS[EMBEDDING_PROVIDER]
+    if not serves(provider, model):
+        candidates = [p["name"] for p in EMBEDDING_PROVIDERS.values() if serves(p, model)]
+        raise ValueError(
+            f"Embedding model '{model}' is not served by provider '{EMBEDDING_PROVIDER}'. "
+            + (f"Set EMBEDDING_PROVIDER to one of: {', '.join(candidates)}, " if candidates else "")
+            + "or re-embed the table (services/db/vector_migration.py)."
+        )
+    return provider
+
+def _openrouter(model, dimensions, api_key):
+    from langchain_openai import OpenAIEmbeddings
+    # Same keep-alive pool as the chat models using this key
+    http_client, http_async_client = http_pool(OPENROUTER_BASE_URL, api_key)
+    # OpenRouter often requires 'openai/' prefix for OpenAI models
+    return OpenAIEmbeddings(
+        model=model if "/" in model else f"openai/{model}",
+        openai_api_key=api_key,
+        openai_api_base=OPENROUTER_BASE_URL,
+        request_timeout=EMBEDDING_REQUEST_TIMEOUT,
+        dimensions=dimensions,
+        http_client=http_client,
+        http_async_client=http_async_client
+    )
+
+def _openai_compatible(model, dimensions, api_key):
+    from langchain_openai import OpenAIEmbeddings
+    # Never the OpenRouter key: this endpoint belongs to someone else.
+    # Local servers usually ignore the key, but the client insists on one.
+    key = os.getenv("EMBEDDING_API_KEY") or "not-needed"
+    http_client, http_async_client = http_pool(EMBEDDING_BASE_URL, key)
+    return OpenAIEmbeddings(
+        model=model,
+        openai_api_key=key,
+        openai_api_base=EMBEDDING_BASE_URL,
+        request_timeout=EMBEDDING_REQUEST_TIMEOUT,
+        dimensions=dimensions,
+        # Send raw strings: most stand-in servers do not accept pre-tokenized input
+        check_embedding_ctx_length=False,
+        http_client=http_client,
+        http_async_client=http_async_client
+    )
+
+def _hashing(model, dimensions, api_key):
+    return HashingEmbeddings(dim=dimensions)
+
+# OpenAI embedding models, and OpenRouter's namespaced ids (e.g. openai/text-embedding-3-small)
+register_embedding_provider("openrouter", _openrouter, models=["text-embedding-*", "*/*"])
+register_embedding_provider("openai", _openai_compatible, models=["text-embedding-*", *EMBEDDING_SERVED_MODELS],
+                            requires_key=False)
+# Computing a hashing vector is cheaper than looking one up, so it bypasses the caches
+register_embedding_provider("hashing", _hashing, models=[HASHING_MODEL], requires_key=False, cache=False)
@@ -0,0 +1,26 @@
+# ---------- SQL FILTER BUILDERS ----------
+# LanceDB filters are SQL strings. Values are always rendered through
+# sql_literal so user ids and filenames containing quotes cannot break
+# out of (or inject into) a predicate.
+
+def sql_literal(value) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+def where_eq(**conditions) -> str:
+    """where_eq(user_id="u1", filename="a.pdf") -> "user_id = 'u1' AND filename = 'a.pdf'" """
+    return " AND ".join(f"{column} = {sql_literal(value)}" for column, value in conditions.items())
+
+def where_in(column: str, values) -> str:
+    values = list(values)
+    if not values:
+        return "FALSE"
+    return f"{column} IN ({', '.join(sql_literal(v) for v in values)})"
+
+def where_all(*clauses) -> str:
+    return " AND ".join(f"({c})" for c in clauses if c)
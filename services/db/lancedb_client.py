@@ -1,70 +1,492 @@
 import lancedb
 from pathlib import Path
-from uuid import uuid4
+from uuid import uuid4, uuid5, NAMESPACE_URL
 import pyarrow as pa
 import os
-from langchain_openai import OpenAIEmbeddings
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from services.db.activity_writer import ActivityWriter
+from services.db.embedding_cache import EmbeddingCache, CachedEmbeddings, QueryEmbeddingCache, text_hash
+from services.db.embedding_providers import EMBEDDING_PROVIDER, HASHING_MODEL, resolve_provider
+from services.llm_clients import ClientRegistry
+from services.db.filters import where_eq, where_in, where_all
+from services.db.memory_index import MemoryVectorEngine
 
 load_dotenv()
 
 # ---------- DB PATH ----------
-DB_PATH = Path("data/lancedb")
+DB_PATH = Path(os.getenv("LANCEDB_PATH", "data/lancedb"))
 DB_PATH.mkdir(parents=True, exist_ok=True)
 
-db = lancedb.connect(DB_PATH)
+# How stale a cached table handle may get before it picks up versions committed
+# by other processes (other uvicorn workers, reindex/maintenance scripts).
+# 0 checks on every read; a negative value never checks.
+READ_CONSISTENCY_SECONDS = float(os.getenv("LANCEDB_READ_CONSISTENCY_SECONDS", "1"))
+
+db = lancedb.connect(
+    DB_PATH,
+    read_consistency_interval=timedelta(seconds=READ_CONSISTENCY_SECONDS) if READ_CONSISTENCY_SECONDS >= 0 else None
+)
+
+# ---------- EMBEDDING LAYOUT ----------
+# Model, output dimension and storage dtype of the chunk vectors. New tables are
+# created with these settings; an existing table keeps the layout recorded in its
+# schema metadata until it is migrated (see services/db/vector_migration.py).
+# text-embedding-3 models return shortened vectors via the `dimensions` option.
+# Which provider serves a model is decided in services/db/embedding_providers.py.
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", HASHING_MODEL if EMBEDDING_PROVIDER == "hashing" else "text-embedding-3-small")
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "1536"))
+EMBEDDING_DTYPE = os.getenv("EMBEDDING_DTYPE", "float32")
+VECTOR_DTYPES = {"float32": pa.float32(), "float16": pa.float16()}
+# Output size of each model when `dimensions` is not sent
+NATIVE_EMBEDDING_DIMS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536
+}
 
 # ---------- EMBEDDINGS CACHE ----------
-_embeddings_cache = {}
+# Bounded LRU of embeddings clients, one per (provider, key, model, dimensions)
+EMBEDDING_CLIENT_CACHE_SIZE = int(os.getenv("EMBEDDING_CLIENT_CACHE_SIZE", "16"))
+_embeddings_clients = ClientRegistry(EMBEDDING_CLIENT_CACHE_SIZE)
+
+# Persistent (model, chunk hash) -> vector cache, consulted before any OpenRouter call
+# Lookups filter on (model, text_hash); the indexes keep them from scanning the whole cache
+embedding_cache = EmbeddingCache(
+    db,
+    on_open=lambda table: ensure_scalar_indexes(table, "embedding_cache"),
+    on_write=lambda table: schedule_index_maintenance(table, "embedding_cache")
+)
+# In-process LRU in front of it for search queries, which repeat all day
+query_embedding_cache = QueryEmbeddingCache()
 
-def get_embeddings_model(api_key=None, model="text-embedding-3-small"):
+def get_embeddings_model(api_key=None, model=EMBEDDING_MODEL, dimensions=None):
+    provider = resolve_provider(model)
     key = api_key or os.getenv("OPEN_ROUTER_KEY")
-    if not key:
+    if provider["requires_key"] and not key:
         print("DEBUG: [embeddings] ERROR: No API key found for embeddings")
         raise ValueError("OPEN_ROUTER_KEY is required for semantic search. Please set it in your .env file or environment.")
     
-    # OpenRouter often requires 'openai/' prefix for OpenAI models
-    model_name = model if "/" in model else f"openai/{model}"
-    
-    # Check cache
-    cache_key = (key, model_name)
-    if cache_key in _embeddings_cache:
-        return _embeddings_cache[cache_key]
-    
-    print(f"DEBUG: [embeddings] Initializing NEW model instance: {model_name} via OpenRouter")
-    
-    embeddings = OpenAIEmbeddings(
-        model=model_name,
-        openai_api_key=key,
-        openai_api_base="https://openrouter.ai/api/v1",
-        request_timeout=15.0
-    )
+    # Only request shortened vectors when they differ from the model's native size
+    if dimensions == NATIVE_EMBEDDING_DIMS.get(model.split("/")[-1]):
+        dimensions = None
+    if provider["name"] == "hashing":
+        dimensions = dimensions or EMBEDDING_DIM
     
-    _embeddings_cache[cache_key] = embeddings
-    return embeddings
+    def create():
+        print(f"DEBUG: [embeddings] Initializing NEW model instance: {model} via {provider['name']}")
+        embeddings = provider["create"](model, dimensions, key)
+        if not provider["cache"]:
+            return embeddings
+        if provider["name"] == "openrouter":
+            # OpenRouter model ids, as cached before providers were pluggable
+            model_key = model if "/" in model else f"openai/{model}"
+        else:
+            model_key = f"{provider['name']}:{model}"
+        return CachedEmbeddings(
+            embeddings,
+            # Shortened vectors are cached separately from full-size ones
+            model=model_key if dimensions is None else f"{model_key}@{dimensions}",
+            cache=embedding_cache,
+            query_cache=query_embedding_cache
+        )
+
+    return _embeddings_clients.get_or_create((provider["name"], key, model, dimensions), create)
 
 # ---------- SCHEMA ----------
-resume_schema = pa.schema([
-    pa.field("id", pa.string()),
-    pa.field("user_id", pa.string()), # Added for multi-tenancy
+def make_resume_schema(dim: int = EMBEDDING_DIM, dtype: str = EMBEDDING_DTYPE, model: str = EMBEDDING_MODEL):
+    """Chunk table schema; the embedding layout is recorded in the schema metadata."""
+    if dtype not in VECTOR_DTYPES:
+        raise ValueError(f"Unsupported vector dtype '{dtype}'. Use one of: {', '.join(VECTOR_DTYPES)}")
+    return pa.schema([
+        pa.field("id", pa.string()),
+        pa.field("user_id", pa.string()), # Added for multi-tenancy
+        pa.field("filename", pa.string()),
+        pa.field("text", pa.string()),
+        pa.field("vector", pa.list_(VECTOR_DTYPES[dtype], dim)),
+        pa.field("doc_id", pa.string()), # References documents.doc_id
+        pa.field("chunk_index", pa.int32()) # Position of the chunk within its document
+    ], metadata={"embedding_model": model, "embedding_dim": str(dim), "embedding_dtype": dtype})
+
+resume_schema = make_resume_schema()
+
+def get_embedding_layout(table) -> dict:
+    """
+    {"model", "dim", "dtype"} of a chunk table. Tables created before the layout
+    was recorded hold float32 text-embedding-3-small vectors.
+    """
+    metadata = {k.decode(): v.decode() for k, v in (table.schema.metadata or {}).items()}
+    vector_type = table.schema.field("vector").type
+    return {
+        "model": metadata.get("embedding_model", "text-embedding-3-small"),
+        "dim": vector_type.list_size,
+        "dtype": "float16" if vector_type.value_type == pa.float16() else "float32"
+    }
+
+def get_table_embeddings(table, api_key=None):
+    """Embeddings client producing vectors in the table's layout."""
+    layout = get_embedding_layout(table)
+    return get_embeddings_model(api_key=api_key, model=layout["model"], dimensions=layout["dim"])
+
+# One row per stored resume. Chunk rows reference it through doc_id, so listing,
+# counting and deduplicating resumes never has to scan the chunk table.
+documents_schema = pa.schema([
+    pa.field("doc_id", pa.string()),
+    pa.field("user_id", pa.string()),
     pa.field("filename", pa.string()),
-    pa.field("text", pa.string()),
-    pa.field("vector", pa.list_(pa.float32(), 1536)) # Assuming text-embedding-3-small
+    pa.field("content_hash", pa.string()), # SHA-256 of the extracted text
+    pa.field("size_bytes", pa.int64()), # Size of the uploaded file, when known
+    pa.field("page_count", pa.int32()), # Pages in the source PDF, when known
+    pa.field("num_chars", pa.int32()),
+    pa.field("num_chunks", pa.int32()),
+    pa.field("uploaded_at", pa.string())
 ])
 
+def document_id(user_id: str, filename: str) -> str:
+    """Stable id of a tenant's resume: re-uploading the same filename maps to the same document."""
+    return str(uuid5(NAMESPACE_URL, f"resume:{user_id}/{filename}"))
+
 # ---------- TABLE HANDLER ----------
+# Handles are opened once per process and shared by all threads. Within the
+# process every write goes through the cached handle, so reads see it at once;
+# writes from other processes become visible after READ_CONSISTENCY_SECONDS.
+_tables = {}
+_tables_lock = threading.RLock()
+
+def open_table(name: str, schema, on_create=None, on_open=None):
+    """
+    Returns the cached handle of a table, creating the table from schema if it
+    does not exist. on_create / on_open run once, when the handle is first made.
+    """
+    table = _tables.get(name)
+    if table is not None:
+        return table
+    with _tables_lock:
+        table = _tables.get(name)
+        if table is not None:
+            return table
+        if name in db.table_names():
+            table = db.open_table(name)
+            if on_open:
+                on_open(table)
+        else:
+            # exist_ok: another worker may create the table between the listing and this call
+            table = db.create_table(name, schema=schema, exist_ok=True)
+            if on_create:
+                on_create(table)
+        _tables[name] = table
+        return table
+
+def invalidate_table(name: str = None):
+    """Drops cached handles (all of them without a name), e.g. after a table was overwritten."""
+    with _tables_lock:
+        if name is None:
+            _tables.clear()
+        else:
+            _tables.pop(name, None)
+
+def _upgrade_resumes_table(table):
+    if "doc_id" not in table.schema.names:
+        migrate_to_documents(table)
+
 def get_or_create_table():
-    if "resumes" in db.table_names():
-        return db.open_table("resumes")
+    return open_table(
+        "resumes", resume_schema,
+        on_create=lambda table: ensure_scalar_indexes(table, "resumes"),
+        on_open=_upgrade_resumes_table
+    )
 
-    return db.create_table(
-        name="resumes",
-        schema=resume_schema,
-        mode="create"
+def get_or_create_documents_table():
+    return open_table(
+        "documents", documents_schema,
+        on_create=lambda table: ensure_scalar_indexes(table, "documents")
     )
 
+# ---------- DOCUMENTS MIGRATION ----------
+_migration_lock = threading.Lock()
+
+def migrate_to_documents(table=None) -> dict:
+    """
+    Upgrades a chunk table written with the old resume_schema: adds the doc_id
+    and chunk_index columns, backfills them and creates the matching documents
+    rows. Chunks keep their insertion order, so the original text (and hence the
+    content hash) is recovered exactly. Safe to re-run; only rows without a
+    doc_id are touched.
+    """
+    import pyarrow.compute as pc
+
+    with _migration_lock:
+        if table is None:
+            if "resumes" not in db.table_names():
+                return {"documents": 0, "chunks": 0}
+            table = db.open_table("resumes")
+
+        missing = {"doc_id": "CAST(NULL AS string)", "chunk_index": "CAST(NULL AS int)"}
+        missing = {k: v for k, v in missing.items() if k not in table.schema.names}
+        if missing:
+            print(f"DEBUG: [migration] Adding columns {list(missing)} to 'resumes'")
+            table.add_columns(missing)
+
+        chunks = (
+            table.search()
+            .where("doc_id IS NULL")
+            .select(["id", "user_id", "filename", "text"])
+            .with_row_id(True)
+            .to_arrow()
+        )
+        if chunks.num_rows == 0:
+            return {"documents": 0, "chunks": 0}
+        chunks = chunks.take(pc.sort_indices(chunks["_rowid"]))
+
+        groups = {}
+        for row in chunks.select(["id", "user_id", "filename", "text"]).to_pylist():
+            groups.setdefault((row["user_id"], row["filename"]), []).append(row)
+
+        updates = {"id": [], "doc_id": [], "chunk_index": []}
+        documents = []
+        for (user_id, filename), rows in groups.items():
+            doc_id = document_id(user_id, filename)
+            text = reassemble_chunks([r["text"] for r in rows])
+            for i, r in enumerate(rows):
+                updates["id"].append(r["id"])
+                updates["doc_id"].append(doc_id)
+                updates["chunk_index"].append(i)
+            documents.append({
+                "doc_id": doc_id,
+                "user_id": user_id,
+                "filename": filename,
+                "content_hash": text_hash(text),
+                "size_bytes": None,
+                "page_count": None,
+                "num_chars": len(text),
+                "num_chunks": len(rows),
+                "uploaded_at": None
+            })
+
+        (
+            table.merge_insert("id")
+            .when_matched_update_all()
+            .execute(pa.table({
+                "id": updates["id"],
+                "doc_id": updates["doc_id"],
+                "chunk_index": pa.array(updates["chunk_index"], pa.int32())
+            }))
+        )
+        docs_table = get_or_create_documents_table()
+        (
+            docs_table.merge_insert("doc_id")
+            .when_not_matched_insert_all()
+            .execute(pa.Table.from_pylist(documents, schema=documents_schema))
+        )
+        print(f"DEBUG: [migration] Backfilled {len(updates['id'])} chunks into {len(documents)} documents")
+        return {"documents": len(documents), "chunks": len(updates["id"])}
+
+# ---------- VECTOR INDEX ----------
+# The resumes table is brute-force scanned until it crosses ANN_INDEX_MIN_ROWS;
+# after that an IVF-PQ index is built and kept up to date as rows are added.
+VECTOR_INDEX_NAME = "vector_idx"
+ANN_INDEX_MIN_ROWS = int(os.getenv("ANN_INDEX_MIN_ROWS", "50000"))
+# Re-optimize once unindexed rows exceed this fraction of the indexed rows
+ANN_UNINDEXED_FRACTION = float(os.getenv("ANN_UNINDEXED_FRACTION", "0.1"))
+ANN_NPROBES = int(os.getenv("ANN_NPROBES", "20"))
+ANN_REFINE_FACTOR = int(os.getenv("ANN_REFINE_FACTOR", "0")) or None
+
+# Scalar indexes backing the tenant / file / activity-type filters, plus the
+# full-text (BM25) index used by keyword and hybrid search
+SCALAR_INDEXES = {
+    "resumes": [("user_id", "BITMAP"), ("filename", "BTREE"), ("text", "FTS")],
+    "activity": [("user_id", "BITMAP"), ("type", "BITMAP")],
+    "documents": [("user_id", "BITMAP"), ("content_hash", "BTREE")],
+    "job_definitions": [("user_id", "BITMAP")],
+    "embedding_cache": [("text_hash", "BTREE"), ("model", "BITMAP")],
+}
+# Small tables are cheap to scan; don't rewrite indexes for a handful of new rows
+SCALAR_REINDEX_MIN_ROWS = 1000
+
+# One lock per table, so maintaining one table never blocks another. A request
+# arriving while its table is busy is parked in _index_maintenance_pending and
+# run by whoever holds the lock once they are done, so it is never dropped.
+_index_maintenance_locks = {}
+_index_maintenance_pending = {} # table name -> table handle
+_index_maintenance_guard = threading.Lock()
+
+def _index_maintenance_lock(table_name: str):
+    with _index_maintenance_guard:
+        return _index_maintenance_locks.setdefault(table_name, threading.Lock())
+
+def _release_index_maintenance(table_name: str):
+    """
+    Hands a table's lock over to the maintenance request parked while it was
+    held and returns that request's table handle, or releases the lock and
+    returns None.
+    """
+    with _index_maintenance_guard:
+        pending = _index_maintenance_pending.pop(table_name, None)
+        if pending is None:
+            _index_maintenance_locks[table_name].release()
+        return pending
+
+@contextmanager
+def index_maintenance_exclusive(table_name: str = "resumes"):
+    """
+    Holds a table's index maintenance lock, e.g. while compacting or migrating
+    it; background index maintenance requested meanwhile runs afterwards.
+    """
+    _index_maintenance_lock(table_name).acquire()
+    try:
+        yield
+    finally:
+        pending = _release_index_maintenance(table_name)
+        if pending is not None:
+            _start_index_maintenance(pending, table_name)
+
+def ensure_scalar_indexes(table, table_name: str):
+    """Creates any missing scalar indexes listed in SCALAR_INDEXES for the table."""
+    from lancedb.index import Bitmap, BTree, FTS
+    configs = {"BITMAP": Bitmap, "BTREE": BTree, "FTS": FTS}
+    existing = {idx.name for idx in table.list_indices()}
+    created = []
+    for column, index_type in SCALAR_INDEXES.get(table_name, []):
+        name = f"{column}_idx"
+        if name in existing:
+            continue
+        table.create_index(column, config=configs[index_type](), name=name)
+        created.append(name)
+    if created:
+        print(f"DEBUG: [index] Created scalar indexes on '{table_name}': {created}")
+    return created
+
+def _scalar_indexes_stale(table, table_name: str) -> bool:
+    for column, _ in SCALAR_INDEXES.get(table_name, []):
+        stats = table.index_stats(f"{column}_idx")
+        if stats and stats.num_unindexed_rows > max(SCALAR_REINDEX_MIN_ROWS, ANN_UNINDEXED_FRACTION * stats.num_indexed_rows):
+            return True
+    return False
+
+def ensure_indexes(table, table_name: str):
+    """Creates missing indexes on a table and folds new rows into stale ones."""
+    ensure_scalar_indexes(table, table_name)
+    action = ensure_vector_index(table) if table_name == "resumes" else None
+    if action is None and _scalar_indexes_stale(table, table_name):
+        print(f"DEBUG: [index] Optimizing scalar indexes on '{table_name}'")
+        table.optimize()
+        action = "optimized"
+    return action
+
+def get_vector_index_stats(table):
+    """Returns index coverage for a table's vector column, or None when it has no index."""
+    stats = table.index_stats(VECTOR_INDEX_NAME)
+    if stats is None:
+        return None
+    total = stats.num_indexed_rows + stats.num_unindexed_rows
+    return {
+        "index_type": stats.index_type,
+        "distance_type": stats.distance_type,
+        "indexed_rows": stats.num_indexed_rows,
+        "unindexed_rows": stats.num_unindexed_rows,
+        "coverage": round(stats.num_indexed_rows / total, 4) if total else 1.0
+    }
+
+def _ivf_pq_config(num_rows: int, dim: int):
+    from lancedb.index import IvfPq
+    # ~sqrt(N) partitions, 16 dimensions per PQ sub-vector
+    num_partitions = max(1, int(num_rows ** 0.5))
+    num_sub_vectors = next(n for n in (dim // 16, dim // 8, dim // 4, 1) if n and dim % n == 0)
+    return IvfPq(distance_type="l2", num_partitions=num_partitions, num_sub_vectors=num_sub_vectors)
+
+def ensure_vector_index(table=None, rebuild: bool = False):
+    """
+    Creates the IVF-PQ index once the table is large enough, and folds newly
+    added rows into it once they pile up. rebuild=True retrains it from scratch.
+    Returns the action taken: "created", "rebuilt", "optimized" or None.
+    """
+    table = table or get_or_create_table()
+    num_rows = table.count_rows()
+    stats = get_vector_index_stats(table)
+
+    if stats is None or rebuild:
+        # PQ training needs at least 256 rows (one per 8-bit code)
+        if num_rows < 256 or (num_rows < ANN_INDEX_MIN_ROWS and not rebuild):
+            return None
+        dim = table.schema.field("vector").type.list_size
+        print(f"DEBUG: [index] Building IVF-PQ index on {num_rows} rows")
+        table.create_index("vector", config=_ivf_pq_config(num_rows, dim), name=VECTOR_INDEX_NAME, replace=True)
+        return "rebuilt" if stats else "created"
+
+    if stats["unindexed_rows"] > ANN_UNINDEXED_FRACTION * max(stats["indexed_rows"], 1):
+        print(f"DEBUG: [index] Optimizing index ({stats['unindexed_rows']} unindexed rows)")
+        table.optimize()
+        return "optimized"
+    return None
+
+def schedule_index_maintenance(table=None, table_name: str = "resumes"):
+    """
+    Runs ensure_indexes in a background thread. If the table is already being
+    maintained, one more pass is queued to run when the current one finishes.
+    """
+    table = table or get_or_create_table()
+    lock = _index_maintenance_lock(table_name)
+    with _index_maintenance_guard:
+        if not lock.acquire(blocking=False):
+            _index_maintenance_pending[table_name] = table
+            return
+    _start_index_maintenance(table, table_name)
+
+def _start_index_maintenance(table, table_name: str):
+    """Maintains the table in a background thread; the caller holds the table's lock."""
+    def run():
+        current = table
+        while current is not None:
+            try:
+                ensure_indexes(current, table_name)
+            except Exception as e:
+                print(f"DEBUG: [index] Index maintenance of '{table_name}' failed: {e}")
+            current = _release_index_maintenance(table_name)
+
+    threading.Thread(target=run, name=f"index-maintenance-{table_name}", daemon=True).start()
+
+def get_index_report():
+    """Row counts and index coverage of the resumes table, for admin tooling."""
+    table = get_or_create_table()
+    num_rows = table.count_rows()
+    stats = get_vector_index_stats(table)
+    return {
+        "table": "resumes",
+        "rows": num_rows,
+        "index_threshold": ANN_INDEX_MIN_ROWS,
+        "embedding": get_embedding_layout(table),
+        "vector_index": stats,
+        "indices": [
+            {
+                "name": idx.name,
+                "type": idx.index_type,
+                "columns": list(idx.columns),
+                "indexed_rows": idx.num_indexed_rows,
+                "unindexed_rows": idx.num_unindexed_rows
+            }
+            for idx in table.list_indices()
+        ]
+    }
+
+def get_cache_report():
+    """Hit rates of the query and chunk embedding caches, for admin tooling."""
+    from services.db.search_cache import search_cache
+    return {
+        "search_results": search_cache.stats(),
+        "memory_index": memory_engine.stats(),
+        "query_embeddings": query_embedding_cache.stats(),
+        "embedding_clients": _embeddings_clients.stats(),
+        "embeddings": embedding_cache.stats()
+    }
+
 # ---------- CHUNKING ----------
-def chunk_text(text, chunk_size=1000, chunk_overlap=200):
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+def chunk_text(text, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP):
     """Simple sliding window chunking."""
     chunks = []
     start = 0
@@ -74,33 +496,253 @@ def chunk_text(text, chunk_size=1000, chunk_overlap=200):
         start += chunk_size - chunk_overlap
     return chunks
 
+def reassemble_chunks(chunks, chunk_overlap=CHUNK_OVERLAP):
+    """Inverse of chunk_text: every chunk after the first repeats the previous chunk's last chunk_overlap characters."""
+    if not chunks:
+        return ""
+    return chunks[0] + "".join(chunk[chunk_overlap:] for chunk in chunks[1:])
+
+# ---------- EMBEDDING STAGE ----------
+# Chunks are sent to the embeddings endpoint in size-capped batches instead of
+# one embed_query round-trip per chunk. Batches may span several files.
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_BATCH_MAX_CHARS = int(os.getenv("EMBED_BATCH_MAX_CHARS", "64000"))
+EMBED_MAX_CONCURRENCY = int(os.getenv("EMBED_MAX_CONCURRENCY", "4"))
+
+def iter_embedding_batches(texts, batch_size=EMBED_BATCH_SIZE, max_chars=EMBED_BATCH_MAX_CHARS):
+    """Yields (start, end) index ranges over texts, capped by item count and total characters."""
+    start = 0
+    while start < len(texts):
+        end = start
+        chars = 0
+        while end < len(texts) and end - start < batch_size:
+            if end > start and chars + len(texts[end]) > max_chars:
+                break
+            chars += len(texts[end])
+            end += 1
+        yield start, end
+        start = end
+
+def embed_texts(texts, embeddings, batch_size=EMBED_BATCH_SIZE, max_concurrency=EMBED_MAX_CONCURRENCY):
+    """Embeds texts via embed_documents in batches, with at most max_concurrency requests in flight."""
+    if not texts:
+        return []
+
+    batches = list(iter_embedding_batches(texts, batch_size=batch_size))
+    print(f"DEBUG: [embeddings] Embedding {len(texts)} chunks in {len(batches)} batches (concurrency: {max_concurrency})")
+
+    def _embed(bounds):
+        start, end = bounds
+        return embeddings.embed_documents(texts[start:end])
+
+    vectors = []
+    if len(batches) == 1 or max_concurrency <= 1:
+        for bounds in batches:
+            vectors.extend(_embed(bounds))
+        return vectors
+
+    with ThreadPoolExecutor(max_workers=min(max_concurrency, len(batches))) as pool:
+        # map() preserves batch order, so vectors stay aligned with texts
+        for batch_vectors in pool.map(_embed, batches):
+            vectors.extend(batch_vectors)
+    return vectors
+
 # ---------- STORE ----------
-def store_resume(filename: str, text: str, user_id: str, api_key: str = None):
-    print(f"DEBUG: Storing resume {filename} for user {user_id} (text length: {len(text)})")
+def delete_resumes(user_id: str, filenames):
+    """Removes the documents rows and all chunk rows of the given files for a user."""
+    filenames = list(filenames)
+    if not filenames:
+        return
+    file_filter = where_all(where_eq(user_id=user_id), where_in("filename", filenames))
+    # Documents first: a documents row must never outlive its chunks
+    get_or_create_documents_table().delete(file_filter)
+    get_or_create_table().delete(file_filter)
+    print(f"DEBUG: Deleted existing rows of {len(filenames)} resumes for user {user_id}")
+
+def store_resumes(documents, user_id: str, api_key: str = None, replace: bool = False, force: bool = False):
+    """
+    Chunks, embeds and stores several resumes at once.
+    documents: list of {"filename": ..., "text": ...} dicts, optionally with the
+    "size_bytes" and "page_count" extraction stats of the source file.
+    All chunks share the same embedding batches and a single table.add.
+    With replace=True, previously stored rows of the same files are replaced:
+    the new chunks are written first and the old ones deleted only after the
+    documents rows were updated, so a failed store never loses a resume. Files
+    whose content hash is unchanged are not re-embedded unless force=True
+    (e.g. after a chunking or embedding model change).
+    A filename given twice is stored once, with its last text.
+    Returns the filenames actually written.
+    """
+    from datetime import datetime
+
+    documents = list({d["filename"]: d for d in documents if d.get("text")}.values())
+    if not documents:
+        return []
+
     table = get_or_create_table()
-    embeddings = get_embeddings_model(api_key=api_key)
-    
-    # Chunk the resume text for better semantic search
-    chunks = chunk_text(text)
-    print(f"DEBUG: Created {len(chunks)} chunks for {filename}")
-    
-    data = []
-    for i, chunk in enumerate(chunks):
-        # Only print every 10th chunk to reduce noise
-        if i % 10 == 0:
-            print(f"DEBUG: Generating embedding for chunk {i+1}/{len(chunks)}...")
-        vector = embeddings.embed_query(chunk)
-        data.append({
-            "id": str(uuid4()),
+    docs_table = get_or_create_documents_table()
+    uploaded_at = datetime.now().isoformat()
+
+    doc_rows = [
+        {
+            "doc_id": document_id(user_id, doc["filename"]),
             "user_id": user_id,
-            "filename": filename,
-            "text": chunk, # Store the chunk text
-            "vector": vector
-        })
-    
-    print(f"DEBUG: Adding {len(data)} rows to LanceDB for {filename}")
-    table.add(data)
-    print(f"DEBUG: Successfully stored {filename}")
+            "filename": doc["filename"],
+            "content_hash": text_hash(doc["text"]),
+            "size_bytes": doc.get("size_bytes"),
+            "page_count": doc.get("page_count"),
+            "num_chars": len(doc["text"]),
+            "num_chunks": 0,
+            "uploaded_at": uploaded_at
+        }
+        for doc in documents
+    ]
+
+    if replace and not force:
+        stored = get_documents(user_id, [d["filename"] for d in documents])
+        unchanged = {
+            d["filename"] for d in doc_rows
+            if d["filename"] in stored and stored[d["filename"]]["content_hash"] == d["content_hash"]
+        }
+        if unchanged:
+            documents = [d for d in documents if d["filename"] not in unchanged]
+            doc_rows = [d for d in doc_rows if d["filename"] not in unchanged]
+        if not documents:
+            return []
+
+    embeddings = get_table_embeddings(table, api_key=api_key)
+
+    rows = []
+    for doc, doc_row in zip(documents, doc_rows):
+        # Chunk the resume text for better semantic search
+        chunks = chunk_text(doc["text"])
+        doc_row["num_chunks"] = len(chunks)
+        print(f"DEBUG: Created {len(chunks)} chunks for {doc['filename']}")
+        for i, chunk in enumerate(chunks):
+            rows.append({
+                "id": str(uuid4()),
+                "user_id": user_id,
+                "filename": doc["filename"],
+                "text": chunk, # Store the chunk text
+                "doc_id": doc_row["doc_id"],
+                "chunk_index": i
+            })
+
+    vectors = embed_texts([row["text"] for row in rows], embeddings)
+    for row, vector in zip(rows, vectors):
+        row["vector"] = vector
+
+    print(f"DEBUG: Adding {len(rows)} rows to LanceDB for {len(documents)} resumes")
+    table.add(rows)
+    # Chunks are committed before their documents rows, so a documents row implies stored chunks
+    (
+        docs_table.merge_insert("doc_id")
+        .when_matched_update_all()
+        .when_not_matched_insert_all()
+        .execute(pa.Table.from_pylist(doc_rows, schema=documents_schema))
+    )
+    if replace:
+        # Only now drop the previous chunks of these files: every row not written above
+        table.delete(where_all(
+            where_eq(user_id=user_id),
+            where_in("filename", [d["filename"] for d in documents]),
+            f"NOT ({where_in('id', [row['id'] for row in rows])})"
+        ))
+    schedule_index_maintenance(table)
+    schedule_index_maintenance(docs_table, "documents")
+    print(f"DEBUG: Successfully stored {', '.join(d['filename'] for d in documents)}")
+    return [d["filename"] for d in documents]
+
+def store_resume(filename: str, text: str, user_id: str, api_key: str = None):
+    print(f"DEBUG: Storing resume {filename} for user {user_id} (text length: {len(text)})")
+    # A filename identifies one document per user, so a re-store replaces the old chunks
+    store_resumes([{"filename": filename, "text": text}], user_id, api_key=api_key, replace=True)
+
+# ---------- DOCUMENTS ----------
+def get_documents(user_id: str, filenames=None) -> dict:
+    """Returns {filename: documents row} for a user's resumes, optionally restricted to filenames."""
+    clauses = [where_eq(user_id=user_id)]
+    if filenames is not None:
+        clauses.append(where_in("filename", filenames))
+    rows = get_or_create_documents_table().search().where(where_all(*clauses), prefilter=True).to_arrow()
+    return {row["filename"]: row for row in rows.to_pylist()}
+
+def list_documents(user_id: str) -> list:
+    """A user's resumes with their extraction stats, most recently uploaded first."""
+    documents = list(get_documents(user_id).values())
+    documents.sort(key=lambda d: d["uploaded_at"] or "", reverse=True)
+    return documents
+
+def get_chunks(user_id: str, filename: str, columns=("chunk_index", "text")):
+    """
+    A stored resume's chunk rows in document order, as an Arrow table. This is a
+    keyed lookup: a prefiltered scan with only the requested columns projected,
+    so no vector distances are computed and no vectors are read.
+    """
+    columns = list(dict.fromkeys(["chunk_index", *columns]))
+    chunks = (
+        get_or_create_table().search()
+        .where(where_eq(user_id=user_id, filename=filename), prefilter=True)
+        .select(columns)
+        .to_arrow()
+    )
+    return chunks.sort_by("chunk_index")
+
+def get_document(user_id: str, filename: str):
+    """
+    Fetches one resume by filename: its documents row plus the full text
+    reassembled from the chunks. Returns None when the user has no such resume.
+    """
+    chunks = get_chunks(user_id, filename)
+    if chunks.num_rows == 0:
+        return None
+    document = get_documents(user_id, [filename]).get(filename) or {
+        "doc_id": document_id(user_id, filename), "user_id": user_id, "filename": filename
+    }
+    document["text"] = reassemble_chunks(chunks["text"].to_pylist())
+    return document
+
+def count_documents(user_id: str) -> int:
+    return get_or_create_documents_table().count_rows(where_eq(user_id=user_id))
+
+# user_id -> (documents table version, generation)
+_generations = {}
+
+def tenant_generation(user_id: str) -> str:
+    """
+    Fingerprint of a tenant's stored resumes. It changes exactly when one of
+    their documents is added, replaced or deleted, in this or any other process,
+    and is only recomputed when the documents table version moves.
+    """
+    import hashlib
+
+    table = get_or_create_documents_table()
+    version = table.version
+    cached = _generations.get(user_id)
+    if cached and cached[0] == version:
+        return cached[1]
+    rows = (
+        table.search()
+        .where(where_eq(user_id=user_id), prefilter=True)
+        .select(["doc_id", "content_hash", "uploaded_at"])
+        .to_arrow()
+    )
+    digest = hashlib.sha256()
+    for doc in sorted(zip(*(rows[c].to_pylist() for c in rows.column_names)), key=lambda r: r[0]):
+        digest.update(f"{doc[0]}:{doc[1]}:{doc[2]}\n".encode("utf-8"))
+    generation = digest.hexdigest()[:16]
+    _generations[user_id] = (version, generation)
+    return generation
+
+def find_duplicate_documents(user_id: str) -> list:
+    """Groups of a user's resumes whose extracted text is identical."""
+    groups = {}
+    for doc in get_documents(user_id).values():
+        groups.setdefault(doc["content_hash"], []).append(doc["filename"])
+    return [
+        {"content_hash": h, "filenames": sorted(names)}
+        for h, names in groups.items() if len(names) > 1
+    ]
 
 # ---------- ACTIVITY SCHEMA ----------
 activity_schema = pa.schema([
@@ -114,14 +756,20 @@ activity_schema = pa.schema([
 ])
 
 def get_or_create_activity_table():
-    if "activity" in db.table_names():
-        return db.open_table("activity")
-    return db.create_table("activity", schema=activity_schema, mode="create")
+    return open_table(
+        "activity", activity_schema,
+        on_create=lambda table: ensure_scalar_indexes(table, "activity")
+    )
+
+# Events are queued and group-committed by a background thread; see ActivityWriter
+activity_writer = ActivityWriter(
+    get_or_create_activity_table,
+    on_flush=lambda table: schedule_index_maintenance(table, "activity")
+)
 
 def log_activity(user_id: str, activity_type: str, filename: str, score: int, decision: str = "N/A"):
     from datetime import datetime
-    table = get_or_create_activity_table()
-    table.add([{
+    activity_writer.add({
         "id": str(uuid4()),
         "user_id": user_id,
         "type": activity_type,
@@ -129,59 +777,65 @@ def log_activity(user_id: str, activity_type: str, filename: str, score: int, de
         "score": score,
         "decision": decision,
         "timestamp": datetime.now().isoformat()
-    }])
-    print(f"DEBUG: Logged activity: {activity_type} for {filename} (User: {user_id})")
+    })
+    print(f"DEBUG: Queued activity: {activity_type} for {filename} (User: {user_id})")
 
 def get_dashboard_stats(user_id: str):
+    """
+    Per-user dashboard counters. Resumes are counted in the documents table and
+    only the tenant's activity rows are read (prefiltered by the user_id bitmap
+    index) with the needed columns projected, so no vectors are loaded and
+    latency does not depend on the total corpus size.
+    """
+    import pyarrow.compute as pc
+
     print(f"DEBUG: [stats] Fetching stats for user: {user_id}")
-    resumes_table = get_or_create_table()
     activity_table = get_or_create_activity_table()
-    
-    import pandas as pd
-    resumes_df = resumes_table.to_pandas()
-    
-    total_resumes = 0
-    if not resumes_df.empty:
-        # Trace available IDs
-        available = resumes_df['user_id'].unique().tolist()
-        print(f"DEBUG: [stats] Resumes table Users: {available}")
-        
-        user_resumes = resumes_df[resumes_df['user_id'] == user_id]
-        total_resumes = user_resumes['filename'].nunique()
-        print(f"DEBUG: [stats] Found {total_resumes} resumes for {user_id}")
-    
+    user_filter = where_eq(user_id=user_id)
+
+    total_resumes = count_documents(user_id)
+    print(f"DEBUG: [stats] Found {total_resumes} resumes for {user_id}")
+
     # Activity Stats
-    activity_df = activity_table.to_pandas()
-    
-    total_screened = 0
-    high_matches = 0
-    skill_gaps = 0
-    quality_scored = 0
-    recent_activity = []
-
-    if not activity_df.empty:
-        available_act = activity_df['user_id'].unique().tolist()
-        print(f"DEBUG: [stats] Activity table Users: {available_act}")
-
-        # Filter by user_id
-        user_activity = activity_df[activity_df['user_id'] == user_id]
-        print(f"DEBUG: [stats] Found {len(user_activity)} activities for {user_id}")
-        
-        total_screened = len(user_activity[user_activity['type'] == 'screen'])
-        high_matches = len(user_activity[user_activity['score'] >= 80])
-        skill_gaps = len(user_activity[user_activity['type'] == 'skill_gap'])
-        quality_scored = len(user_activity[user_activity['type'] == 'quality'])
-        
-        # Get 5 most recent activities
-        recent_df = user_activity.sort_values(by="timestamp", ascending=False).head(5)
-        for _, row in recent_df.iterrows():
-            recent_activity.append({
-                "type": row['type'],
-                "filename": row.get('filename', 'N/A'),
-                "score": row.get('score', 0),
-                "decision": row.get('decision', 'N/A'),
-                "timestamp": row.get('timestamp', '')
-            })
+    activity = (
+        activity_table.search()
+        .where(user_filter, prefilter=True)
+        .select(["type", "filename", "score", "decision", "timestamp"])
+        .to_arrow()
+    )
+    # Include events still waiting in the write buffer
+    pending = activity_writer.pending(user_id)
+    if pending:
+        activity = pa.concat_tables([
+            activity,
+            pa.Table.from_pylist(pending, schema=activity_schema).select(activity.column_names).cast(activity.schema)
+        ])
+    print(f"DEBUG: [stats] Found {activity.num_rows} activities for {user_id}")
+
+    def count(mask):
+        return pc.sum(pc.cast(mask, "int64")).as_py() or 0
+
+    total_screened = count(pc.equal(activity["type"], "screen"))
+    high_matches = count(pc.greater_equal(activity["score"], 80))
+    skill_gaps = count(pc.equal(activity["type"], "skill_gap"))
+    quality_scored = count(pc.equal(activity["type"], "quality"))
+
+    # Get 5 most recent activities
+    if activity.num_rows:
+        recent = activity.take(pc.select_k_unstable(activity, 5, [("timestamp", "descending")]))
+        recent = recent.sort_by([("timestamp", "descending")])
+    else:
+        recent = activity
+    recent_activity = [
+        {
+            "type": row["type"],
+            "filename": row["filename"] or "N/A",
+            "score": row["score"] or 0,
+            "decision": row["decision"] or "N/A",
+            "timestamp": row["timestamp"] or ""
+        }
+        for row in recent.to_pylist()
+    ]
 
     return {
         "total_resumes": total_resumes,
@@ -193,16 +847,49 @@ def get_dashboard_stats(user_id: str):
     }
 
 # ---------- SEARCH ----------
-def search_resumes_semantic(query: str, user_id: str, limit: int = 5, api_key: str = None):
-    print(f"DEBUG: Semantic search query: {query} (User: {user_id})")
+# Small tenants can be searched from an in-process matrix instead of LanceDB (see memory_index.py)
+memory_engine = MemoryVectorEngine()
+
+def _tenant_memory_index(table, user_id: str):
+    layout = get_embedding_layout(table)
+    version_key = f"{tenant_generation(user_id)}:{layout['model']}:{layout['dim']}"
+    user_filter = where_eq(user_id=user_id)
+    return memory_engine.get(
+        user_id, version_key,
+        count_rows=lambda: table.count_rows(user_filter),
+        load_rows=lambda: table.search().where(user_filter, prefilter=True).select(table.schema.names).to_arrow()
+    )
+
+def search_by_vector(query_vector, user_id: str, limit: int, nprobes: int = None, refine_factor: int = None,
+                     columns=None, use_memory: bool = True):
+    """Nearest chunks of a tenant to an embedded query as an Arrow table with _distance."""
+    table = get_or_create_table()
+    if use_memory and memory_engine.enabled:
+        tenant_index = _tenant_memory_index(table, user_id)
+        if tenant_index is not None:
+            return tenant_index.search(query_vector, limit, columns=columns)
+
+    # Use LanceDB's where clause for filtering
+    # nprobes/refine_factor only take effect once the vector index exists
+    # Prefilter: only the tenant's rows are scored, backed by the user_id bitmap index
+    search = table.search(query_vector).where(where_eq(user_id=user_id), prefilter=True).limit(limit)
+    search = search.nprobes(nprobes or ANN_NPROBES)
+    if refine_factor or ANN_REFINE_FACTOR:
+        search = search.refine_factor(refine_factor or ANN_REFINE_FACTOR)
+    if columns:
+        search = search.select(columns)
+    return search.to_arrow()
+
+def _search_chunks(query: str, user_id: str, limit: int, api_key: str = None,
+                   nprobes: int = None, refine_factor: int = None, columns=None):
+    """Nearest chunks of a tenant as an Arrow table (with _distance), or None if the table is empty."""
     table = get_or_create_table()
     
     total_rows = len(table)
     if total_rows == 0:
-        import pandas as pd
-        return pd.DataFrame()
+        return None
 
-    embeddings = get_embeddings_model(api_key=api_key)
+    embeddings = get_table_embeddings(table, api_key=api_key)
     
     try:
         query_vector = embeddings.embed_query(query)
@@ -210,7 +897,260 @@ def search_resumes_semantic(query: str, user_id: str, limit: int = 5, api_key: s
         print(f"DEBUG: [search] FATAL: embed_query failed: {e}")
         raise e
     
-    # Use LanceDB's where clause for filtering
-    results = table.search(query_vector).where(f"user_id = '{user_id}'").limit(limit).to_pandas()
+    return search_by_vector(query_vector, user_id, limit, nprobes=nprobes, refine_factor=refine_factor, columns=columns)
+
+def search_resumes_semantic(query: str, user_id: str, limit: int = 5, api_key: str = None,
+                            nprobes: int = None, refine_factor: int = None):
+    print(f"DEBUG: Semantic search query: {query} (User: {user_id})")
+    results = _search_chunks(query, user_id, limit, api_key=api_key, nprobes=nprobes, refine_factor=refine_factor)
+    if results is None:
+        import pandas as pd
+        return pd.DataFrame()
+
+    results = results.to_pandas()
     print(f"DEBUG: Found {len(results)} matches for user {user_id}")
     return results
+
+# ---------- DOCUMENT-LEVEL SEARCH ----------
+GROUP_REDUCERS = ("max", "mean_top_n", "rrf")
+RRF_K = 60
+
+def chunk_relevance(chunks):
+    """Higher-is-better relevance of each hit: vector similarity, BM25 or fused RRF score."""
+    if "_distance" in chunks.column_names:
+        # Squared L2 between unit-length embeddings: d = 2 - 2cos
+        return 1.0 - chunks["_distance"].to_numpy() / 2.0
+    if "_relevance_score" in chunks.column_names:
+        return chunks["_relevance_score"].to_numpy()
+    return chunks["_score"].to_numpy()
+
+def group_chunks_by_document(chunks, limit: int = 5, reducer: str = "max", top_n: int = 3, snippets: int = 2):
+    """
+    Aggregates chunk hits (Arrow table with filename, text and one of
+    _distance / _score / _relevance_score) into one row per document,
+    vectorized with NumPy.
+
+    reducer:
+      "max"        - similarity of the best chunk
+      "mean_top_n" - mean similarity of the document's top_n chunks
+      "rrf"        - sum of reciprocal ranks 1 / (RRF_K + rank) over its chunks
+    """
+    import numpy as np
+    import pandas as pd
+
+    if reducer not in GROUP_REDUCERS:
+        raise ValueError(f"Unknown reducer '{reducer}'. Expected one of {GROUP_REDUCERS}")
+    if chunks is None or chunks.num_rows == 0:
+        return pd.DataFrame(columns=["filename", "score", "num_chunks", "snippets", "text"])
+
+    filenames = chunks["filename"].to_numpy(zero_copy_only=False)
+    texts = chunks["text"].to_numpy(zero_copy_only=False)
+    similarity = chunk_relevance(chunks)
+    rank = np.argsort(np.argsort(-similarity, kind="stable"), kind="stable")
+
+    docs, codes = np.unique(filenames, return_inverse=True)
+    # Order chunks by (document, rank) and compute each chunk's rank within its document
+    order = np.lexsort((rank, codes))
+    sorted_codes = codes[order]
+    group_start = np.searchsorted(sorted_codes, sorted_codes, side="left")
+    rank_in_doc = np.empty_like(order)
+    rank_in_doc[order] = np.arange(len(order)) - group_start
+
+    num_chunks = np.bincount(codes, minlength=len(docs))
+    if reducer == "max":
+        scores = np.full(len(docs), -np.inf)
+        np.maximum.at(scores, codes, similarity)
+    elif reducer == "mean_top_n":
+        mask = rank_in_doc < top_n
+        scores = (np.bincount(codes[mask], weights=similarity[mask], minlength=len(docs))
+                  / np.bincount(codes[mask], minlength=len(docs)))
+    else:
+        scores = np.bincount(codes, weights=1.0 / (RRF_K + rank + 1), minlength=len(docs))
+
+    top = np.argsort(-scores, kind="stable")[:limit]
+
+    # Best supporting snippets: each document's first `snippets` chunks by rank
+    snippet_mask = rank_in_doc < snippets
+    snippet_rows = order[snippet_mask[order]]
+    doc_snippets = {code: [] for code in top}
+    for code, text in zip(codes[snippet_rows], texts[snippet_rows]):
+        if code in doc_snippets:
+            doc_snippets[code].append(text)
+
+    snippet_lists = [doc_snippets[code] for code in top]
+    return pd.DataFrame({
+        "filename": docs[top],
+        "score": scores[top],
+        "num_chunks": num_chunks[top],
+        "snippets": snippet_lists,
+        "text": ["\n...\n".join(parts) for parts in snippet_lists]
+    })
+
+def search_resumes_grouped(query: str, user_id: str, limit: int = 5, api_key: str = None,
+                           reducer: str = "max", overfetch: int = 5, top_n: int = 3, snippets: int = 2,
+                           nprobes: int = None, refine_factor: int = None):
+    """
+    Returns the top `limit` distinct resumes for a query instead of the top chunks.
+    Over-fetches limit * overfetch chunks and groups them per filename.
+    """
+    print(f"DEBUG: Grouped search query: {query} (User: {user_id}, reducer: {reducer})")
+    chunks = _search_chunks(
+        query, user_id, limit * overfetch, api_key=api_key,
+        nprobes=nprobes, refine_factor=refine_factor, columns=["filename", "text", "_distance"]
+    )
+    results = group_chunks_by_document(chunks, limit=limit, reducer=reducer, top_n=top_n, snippets=snippets)
+    print(f"DEBUG: Found {len(results)} documents for user {user_id}")
+    return results
+
+# ---------- KEYWORD & HYBRID SEARCH ----------
+SEARCH_MODES = ("semantic", "keyword", "hybrid")
+# Upper bound on results per search; grouped searches fetch overfetch times as many chunks
+MAX_SEARCH_LIMIT = int(os.getenv("MAX_SEARCH_LIMIT", "50"))
+
+def _search_keyword_chunks(query: str, user_id: str, limit: int, columns=None):
+    """BM25 full-text search over the tenant's chunks. Needs no embedding call."""
+    table = get_or_create_table()
+    if len(table) == 0:
+        return None
+    search = (
+        table.search(query, query_type="fts", fts_columns="text")
+        .where(where_eq(user_id=user_id), prefilter=True)
+        .limit(limit)
+    )
+    if columns:
+        search = search.select(columns + ["_score"])
+    return search.to_arrow()
+
+def fuse_rrf(ranked_lists, limit: int, key: str = "id", k: int = RRF_K):
+    """
+    Reciprocal rank fusion of several ranked Arrow tables sharing a key column.
+    Each row scores sum(1 / (k + rank)) over the lists it appears in.
+    """
+    import numpy as np
+    import pyarrow as pa
+
+    ranked_lists = [t for t in ranked_lists if t is not None and t.num_rows]
+    if not ranked_lists:
+        return None
+
+    columns = [c for c in ranked_lists[0].column_names if not c.startswith("_")]
+    merged = pa.concat_tables([t.select(columns) for t in ranked_lists])
+    ranks = np.concatenate([np.arange(t.num_rows) for t in ranked_lists])
+    keys, first_index, codes = np.unique(
+        merged[key].to_numpy(zero_copy_only=False), return_index=True, return_inverse=True
+    )
+    scores = np.bincount(codes, weights=1.0 / (k + ranks + 1), minlength=len(keys))
+    top = np.argsort(-scores, kind="stable")[:limit]
+    fused = merged.take(pa.array(first_index[top]))
+    return fused.append_column("_relevance_score", pa.array(scores[top]))
+
+def search_resume_chunks(query: str, user_id: str, limit: int = 10, api_key: str = None,
+                         mode: str = "semantic", columns=None):
+    """
+    Nearest chunks for a query as an Arrow table.
+    mode: "semantic" (vector), "keyword" (BM25 only, no network call) or
+    "hybrid" (vector and BM25 rankings fused with reciprocal rank fusion).
+    """
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode '{mode}'. Expected one of {SEARCH_MODES}")
+    if mode == "keyword":
+        return _search_keyword_chunks(query, user_id, limit, columns=columns)
+
+    vector_columns = columns + ["_distance"] if columns else None
+    if mode == "semantic":
+        return _search_chunks(query, user_id, limit, api_key=api_key, columns=vector_columns)
+
+    fuse_columns = list(dict.fromkeys(["id"] + (columns or ["filename", "text"])))
+    vector_hits = _search_chunks(query, user_id, limit, api_key=api_key, columns=fuse_columns + ["_distance"])
+    keyword_hits = _search_keyword_chunks(query, user_id, limit, columns=fuse_columns)
+    return fuse_rrf([vector_hits, keyword_hits], limit)
+
+def search_resumes(query: str, user_id: str, limit: int = 10, api_key: str = None, mode: str = "semantic",
+                   group_by_document: bool = True, reducer: str = "max", overfetch: int = 5):
+    """
+    Single entry point for /api/search: picks the retrieval mode and optionally
+    groups chunk hits into distinct resumes. Returns a DataFrame with filename and text.
+    """
+    import pandas as pd
+
+    limit = max(1, min(limit, MAX_SEARCH_LIMIT))
+    print(f"DEBUG: [search] {mode} query: {query} (User: {user_id}, grouped: {group_by_document})")
+    if not group_by_document:
+        chunks = search_resume_chunks(query, user_id, limit, api_key=api_key, mode=mode)
+        return chunks.to_pandas() if chunks is not None else pd.DataFrame()
+
+    chunks = search_resume_chunks(
+        query, user_id, limit * overfetch, api_key=api_key, mode=mode, columns=["filename", "text"]
+    )
+    return group_chunks_by_document(chunks, limit=limit, reducer=reducer)
+
+def search_resumes_keyword(query: str, user_id: str, limit: int = 5):
+    """Distinct resumes matching the query terms (BM25), without any embedding call."""
+    return search_resumes(query, user_id, limit=limit, mode="keyword")
+
+def search_resumes_hybrid(query: str, user_id: str, limit: int = 5, api_key: str = None):
+    """Distinct resumes ranked by reciprocal rank fusion of vector and BM25 results."""
+    return search_resumes(query, user_id, limit=limit, api_key=api_key, mode="hybrid")
+
+# ---------- BATCH SEARCH ----------
+# Upper bound on queries per batch call
+MAX_BATCH_QUERIES = int(os.getenv("MAX_BATCH_QUERIES", "100"))
+
+def _search_chunks_batch(queries, user_id: str, limit: int, api_key: str = None, columns=None):
+    """
+    Nearest chunks for several queries: one embedding call for all of them and
+    one multi-vector LanceDB query. Returns one Arrow table per query (None if
+    the table is empty).
+    """
+    import pyarrow.compute as pc
+
+    table = get_or_create_table()
+    if len(table) == 0:
+        return [None] * len(queries)
+
+    embeddings = get_table_embeddings(table, api_key=api_key)
+    embed_queries = getattr(embeddings, "embed_queries", embeddings.embed_documents)
+    query_vectors = embed_queries(list(queries))
+
+    search = (
+        table.search(query_vectors)
+        .where(where_eq(user_id=user_id), prefilter=True)
+        .limit(limit)
+        .nprobes(ANN_NPROBES)
+    )
+    if ANN_REFINE_FACTOR:
+        search = search.refine_factor(ANN_REFINE_FACTOR)
+    if columns:
+        search = search.select(columns)
+    results = search.to_arrow()
+    # A single query vector comes back without the query_index column
+    if "query_index" not in results.column_names:
+        return [results]
+    query_index = results["query_index"]
+    results = results.drop_columns(["query_index"])
+    return [results.filter(pc.equal(query_index, i)) for i in range(len(queries))]
+
+def search_resumes_semantic_batch(queries, user_id: str, limit: int = 5, api_key: str = None,
+                                  group_by_document: bool = True, reducer: str = "max", overfetch: int = 5):
+    """
+    Runs many semantic searches for one tenant at roughly the cost of one.
+    Returns a list of DataFrames in query order, shaped like search_resumes results.
+    """
+    import pandas as pd
+
+    queries = list(queries)
+    if not queries:
+        return []
+    if len(queries) > MAX_BATCH_QUERIES:
+        raise ValueError(f"At most {MAX_BATCH_QUERIES} queries per batch, got {len(queries)}")
+    limit = max(1, min(limit, MAX_SEARCH_LIMIT))
+
+    print(f"DEBUG: [search] Batch of {len(queries)} semantic queries (User: {user_id}, grouped: {group_by_document})")
+    if not group_by_document:
+        results = _search_chunks_batch(queries, user_id, limit, api_key=api_key)
+        return [r.to_pandas() if r is not None else pd.DataFrame() for r in results]
+
+    results = _search_chunks_batch(
+        queries, user_id, limit * overfetch, api_key=api_key, columns=["filename", "text", "_distance"]
+    )
+    return [group_chunks_by_document(r, limit=limit, reducer=reducer) for r in results]
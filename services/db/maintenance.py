@@ -0,0 +1,93 @@
+import os
+import time
+from datetime import timedelta
+
+from services.db.lancedb_client import db, DB_PATH, index_maintenance_exclusive
+
+# ---------- SETTINGS ----------
+# Tiny appends (one row per log_activity call, one batch per upload) leave
+# behind many small fragments and manifest versions. Maintenance compacts
+# them and prunes versions older than the retention window.
+MAINTENANCE_INTERVAL_SECONDS = int(os.getenv("MAINTENANCE_INTERVAL_SECONDS", "3600"))
+VERSION_RETENTION_HOURS = float(os.getenv("VERSION_RETENTION_HOURS", "24"))
+# Compact once a table has this many small fragments or this many versions
+COMPACT_MIN_SMALL_FRAGMENTS = int(os.getenv("COMPACT_MIN_SMALL_FRAGMENTS", "16"))
+COMPACT_MIN_VERSIONS = int(os.getenv("COMPACT_MIN_VERSIONS", "100"))
+
+def _dir_size(path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+# ---------- REPORTING ----------
+def table_report(name: str) -> dict:
+    """Row, fragment, version and on-disk size statistics of one table."""
+    table = db.open_table(name)
+    stats = table.stats()
+    fragments = stats["fragment_stats"]
+    return {
+        "table": name,
+        "rows": stats["num_rows"],
+        "version": table.version,
+        "versions": len(table.list_versions()),
+        "fragments": fragments["num_fragments"],
+        "small_fragments": fragments["num_small_fragments"],
+        "indices": stats["num_indices"],
+        "data_bytes": stats["total_bytes"],
+        "disk_bytes": _dir_size(DB_PATH / f"{name}.lance")
+    }
+
+def database_report() -> list:
+    return [table_report(name) for name in db.table_names()]
+
+def needs_compaction(report: dict) -> bool:
+    return (report["small_fragments"] >= COMPACT_MIN_SMALL_FRAGMENTS
+            or report["versions"] >= COMPACT_MIN_VERSIONS)
+
+# ---------- MAINTENANCE ----------
+def compact_table(name: str, retention_hours: float = VERSION_RETENTION_HOURS) -> dict:
+    """
+    Compacts fragments, folds new rows into indexes and removes versions older
+    than retention_hours. Returns the table report before and after.
+    """
+    before = table_report(name)
+    table = db.open_table(name)
+    start = time.time()
+    # Share the index maintenance lock so an index build never races a compaction
+    with index_maintenance_exclusive(name):
+        table.optimize(cleanup_older_than=timedelta(hours=retention_hours))
+    after = table_report(name)
+    print(f"DEBUG: [maintenance] Compacted '{name}' in {time.time() - start:.2f}s: "
+          f"{before['fragments']} -> {after['fragments']} fragments, "
+          f"{before['versions']} -> {after['versions']} versions, "
+          f"{before['disk_bytes']} -> {after['disk_bytes']} bytes")
+    return {"table": name, "before": before, "after": after}
+
+def run_maintenance(force: bool = False, retention_hours: float = VERSION_RETENTION_HOURS) -> list:
+    """Compacts every table that crossed the fragment/version thresholds (or all, with force)."""
+    results = []
+    for report in database_report():
+        if force or needs_compaction(report):
+            try:
+                results.append(compact_table(report["table"], retention_hours=retention_hours))
+            except Exception as e:
+                print(f"DEBUG: [maintenance] Compaction of '{report['table']}' failed: {e}")
+                results.append({"table": report["table"], "error": str(e)})
+    return results
+
+async def maintenance_loop(interval_seconds: int = MAINTENANCE_INTERVAL_SECONDS):
+    """Background task for the API: runs run_maintenance off the event loop every interval."""
+    import asyncio
+    from fastapi.concurrency import run_in_threadpool
+
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await run_in_threadpool(run_maintenance)
+        except Exception as e:
+            print(f"DEBUG: [maintenance] Run failed: {e}")
@@ -0,0 +1,120 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pyarrow as pa
+
+# ---------- SETTINGS ----------
+# Tenants with at most this many chunks are searched in memory; 0 (the default) disables the engine.
+# It scores exactly like LanceDB's brute-force l2 search, so turning it on changes latency, not results
+# (once the table has an IVF-PQ index, LanceDB's results are approximate and the engine's exact).
+MEMORY_INDEX_MAX_CHUNKS = int(os.getenv("MEMORY_INDEX_MAX_CHUNKS", "0"))
+# Number of tenant matrices kept loaded (least recently searched are dropped)
+MEMORY_INDEX_MAX_TENANTS = int(os.getenv("MEMORY_INDEX_MAX_TENANTS", "64"))
+
+class TenantVectorIndex:
+    """
+    A tenant's chunks held in memory: a contiguous float32 matrix of the
+    stored vectors (as they are, not normalised), their squared norms, and
+    the remaining columns as an Arrow table.
+    """
+
+    def __init__(self, rows: pa.Table):
+        column = rows["vector"].combine_chunks()
+        matrix = column.flatten().to_numpy(zero_copy_only=False).astype(np.float32, copy=False)
+        self.matrix = np.ascontiguousarray(matrix.reshape(-1, column.type.list_size))
+        self.squared_norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+        self.rows = rows.drop_columns(["vector"])
+
+    @property
+    def num_rows(self):
+        return self.rows.num_rows
+
+    @property
+    def nbytes(self):
+        return self.matrix.nbytes + self.rows.nbytes
+
+    def search(self, query_vector, limit: int, columns=None) -> pa.Table:
+        """
+        Top-k chunks by squared L2 distance, ||x||^2 - 2 x.q + ||q||^2: one
+        matrix-vector product plus argpartition. Ranking and _distance match
+        LanceDB's l2 search on the raw vectors, whether or not they are normalised.
+        """
+        query = np.asarray(query_vector, dtype=np.float32)
+        distances = self.squared_norms - 2 * (self.matrix @ query) + np.dot(query, query)
+        # Rounding can push a zero distance slightly negative
+        np.maximum(distances, 0, out=distances)
+        k = min(limit, len(distances))
+        if k == 0:
+            top = np.arange(0)
+        else:
+            top = np.argpartition(distances, k - 1)[:k]
+            top = top[np.argsort(distances[top], kind="stable")]
+        names = [c for c in (columns or self.rows.column_names) if c in self.rows.column_names]
+        result = self.rows.select(names).take(pa.array(top))
+        return result.append_column("_distance", pa.array(distances[top], pa.float32()))
+
+class MemoryVectorEngine:
+    """
+    Per-tenant TenantVectorIndex cache. Each entry is tagged with a version key
+    (the tenant's data generation); a search under a different key reloads the
+    tenant, so results stay coherent with writes from any process.
+    """
+
+    def __init__(self, max_chunks: int = MEMORY_INDEX_MAX_CHUNKS, max_tenants: int = MEMORY_INDEX_MAX_TENANTS):
+        self.max_chunks = max_chunks
+        self.max_tenants = max_tenants
+        self.hits = 0
+        self.loads = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_chunks > 0
+
+    def get(self, user_id: str, version_key: str, count_rows, load_rows):
+        """
+        Returns the tenant's index, or None when the tenant has more than
+        max_chunks chunks. count_rows() / load_rows() are only called on a reload.
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] == version_key:
+                self._entries.move_to_end(user_id)
+                if entry[1] is not None:
+                    self.hits += 1
+                return entry[1]
+
+        # Too-large tenants are remembered as None so they are not recounted every query
+        index = None
+        if count_rows() <= self.max_chunks:
+            index = TenantVectorIndex(load_rows())
+            print(f"DEBUG: [memory_index] Loaded {index.num_rows} chunks for {user_id} ({index.nbytes / 1e6:.1f} MB)")
+        with self._lock:
+            if index is not None:
+                self.loads += 1
+            self._entries[user_id] = (version_key, index)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_tenants:
+                self._entries.popitem(last=False)
+        return index
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            loaded = [e[1] for e in self._entries.values() if e[1] is not None]
+            return {
+                "enabled": self.enabled,
+                "tenants": len(loaded),
+                "chunks": sum(i.num_rows for i in loaded),
+                "bytes": sum(i.nbytes for i in loaded),
+                "hits": self.hits,
+                "loads": self.loads,
+                "max_chunks": self.max_chunks,
+                "max_tenants": self.max_tenants
+            }
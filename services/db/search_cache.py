@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from services.db.kv_store import SQLiteKVStore
+
+# ---------- SETTINGS ----------
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "512"))
+# Optional on-disk tier shared by all workers on the host (e.g. data/search_cache.sqlite); off when empty
+SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", "")
+SEARCH_CACHE_DISK_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_DISK_MAX_ENTRIES", "20000"))
+
+def search_cache_key(user_id: str, generation: str, **params) -> str:
+    """
+    Cache key of a search. generation fingerprints the tenant's stored resumes,
+    so entries from before an upload or delete are simply never looked up again.
+    """
+    payload = json.dumps({"user_id": user_id, "generation": generation, **params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class SearchResultCache:
+    """Bounded in-memory LRU of /api/search responses with an optional SQLite tier behind it."""
+
+    def __init__(self, max_entries: int = SEARCH_CACHE_MAX_ENTRIES, disk_path: str = SEARCH_CACHE_PATH,
+                 disk_max_entries: int = SEARCH_CACHE_DISK_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.disk = SQLiteKVStore(disk_path, table="search_results", max_entries=disk_max_entries) if disk_path else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        value = None
+        if self.disk is not None:
+            try:
+                value = self.disk.get(key)
+            except Exception as e:
+                print(f"DEBUG: [search_cache] Disk lookup failed: {e}")
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._remember(key, value)
+        return value
+
+    def put(self, key: str, value):
+        self._remember(key, value)
+        if self.disk is not None:
+            try:
+                self.disk.put(key, value)
+            except Exception as e:
+                print(f"DEBUG: [search_cache] Disk write failed: {e}")
+
+    def _remember(self, key: str, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "disk_entries": self.disk.count() if self.disk is not None else None
+            }
+
+search_cache = SearchResultCache()
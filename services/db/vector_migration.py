@@ -0,0 +1,114 @@
+import os
+import time
+
+import numpy as np
+import pyarrow as pa
+
+from services.db.lancedb_client import (
+    db, index_maintenance_exclusive, get_or_create_table, invalidate_table, get_embedding_layout, make_resume_schema,
+    get_embeddings_model, get_vector_index_stats, ensure_scalar_indexes, ensure_vector_index,
+    embed_texts, VECTOR_DTYPES
+)
+
+# ---------- SETTINGS ----------
+# Rows converted per batch; bounds memory while re-projecting or re-embedding
+MIGRATION_BATCH_ROWS = int(os.getenv("MIGRATION_BATCH_ROWS", "5000"))
+STAGING_TABLE = "resumes_migration"
+
+# ---------- VECTOR CONVERSION ----------
+def reproject_vectors(vectors: np.ndarray, dim: int) -> np.ndarray:
+    """
+    Shortens embeddings to their first dim components and L2-renormalises them.
+    For text-embedding-3 models this is what the API returns for `dimensions=dim`.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)[:, :dim]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+def vector_array(vectors: np.ndarray, dim: int, dtype: str) -> pa.FixedSizeListArray:
+    values = np.ascontiguousarray(vectors, dtype=np.float16 if dtype == "float16" else np.float32)
+    return pa.FixedSizeListArray.from_arrays(pa.array(values.ravel()), dim)
+
+def _vectors_of(batch) -> np.ndarray:
+    column = batch.column(batch.schema.get_field_index("vector"))
+    dim = column.type.list_size
+    # flatten() honours the offset of sliced batches, .values does not
+    return column.flatten().to_numpy(zero_copy_only=False).astype(np.float32).reshape(-1, dim)
+
+def convert_batch(batch, schema: pa.Schema, embeddings=None) -> pa.Table:
+    """Rewrites one batch of chunk rows into the target schema's vector layout."""
+    vector_type = schema.field("vector").type
+    dim = vector_type.list_size
+    dtype = "float16" if vector_type.value_type == pa.float16() else "float32"
+    if embeddings is not None:
+        vectors = np.asarray(embed_texts(batch.column(batch.schema.get_field_index("text")).to_pylist(), embeddings),
+                             dtype=np.float32)
+    else:
+        vectors = reproject_vectors(_vectors_of(batch), dim)
+    columns = {name: batch.column(batch.schema.get_field_index(name)) for name in schema.names if name != "vector"}
+    columns["vector"] = vector_array(vectors, dim, dtype)
+    return pa.table([columns[name] for name in schema.names], schema=schema)
+
+# ---------- MIGRATION ----------
+def migrate_vector_layout(dim: int, dtype: str = "float32", model: str = None, reembed: bool = False,
+                          api_key: str = None, batch_rows: int = MIGRATION_BATCH_ROWS) -> dict:
+    """
+    Rewrites the resumes table into a new embedding layout (model, dimension,
+    storage dtype). By default vectors are re-projected (truncated and
+    renormalised), which needs no API calls but only works when shortening
+    vectors of the same text-embedding-3 model; reembed=True recomputes every
+    vector with the target model instead.
+
+    Rows are converted into a staging table first, so a failure there leaves
+    the resumes table untouched; the staging table is then copied over it and
+    indexes are rebuilt. Run with ingestion stopped: rows written to resumes
+    during the migration are lost.
+    """
+    if dtype not in VECTOR_DTYPES:
+        raise ValueError(f"Unsupported vector dtype '{dtype}'. Use one of: {', '.join(VECTOR_DTYPES)}")
+
+    with index_maintenance_exclusive("resumes"):
+        source = get_or_create_table()
+        current = get_embedding_layout(source)
+        target = {"model": model or current["model"], "dim": dim, "dtype": dtype}
+        if target == current:
+            print(f"DEBUG: [migration] 'resumes' already uses {current}")
+            return {"rows": 0, "from": current, "to": target}
+        if not reembed and (target["model"] != current["model"] or dim > current["dim"]):
+            raise ValueError("Re-projection can only shorten vectors of the same model; use reembed to change "
+                             "the model or grow the dimension.")
+
+        schema = make_resume_schema(**target)
+        embeddings = get_embeddings_model(api_key=api_key, model=target["model"], dimensions=dim) if reembed else None
+        had_vector_index = get_vector_index_stats(source) is not None
+        start = time.time()
+
+        # 1. Convert into the staging table
+        staging = db.create_table(STAGING_TABLE, schema=schema, mode="overwrite")
+        rows = 0
+        for batch in source.search().select(schema.names).to_batches(batch_rows):
+            staging.add(convert_batch(batch, schema, embeddings))
+            rows += batch.num_rows
+            print(f"DEBUG: [migration] Converted {rows} rows")
+
+        # 2. Copy the staging table over resumes; restore the old version on failure
+        previous_version = source.version
+        try:
+            table = db.create_table("resumes", schema=schema, mode="overwrite")
+            for batch in staging.search().to_batches(batch_rows):
+                table.add(pa.Table.from_batches([batch]).cast(schema))
+        except Exception:
+            print(f"DEBUG: [migration] Copy failed, restoring 'resumes' version {previous_version}")
+            db.open_table("resumes").restore(previous_version)
+            raise
+        finally:
+            # The cached handle points at the replaced dataset
+            invalidate_table("resumes")
+        db.drop_table(STAGING_TABLE)
+
+        # 3. Indexes do not survive the overwrite
+        ensure_scalar_indexes(table, "resumes")
+        ensure_vector_index(table, rebuild=had_vector_index)
+
+    print(f"DEBUG: [migration] Migrated {rows} rows from {current} to {target} in {time.time() - start:.1f}s")
+    return {"rows": rows, "from": current, "to": target}
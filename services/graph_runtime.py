@@ -0,0 +1,94 @@
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.runnables import RunnableLambda
+
+# ---------- BLOCKING WORK ----------
+# LanceDB, file parsing and scraping are synchronous; async handlers and graph
+# nodes run them here so they never block the event loop. Bounded so a burst of
+# requests queues up instead of starting an unbounded number of threads.
+BLOCKING_WORKERS = int(os.getenv("BLOCKING_WORKERS", "16"))
+
+_blocking_executor = ThreadPoolExecutor(max_workers=BLOCKING_WORKERS, thread_name_prefix="blocking")
+
+async def run_blocking(func, *args, **kwargs):
+    """Runs a synchronous call on the bounded blocking executor and awaits its result."""
+    loop = asyncio.get_running_loop()
+    # Carry context variables (e.g. the per-request LLM cache bypass) into the worker thread
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_blocking_executor, functools.partial(context.run, func, *args, **kwargs))
+
+# ---------- SYNC LLM TIMEOUTS ----------
+# invoke() of a node with a timeout runs its LLM call here, never on the
+# blocking executor: a sync graph is itself often running on a blocking worker
+# (run_blocking), and waiting there on a future queued behind it could deadlock.
+# A timed-out call keeps its worker until the client's own timeout ends it.
+LLM_TIMEOUT_WORKERS = int(os.getenv("LLM_TIMEOUT_WORKERS", "32"))
+
+_llm_timeout_executor = ThreadPoolExecutor(max_workers=LLM_TIMEOUT_WORKERS, thread_name_prefix="llm-timeout")
+
+def shutdown_blocking_executor():
+    _blocking_executor.shutdown(wait=False, cancel_futures=True)
+    _llm_timeout_executor.shutdown(wait=False, cancel_futures=True)
+
+# ---------- GRAPH NODES ----------
+def dual_node(func, afunc):
+    """Graph node with a sync implementation for invoke() and an async one for ainvoke()."""
+    return RunnableLambda(func, afunc=afunc, name=func.__name__)
+
+def blocking_node(func):
+    """Node for synchronous work (e.g. scraping); under ainvoke it runs on the blocking executor."""
+    async def afunc(state):
+        return await run_blocking(func, state)
+    return dual_node(func, afunc)
+
+def llm_node(get_llm, build_prompt, parse, on_error=None, timeout: float = None):
+    """
+    Node making one LLM call: build_prompt(state) -> prompt string, then
+    parse(state, content) -> state update. invoke() uses the blocking client
+    call, ainvoke() awaits the async one. With on_error, any failure of the
+    call or the parsing returns on_error(state, exc) instead of raising.
+    timeout (seconds) bounds the whole node; on expiry it fails with TimeoutError.
+    """
+    def call(state):
+        response = get_llm(state.get("config")).invoke(build_prompt(state))
+        return parse(state, response.content)
+
+    async def acall(state):
+        response = await get_llm(state.get("config")).ainvoke(build_prompt(state))
+        return parse(state, response.content)
+
+    def run(state):
+        try:
+            if timeout is None:
+                return call(state)
+            # A sync call cannot be interrupted: the worker finishes (or hits the
+            # client's own timeout) in the background while the graph moves on
+            future = _llm_timeout_executor.submit(contextvars.copy_context().run, call, state)
+            try:
+                return future.result(timeout=timeout)
+            except TimeoutError:
+                raise TimeoutError(f"LLM call timed out after {timeout}s")
+        except Exception as e:
+            if on_error is None:
+                raise
+            return on_error(state, e)
+
+    async def arun(state):
+        try:
+            if timeout is None:
+                return await acall(state)
+            try:
+                return await asyncio.wait_for(acall(state), timeout)
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"LLM call timed out after {timeout}s")
+        except Exception as e:
+            if on_error is None:
+                raise
+            return on_error(state, e)
+
+    run.__name__ = arun.__name__ = build_prompt.__name__.lstrip("_").replace("_prompt", "")
+    return dual_node(run, arun)
@@ -0,0 +1,182 @@
+import os
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from uuid import uuid4
+
+from services.resume_parser import extract_document
+from services.db.lancedb_client import store_resumes, log_activity
+
+# Jobs run on a small thread pool; text extraction goes to a process pool so
+# CPU-heavy PDF parsing never competes with the API event loop for the GIL.
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+INGEST_PARSE_PROCESSES = int(os.getenv("INGEST_PARSE_PROCESSES", "2"))
+# Number of files whose chunks are embedded and stored together
+FILES_PER_BATCH = 16
+# Finished jobs are kept this long for status polling
+JOB_RETENTION_SECONDS = 3600
+
+class IngestJob:
+    def __init__(self, user_id: str, files: list, store_db: bool):
+        self.id = str(uuid4())
+        self.user_id = user_id
+        self.store_db = store_db
+        self.status = "queued"
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        # Bumped on every change so status streams know when to emit
+        self.version = 0
+        self.files = [
+            {"filename": filename, "path": path, "status": "queued"}
+            for filename, path in files
+        ]
+        self._lock = threading.Lock()
+
+    def update_file(self, index: int, status: str, error: str = None):
+        with self._lock:
+            self.files[index]["status"] = status
+            if error:
+                self.files[index]["error"] = error
+            self.version += 1
+
+    def set_status(self, status: str, error: str = None):
+        with self._lock:
+            self.status = status
+            self.error = error
+            if status in ("completed", "failed"):
+                self.finished_at = time.time()
+            self.version += 1
+
+    @property
+    def done(self):
+        return self.status in ("completed", "failed")
+
+    def to_dict(self):
+        with self._lock:
+            files = [
+                {k: v for k, v in f.items() if k != "path"}
+                for f in self.files
+            ]
+            counts = {}
+            for f in files:
+                counts[f["status"]] = counts.get(f["status"], 0) + 1
+            return {
+                "job_id": self.id,
+                "status": self.status,
+                "error": self.error,
+                "total": len(files),
+                "counts": counts,
+                "files": files,
+                "created_at": self.created_at,
+                "finished_at": self.finished_at
+            }
+
+class IngestJobManager:
+    def __init__(self, max_workers: int = INGEST_WORKERS, parse_processes: int = INGEST_PARSE_PROCESSES):
+        self.max_workers = max_workers
+        self.parse_processes = parse_processes
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._parse_pool = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ingest")
+        return self._executor
+
+    def _get_parse_pool(self):
+        if self._parse_pool is None:
+            # spawn: forking a process that holds LanceDB handles is unsafe
+            self._parse_pool = ProcessPoolExecutor(
+                max_workers=self.parse_processes,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._parse_pool
+
+    def submit(self, user_id: str, files: list, store_db: bool = True, api_key: str = None) -> IngestJob:
+        """files: list of (filename, path_on_disk) tuples already written to disk."""
+        job = IngestJob(user_id, files, store_db)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        self._get_executor().submit(self._run, job, api_key)
+        print(f"DEBUG: [ingest] Queued job {job.id} with {len(files)} files for user {user_id}")
+        return job
+
+    def get(self, job_id: str, user_id: str = None):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or (user_id is not None and job.user_id != user_id):
+            return None
+        return job
+
+    def _prune(self):
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        for job_id in [j.id for j in self._jobs.values() if j.done and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def _run(self, job: IngestJob, api_key: str = None):
+        job.set_status("running")
+        try:
+            parse_pool = self._get_parse_pool()
+            futures = []
+            for i, f in enumerate(job.files):
+                job.update_file(i, "parsing")
+                futures.append(parse_pool.submit(extract_document, f["path"]))
+
+            pending = []
+            for i, future in enumerate(futures):
+                filename = job.files[i]["filename"]
+                try:
+                    extracted = future.result()
+                except Exception as e:
+                    print(f"Error processing {filename}: {e}")
+                    job.update_file(i, "error", str(e))
+                    continue
+
+                if not job.store_db:
+                    self._complete_file(job, i)
+                    continue
+
+                job.update_file(i, "embedding")
+                pending.append((i, dict(extracted, filename=filename)))
+                if len(pending) >= FILES_PER_BATCH:
+                    self._store_batch(job, pending, api_key)
+                    pending = []
+
+            if pending:
+                self._store_batch(job, pending, api_key)
+            job.set_status("completed")
+        except Exception as e:
+            print(f"DEBUG: [ingest] Job {job.id} failed: {e}")
+            job.set_status("failed", str(e))
+        print(f"DEBUG: [ingest] Job {job.id} finished: {job.to_dict()['counts']}")
+
+    def _store_batch(self, job: IngestJob, pending: list, api_key: str = None):
+        try:
+            store_resumes([doc for _, doc in pending], job.user_id, api_key=api_key, replace=True)
+        except Exception as e:
+            print(f"Error storing {len(pending)} files: {e}")
+            for i, _ in pending:
+                job.update_file(i, "error", str(e))
+            return
+        for i, _ in pending:
+            self._complete_file(job, i)
+
+    def _complete_file(self, job: IngestJob, index: int):
+        filename = job.files[index]["filename"]
+        job.update_file(index, "indexed")
+        # Log activity
+        log_activity(job.user_id, "upload", filename, 0, "N/A")
+        print(f"Completed: {filename}")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown(wait=False, cancel_futures=True)
+
+ingest_jobs = IngestJobManager()
@@ -0,0 +1,201 @@
+import asyncio
+import os
+from datetime import datetime
+from uuid import uuid4
+
+import pyarrow as pa
+
+from services.db.lancedb_client import open_table, ensure_scalar_indexes, get_or_create_table, get_table_embeddings, get_embedding_layout
+from services.db.embedding_cache import text_hash
+from services.db.filters import where_eq
+from services.graph_runtime import run_blocking
+from services.llm_clients import llm_from_config
+from services.skill_gap_graph import jd_skill_agent
+
+# ---------- SETTINGS ----------
+# Upper bound on the screening brief the digest call is asked for
+JOB_DIGEST_MAX_WORDS = int(os.getenv("JOB_DIGEST_MAX_WORDS", "150"))
+# Fallback digest (when the digest call fails): the description cut to this many characters
+JOB_DIGEST_FALLBACK_CHARS = int(os.getenv("JOB_DIGEST_FALLBACK_CHARS", "1500"))
+JOB_STATUSES = ("active", "paused", "closed")
+
+# ---------- SCHEMA ----------
+# One row per saved job description. The JD skill set, a compact screening
+# digest and the description's embedding are computed once when the job is
+# saved (or its description changes), so gap analyses and screens against it
+# skip re-extracting the JD on every call.
+job_definitions_schema = pa.schema([
+    pa.field("job_id", pa.string()),
+    pa.field("user_id", pa.string()),
+    pa.field("title", pa.string()),
+    pa.field("description", pa.string()),
+    pa.field("status", pa.string()),
+    pa.field("content_hash", pa.string()), # SHA-256 of the description the fields below were computed from
+    pa.field("skills", pa.list_(pa.string())), # None when extraction failed
+    pa.field("digest", pa.string()),
+    # Variable length: the chunk table's layout may change (see vector_migration.py)
+    pa.field("vector", pa.list_(pa.float32())),
+    pa.field("embedding_model", pa.string()),
+    pa.field("errors", pa.list_(pa.string())), # What failed during the last computation
+    pa.field("created_at", pa.string()),
+    pa.field("updated_at", pa.string())
+])
+
+# Returned by the API; the vector stays server-side
+PUBLIC_COLUMNS = [f.name for f in job_definitions_schema if f.name != "vector"]
+
+def get_or_create_job_definitions_table():
+    return open_table(
+        "job_definitions", job_definitions_schema,
+        on_create=lambda table: ensure_scalar_indexes(table, "job_definitions")
+    )
+
+# ---------- STORAGE ----------
+def get_job_definition(user_id: str, job_id: str, with_vector: bool = False):
+    """One of a user's job definitions, or None."""
+    rows = (
+        get_or_create_job_definitions_table().search()
+        .where(where_eq(user_id=user_id, job_id=job_id), prefilter=True)
+        .select(job_definitions_schema.names if with_vector else PUBLIC_COLUMNS)
+        .to_arrow()
+        .to_pylist()
+    )
+    return rows[0] if rows else None
+
+def list_job_definitions(user_id: str) -> list:
+    """A user's job definitions, most recently created first."""
+    jobs = (
+        get_or_create_job_definitions_table().search()
+        .where(where_eq(user_id=user_id), prefilter=True)
+        .select(PUBLIC_COLUMNS)
+        .to_arrow()
+        .to_pylist()
+    )
+    jobs.sort(key=lambda j: j["created_at"] or "", reverse=True)
+    return jobs
+
+def save_job_definition(job: dict):
+    (
+        get_or_create_job_definitions_table().merge_insert("job_id")
+        .when_matched_update_all()
+        .when_not_matched_insert_all()
+        .execute(pa.Table.from_pylist([job], schema=job_definitions_schema))
+    )
+
+def delete_job_definition(user_id: str, job_id: str) -> bool:
+    table = get_or_create_job_definitions_table()
+    predicate = where_eq(user_id=user_id, job_id=job_id)
+    if table.count_rows(predicate) == 0:
+        return False
+    table.delete(predicate)
+    return True
+
+# ---------- PRECOMPUTATION ----------
+def _digest_prompt(title: str, description: str) -> str:
+    return f"""
+Condense the job description into a screening brief of at most {JOB_DIGEST_MAX_WORDS} words:
+role and seniority, must-have skills and experience, nice-to-have skills, and hard
+requirements (location, certifications, work authorization). Plain text, no preamble.
+
+Job Title: {title}
+
+Job Description:
+{description}
+"""
+
+async def _digest(title: str, description: str, llm_config: dict = None):
+    """(digest, error). Falls back to the truncated description when the call fails."""
+    try:
+        response = await llm_from_config(llm_config, temperature=0).ainvoke(_digest_prompt(title, description))
+        digest = response.content.strip()
+        if digest:
+            return digest, None
+        error = "digest: empty response"
+    except Exception as e:
+        error = f"digest: {type(e).__name__}: {e}"
+    print(f"DEBUG: [job_definitions] Digest failed, using the description: {error}")
+    return f"{title}\n{description[:JOB_DIGEST_FALLBACK_CHARS]}", error
+
+def _embed_description(description: str, api_key: str = None):
+    """(vector, embedding model, error) in the chunk table's current layout."""
+    try:
+        table = get_or_create_table()
+        vector = get_table_embeddings(table, api_key=api_key).embed_documents([description])[0]
+        return vector, get_embedding_layout(table)["model"], None
+    except Exception as e:
+        print(f"DEBUG: [job_definitions] Embedding failed: {e}")
+        return None, None, f"embedding: {type(e).__name__}: {e}"
+
+async def compute_job_fields(title: str, description: str, llm_config: dict = None, api_key: str = None) -> dict:
+    """Skills, digest and embedding of a job description; the three are computed concurrently."""
+    skills_update, (digest, digest_error), (vector, model, embedding_error) = await asyncio.gather(
+        jd_skill_agent.ainvoke({"jd_text": description, "config": llm_config, "errors": []}),
+        _digest(title, description, llm_config),
+        run_blocking(_embed_description, description, api_key)
+    )
+    errors = skills_update.get("errors", []) + [e for e in (digest_error, embedding_error) if e]
+    return {
+        "content_hash": text_hash(description),
+        "skills": skills_update.get("jd_skills"),
+        "digest": digest,
+        "vector": vector,
+        "embedding_model": model,
+        "errors": errors
+    }
+
+def _public(job: dict) -> dict:
+    return {k: v for k, v in job.items() if k in PUBLIC_COLUMNS}
+
+async def create_job_definition(user_id: str, title: str, description: str, status: str = "active",
+                                llm_config: dict = None, api_key: str = None) -> dict:
+    if status not in JOB_STATUSES:
+        raise ValueError(f"Unknown status '{status}'. Expected one of {JOB_STATUSES}")
+    now = datetime.now().isoformat()
+    job = {
+        "job_id": str(uuid4()),
+        "user_id": user_id,
+        "title": title,
+        "description": description,
+        "status": status,
+        **await compute_job_fields(title, description, llm_config, api_key),
+        "created_at": now,
+        "updated_at": now
+    }
+    await run_blocking(save_job_definition, job)
+    print(f"DEBUG: [job_definitions] Saved {job['job_id']} for user {user_id} ({len(job['skills'] or [])} skills)")
+    return _public(job)
+
+async def update_job_definition(user_id: str, job_id: str, title: str = None, description: str = None,
+                                status: str = None, llm_config: dict = None, api_key: str = None):
+    """
+    Applies the given fields. Skills, digest and embedding are recomputed only
+    when the description changes or an earlier computation left one missing.
+    Returns None when the user has no such job.
+    """
+    if status is not None and status not in JOB_STATUSES:
+        raise ValueError(f"Unknown status '{status}'. Expected one of {JOB_STATUSES}")
+    job = await run_blocking(get_job_definition, user_id, job_id, True)
+    if job is None:
+        return None
+
+    for field, value in (("title", title), ("description", description), ("status", status)):
+        if value is not None:
+            job[field] = value
+    if job["content_hash"] != text_hash(job["description"]) or job["skills"] is None or job["vector"] is None:
+        job.update(await compute_job_fields(job["title"], job["description"], llm_config, api_key))
+    job["updated_at"] = datetime.now().isoformat()
+    await run_blocking(save_job_definition, job)
+    return _public(job)
+
+def job_vector(job: dict, api_key: str = None):
+    """
+    The job's stored embedding when it matches the chunk table's current
+    layout; otherwise (e.g. after a re-embedding migration) a fresh one.
+    """
+    table = get_or_create_table()
+    layout = get_embedding_layout(table)
+    vector = job.get("vector")
+    if vector is not None and job.get("embedding_model") == layout["model"] and len(vector) == layout["dim"]:
+        return vector
+    print(f"DEBUG: [job_definitions] Stored embedding of {job['job_id']} does not match the table layout; re-embedding")
+    return get_table_embeddings(table, api_key=api_key).embed_documents([job["description"]])[0]
@@ -1,8 +1,9 @@
 from typing import TypedDict, Optional, Dict
-from langchain_openai import ChatOpenAI
+from services.llm_clients import llm_from_config
 from langchain_core.prompts import PromptTemplate
-import os, json
+import json
 from dotenv import load_dotenv
+from services.graph_runtime import llm_node, blocking_node
 load_dotenv()
 
 class LinkedInResumeState(TypedDict):
@@ -15,21 +16,8 @@ class LinkedInResumeState(TypedDict):
 
 
 def get_llm(config: Optional[Dict]):
-    """Helper to initialize LLM from config or environment."""
-    if config and config.get("api_key"):
-        return ChatOpenAI(
-            model=config.get("model", "gpt-4o-mini"),
-            temperature=config.get("temperature", 0.3),
-            api_key=config.get("api_key"),
-            base_url=config.get("base_url", "https://openrouter.ai/api/v1")
-        )
-    # Fallback to .env
-    return ChatOpenAI(
-        model="gpt-4o-mini",
-        temperature=0.3,
-        api_key=os.getenv("OPEN_ROUTER_KEY"),
-        base_url="https://openrouter.ai/api/v1"
-    )
+    """Shared, pooled LLM client for the request's config (see services/llm_clients.py)."""
+    return llm_from_config(config, temperature=0.3)
 
 from services.linkedin_scraper import scrape_linkedin_profile
 
@@ -60,8 +48,7 @@ def clean_json_output(content: str) -> str:
             content = content.rsplit("\n", 1)[0]
     return content.strip()
 
-def profile_parser_agent(state: LinkedInResumeState):
-    llm = get_llm(state.get("config"))
+def _profile_parser_prompt(state: LinkedInResumeState) -> str:
     prompt = PromptTemplate(
         input_variables=["profile"],
         template="""
@@ -80,18 +67,16 @@ Return ONLY valid JSON:
 }}
 """
     )
+    return prompt.format(profile=state["raw_profile"])
 
-    response = llm.invoke(
-        prompt.format(profile=state["raw_profile"])
-    )
-
+def _parse_profile(state: LinkedInResumeState, content: str):
     try:
-        clean_content = clean_json_output(response.content)
+        clean_content = clean_json_output(content)
         parsed_data = json.loads(clean_content)
         return {"parsed_profile": parsed_data}
     except Exception as e:
         print(f"Error parsing profile JSON: {e}")
-        print(f"Raw content: {response.content}")
+        print(f"Raw content: {content}")
         return {"parsed_profile": {
             "name": "Error Parsing",
             "headline": "Could not extract data",
@@ -100,10 +85,7 @@ Return ONLY valid JSON:
             "education": []
         }}
 
-def resume_writer_agent(state: LinkedInResumeState):
-    llm = get_llm(state.get("config"))
-    profile = state["parsed_profile"]
-
+def _resume_writer_prompt(state: LinkedInResumeState) -> str:
     prompt = PromptTemplate(
         input_variables=["profile"],
         template="""
@@ -142,13 +124,12 @@ Return ONLY valid JSON with this exact structure:
 }}
 """
     )
+    return prompt.format(profile=json.dumps(state["parsed_profile"], indent=2))
 
-    response = llm.invoke(
-        prompt.format(profile=json.dumps(profile, indent=2))
-    )
-
+def _parse_written_resume(state: LinkedInResumeState, content: str):
+    profile = state["parsed_profile"]
     try:
-        clean_content = clean_json_output(response.content)
+        clean_content = clean_json_output(content)
         resume_json = json.loads(clean_content)
         return {"resume": resume_json}
     except Exception as e:
@@ -162,6 +143,10 @@ Return ONLY valid JSON with this exact structure:
             "education": profile.get("education", [])
         }}
 
+# Sync for invoke(), async LLM client for ainvoke()
+profile_parser_agent = llm_node(get_llm, _profile_parser_prompt, _parse_profile)
+resume_writer_agent = llm_node(get_llm, _resume_writer_prompt, _parse_written_resume)
+
 
 
 
@@ -170,7 +155,8 @@ from langgraph.graph import StateGraph, END
 def build_linkedin_resume_graph():
     graph = StateGraph(LinkedInResumeState)
 
-    graph.add_node("fetch", linkedin_fetch_agent)
+    # The scraper is synchronous; under ainvoke it runs on the blocking executor
+    graph.add_node("fetch", blocking_node(linkedin_fetch_agent))
     graph.add_node("parse", profile_parser_agent)
     graph.add_node("write", resume_writer_agent)
 
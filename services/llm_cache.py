@@ -0,0 +1,98 @@
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Sequence
+
+from langchain_core.caches import BaseCache
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, Generation
+
+from services.db.kv_store import SQLiteKVStore
+
+# ---------- SETTINGS ----------
+# Deterministic (temperature 0) completions are cached here; empty disables the cache
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "data/llm_cache.sqlite")
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000"))
+
+# ---------- BYPASS ----------
+# Set per request (X-Cache-Bypass header): lookups miss, fresh responses still overwrite the entry
+_bypass = ContextVar("llm_cache_bypass", default=False)
+
+@contextmanager
+def bypass_llm_cache(active: bool = True):
+    token = _bypass.set(active)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+# ---------- CACHE ----------
+class LLMResponseCache(BaseCache):
+    """
+    Exact-match chat completion cache in a SQLite file, keyed by a hash of the
+    model settings (model, temperature, base URL) and the fully rendered prompt.
+    Only attach it to temperature 0 clients: other completions are not meant
+    to repeat.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, max_entries: int = LLM_CACHE_MAX_ENTRIES,
+                 ttl_seconds: float = LLM_CACHE_TTL_SECONDS):
+        self.store = SQLiteKVStore(path, table="llm_responses", max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\n{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        if _bypass.get():
+            with self._lock:
+                self.bypassed += 1
+            return None
+        try:
+            value = self.store.get(self._key(prompt, llm_string))
+        except Exception as e:
+            print(f"DEBUG: [llm_cache] Lookup failed: {e}")
+            value = None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return [ChatGeneration(message=AIMessage(content=g["content"]), generation_info=g.get("generation_info"))
+                for g in value]
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]):
+        value = [
+            {"content": g.message.content if isinstance(g, ChatGeneration) else g.text,
+             "generation_info": g.generation_info}
+            for g in return_val
+        ]
+        try:
+            self.store.put(self._key(prompt, llm_string), value)
+        except Exception as e:
+            print(f"DEBUG: [llm_cache] Write failed: {e}")
+
+    def clear(self, **kwargs):
+        self.store.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": self.store.count(),
+                "max_entries": self.store.max_entries,
+                "ttl_seconds": self.store.ttl_seconds
+            }
+
+llm_response_cache = LLMResponseCache() if LLM_CACHE_PATH else None
@@ -0,0 +1,145 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import httpx
+from dotenv import load_dotenv
+
+from services.llm_cache import llm_response_cache
+
+load_dotenv()
+
+# ---------- SETTINGS ----------
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "https://openrouter.ai/api/v1")
+LLM_DEFAULT_MODEL = os.getenv("LLM_DEFAULT_MODEL", "gpt-4o-mini")
+# Distinct (base_url, api_key, model, temperature) clients kept alive
+LLM_CLIENT_CACHE_SIZE = int(os.getenv("LLM_CLIENT_CACHE_SIZE", "32"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_CONNECT_TIMEOUT_SECONDS = float(os.getenv("LLM_CONNECT_TIMEOUT_SECONDS", "10"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+# In-flight requests per (base_url, api_key); further calls wait for a free connection
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_KEEPALIVE_SECONDS = float(os.getenv("LLM_KEEPALIVE_SECONDS", "60"))
+
+# ---------- CLIENT REGISTRY ----------
+class ClientRegistry:
+    """
+    Bounded, thread-safe LRU of long-lived clients. Evicted clients are only
+    dropped, never closed: a request may still be using them, and their
+    connections close when they are garbage-collected.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key, factory):
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+            # Created under the lock so concurrent first requests share one client
+            client = factory()
+            self._entries[key] = client
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return client
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+# ---------- HTTP POOLS ----------
+# One keep-alive pool per (base_url, api_key), shared by every model and
+# temperature using that credential. Its connection limit is the concurrency
+# limit for that key.
+_http_pools = ClientRegistry(LLM_CLIENT_CACHE_SIZE)
+
+def _timeout(timeout: float = None):
+    total = timeout or LLM_TIMEOUT_SECONDS
+    # Waiting for a free connection counts against the same budget as the request
+    return httpx.Timeout(total, connect=min(LLM_CONNECT_TIMEOUT_SECONDS, total), pool=total)
+
+def _limits():
+    return httpx.Limits(
+        max_connections=LLM_MAX_CONCURRENCY,
+        max_keepalive_connections=LLM_MAX_CONCURRENCY,
+        keepalive_expiry=LLM_KEEPALIVE_SECONDS
+    )
+
+def http_pool(base_url: str, api_key: Optional[str]):
+    """(httpx.Client, httpx.AsyncClient) shared by all clients of a base URL and key."""
+    return _http_pools.get_or_create(
+        (base_url, api_key),
+        lambda: (httpx.Client(limits=_limits(), timeout=_timeout()),
+                 httpx.AsyncClient(limits=_limits(), timeout=_timeout()))
+    )
+
+# ---------- CHAT MODELS ----------
+_llm_clients = ClientRegistry(LLM_CLIENT_CACHE_SIZE)
+
+def get_chat_model(model: str = LLM_DEFAULT_MODEL, temperature: Optional[float] = 0, api_key: Optional[str] = None,
+                   base_url: str = LLM_BASE_URL, timeout: Optional[float] = None):
+    """
+    Shared ChatOpenAI for (base_url, api_key, model, temperature). Clients are
+    reused across requests and graph nodes, so connections (and TLS sessions)
+    stay open between calls. Temperature 0 clients answer repeated prompts
+    from the LLM response cache.
+    """
+    from langchain_openai import ChatOpenAI
+
+    key = (base_url, api_key, model, temperature, timeout)
+
+    def create():
+        print(f"DEBUG: [llm_clients] New client for {model} (temperature {temperature}) at {base_url}")
+        http_client, http_async_client = http_pool(base_url, api_key)
+        return ChatOpenAI(
+            model=model,
+            temperature=temperature,
+            api_key=api_key,
+            base_url=base_url,
+            timeout=timeout or LLM_TIMEOUT_SECONDS,
+            max_retries=LLM_MAX_RETRIES,
+            http_client=http_client,
+            http_async_client=http_async_client,
+            # None falls back to langchain's global cache, which is not set
+            cache=llm_response_cache if temperature == 0 else None
+        )
+
+    return _llm_clients.get_or_create(key, create)
+
+def llm_from_config(config: Optional[dict], temperature: float = 0):
+    """
+    Chat model for a graph's per-request config (api_key, model, temperature,
+    base_url); without an api_key, the default model with the .env key.
+    """
+    if config and config.get("api_key"):
+        return get_chat_model(
+            model=config.get("model") or LLM_DEFAULT_MODEL,
+            temperature=config.get("temperature", temperature),
+            api_key=config.get("api_key"),
+            base_url=config.get("base_url") or LLM_BASE_URL
+        )
+    # Fallback to .env
+    return get_chat_model(LLM_DEFAULT_MODEL, temperature, os.getenv("OPEN_ROUTER_KEY"), LLM_BASE_URL)
+
+def llm_client_stats() -> dict:
+    return {"chat_models": _llm_clients.stats(), "http_pools": _http_pools.stats()}
@@ -1,11 +1,11 @@
 from typing import TypedDict, Optional
-from langchain_openai import ChatOpenAI
+from services.llm_clients import llm_from_config
 from langchain_core.prompts import PromptTemplate
 from langgraph.graph import StateGraph, END
 import json
-import os
 from dotenv import load_dotenv
 from services.skill_gap_graph import clean_json_output
+from services.graph_runtime import llm_node
 
 load_dotenv()
 
@@ -15,24 +15,10 @@ class GeneratorState(TypedDict):
     config: Optional[dict]
 
 def get_llm(config: Optional[dict]):
-    """Helper to initialize LLM from config or environment."""
-    if config and config.get("api_key"):
-        return ChatOpenAI(
-            model=config.get("model", "gpt-4o-mini"),
-            temperature=config.get("temperature", 0.7),
-            api_key=config.get("api_key"),
-            base_url=config.get("base_url", "https://openrouter.ai/api/v1")
-        )
-    # Fallback to .env
-    return ChatOpenAI(
-        model="gpt-4o-mini",
-        temperature=0.7,
-        api_key=os.getenv("OPEN_ROUTER_KEY"),
-        base_url="https://openrouter.ai/api/v1"
-    )
+    """Shared, pooled LLM client for the request's config (see services/llm_clients.py)."""
+    return llm_from_config(config, temperature=0.7)
 
-def generator_agent(state: GeneratorState):
-    llm = get_llm(state.get("config"))
+def _generator_prompt(state: GeneratorState) -> str:
     prompt = PromptTemplate(
         input_variables=["profile"],
         template="""
@@ -72,22 +58,26 @@ Return ONLY valid JSON with the following structure:
 }}
 """
     )
-    
-    try:
-        response = llm.invoke(prompt.format(profile=state["profile_description"]))
-        clean_content = clean_json_output(response.content)
-        result = json.loads(clean_content)
-        return {"resume_json": result}
-    except Exception as e:
-        # Fallback structure if LLM fails
-        return {
-            "resume_json": {
-                "summary": f"Failed to generate: {str(e)}",
-                "experience": [],
-                "skills": [],
-                "education": []
-            }
+    return prompt.format(profile=state["profile_description"])
+
+def _parse_generated(state: GeneratorState, content: str):
+    clean_content = clean_json_output(content)
+    result = json.loads(clean_content)
+    return {"resume_json": result}
+
+def _generation_failed(state: GeneratorState, e: Exception):
+    # Fallback structure if LLM fails
+    return {
+        "resume_json": {
+            "summary": f"Failed to generate: {str(e)}",
+            "experience": [],
+            "skills": [],
+            "education": []
         }
+    }
+
+# Sync for invoke(), async LLM client for ainvoke()
+generator_agent = llm_node(get_llm, _generator_prompt, _parse_generated, on_error=_generation_failed)
 
 def build_resume_generator_graph():
     graph = StateGraph(GeneratorState)
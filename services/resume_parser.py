@@ -1,13 +1,22 @@
+import os
+
 from pypdf import PdfReader
 import docx
 
 def extract_text(file_path):
+    return extract_document(file_path)["text"]
+
+def extract_document(file_path):
+    """Extracted text plus the stats kept in the documents table."""
+    page_count = None
+    text = ""
     if file_path.endswith(".pdf"):
         reader = PdfReader(file_path)
-        return "\n".join(p.extract_text() for p in reader.pages)
+        page_count = len(reader.pages)
+        text = "\n".join(p.extract_text() for p in reader.pages)
 
-    if file_path.endswith(".docx"):
+    elif file_path.endswith(".docx"):
         doc = docx.Document(file_path)
-        return "\n".join(p.text for p in doc.paragraphs)
+        text = "\n".join(p.text for p in doc.paragraphs)
 
-    return ""
+    return {"text": text, "page_count": page_count, "size_bytes": os.path.getsize(file_path)}
@@ -1,11 +1,12 @@
 from typing import TypedDict, List, Optional
 from langgraph.graph import StateGraph, END
 
-from langchain_openai import ChatOpenAI
+from services.llm_clients import llm_from_config
 from langchain_core.prompts import PromptTemplate
 
 import os, json
 from dotenv import load_dotenv
+from services.graph_runtime import llm_node
 load_dotenv()
 # -----------------------------
 # State
@@ -17,21 +18,8 @@ class ResumeQualityState(TypedDict):
     config: Optional[dict]
 
 def get_llm(config: Optional[dict]):
-    """Helper to initialize LLM from config or environment."""
-    if config and config.get("api_key"):
-        return ChatOpenAI(
-            model=config.get("model", "gpt-4o-mini"),
-            temperature=config.get("temperature", 0),
-            api_key=config.get("api_key"),
-            base_url=config.get("base_url", "https://openrouter.ai/api/v1")
-        )
-    # Fallback to .env
-    return ChatOpenAI(
-        model="gpt-4o-mini",
-        temperature=0,
-        api_key=os.getenv("OPEN_ROUTER_KEY"),
-        base_url="https://openrouter.ai/api/v1"
-    )
+    """Shared, pooled LLM client for the request's config (see services/llm_clients.py)."""
+    return llm_from_config(config, temperature=0)
 
 print(os.getenv("OPENAI_API_KEY"))
 # -----------------------------ssss
@@ -42,8 +30,7 @@ def resume_reader_agent(state: ResumeQualityState):
     return {"parsed": resume_text}
 
 
-def quality_scoring_agent(state: ResumeQualityState):
-    llm = get_llm(state.get("config"))
+def _quality_prompt(state: ResumeQualityState) -> str:
     prompt = PromptTemplate(
     input_variables=["resume"],
     template="""
@@ -65,12 +52,13 @@ Return ONLY valid JSON:
 }}
 """
 )
+    return prompt.format(resume=state["parsed"])
 
-    response = llm.invoke(
-        prompt.format(resume=state["parsed"])
-    )
+def _parse_quality(state: ResumeQualityState, content: str):
+    return {"score": json.loads(content)}
 
-    return {"score": json.loads(response.content)}
+# Sync for invoke(), async LLM client for ainvoke()
+quality_scoring_agent = llm_node(get_llm, _quality_prompt, _parse_quality)
 
 
 # -----------------------------
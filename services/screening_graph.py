@@ -1,11 +1,11 @@
 from typing import TypedDict, Optional
-from langchain_openai import ChatOpenAI
+from services.llm_clients import llm_from_config
 from langchain_core.prompts import PromptTemplate
 from langgraph.graph import StateGraph, END
 import json
-import os
 from dotenv import load_dotenv
 from services.skill_gap_graph import clean_json_output
+from services.graph_runtime import llm_node
 
 load_dotenv()
 
@@ -18,24 +18,10 @@ class ScreeningState(TypedDict):
     threshold: int
 
 def get_llm(config: Optional[dict]):
-    """Helper to initialize LLM from config or environment."""
-    if config and config.get("api_key"):
-        return ChatOpenAI(
-            model=config.get("model", "gpt-4o-mini"),
-            temperature=config.get("temperature", 0),
-            api_key=config.get("api_key"),
-            base_url=config.get("base_url", "https://openrouter.ai/api/v1")
-        )
-    # Fallback to .env
-    return ChatOpenAI(
-        model="gpt-4o-mini",
-        temperature=0,
-        api_key=os.getenv("OPEN_ROUTER_KEY"),
-        base_url="https://openrouter.ai/api/v1"
-    )
+    """Shared, pooled LLM client for the request's config (see services/llm_clients.py)."""
+    return llm_from_config(config, temperature=0)
 
-def screening_agent(state: ScreeningState):
-    llm = get_llm(state.get("config"))
+def _screening_prompt(state: ScreeningState) -> str:
     prompt = PromptTemplate(
         input_variables=["resume", "jd", "threshold"],
         template="""
@@ -69,41 +55,45 @@ Return ONLY valid JSON:
 }}
 """
     )
+    return prompt.format(
+        resume=state["resume_text"], 
+        jd=state["jd_text"],
+        threshold=state.get("threshold", 75)
+    )
+
+def _parse_screening(state: ScreeningState, content: str):
+    clean_content = clean_json_output(content)
+    result = json.loads(clean_content)
+    
+    score_val = result.get("score", {}).get("overall", 0)
+    threshold_val = state.get("threshold", 75)
     
-    try:
-        response = llm.invoke(prompt.format(
-            resume=state["resume_text"], 
-            jd=state["jd_text"],
-            threshold=state.get("threshold", 75)
-        ))
-        clean_content = clean_json_output(response.content)
-        result = json.loads(clean_content)
-        
-        score_val = result.get("score", {}).get("overall", 0)
-        threshold_val = state.get("threshold", 75)
-        
-        # Enforce threshold logic in Python to prevent LLM hallucinations
-        selected = score_val >= threshold_val
-        
-        # Determine decision and reasoning
-        decision = result.get("decision", {})
-        if decision.get("selected") != selected:
-            # Override if LLM made a mathematical error
-            decision["selected"] = selected
-            if selected:
-                decision["reason"] = f"Automatic override: Score {score_val}% meets or exceeds threshold {threshold_val}%. " + decision.get("reason", "")
-            else:
-                decision["reason"] = f"Automatic override: Score {score_val}% is below threshold {threshold_val}%. " + decision.get("reason", "")
+    # Enforce threshold logic in Python to prevent LLM hallucinations
+    selected = score_val >= threshold_val
+    
+    # Determine decision and reasoning
+    decision = result.get("decision", {})
+    if decision.get("selected") != selected:
+        # Override if LLM made a mathematical error
+        decision["selected"] = selected
+        if selected:
+            decision["reason"] = f"Automatic override: Score {score_val}% meets or exceeds threshold {threshold_val}%. " + decision.get("reason", "")
+        else:
+            decision["reason"] = f"Automatic override: Score {score_val}% is below threshold {threshold_val}%. " + decision.get("reason", "")
+
+    return {
+        "decision": decision,
+        "score": {"overall": score_val}
+    }
+
+def _screening_failed(state: ScreeningState, e: Exception):
+    return {
+        "decision": {"selected": False, "reason": f"Error in screening: {str(e)}"},
+        "score": {"overall": 0}
+    }
 
-        return {
-            "decision": decision,
-            "score": {"overall": score_val}
-        }
-    except Exception as e:
-        return {
-            "decision": {"selected": False, "reason": f"Error in screening: {str(e)}"},
-            "score": {"overall": 0}
-        }
+# Sync for invoke(), async LLM client for ainvoke()
+screening_agent = llm_node(get_llm, _screening_prompt, _parse_screening, on_error=_screening_failed)
 
 def build_screening_graph():
     graph = StateGraph(ScreeningState)
@@ -1,14 +1,19 @@
 # services/skill_gap_graph.py
-from typing import TypedDict, List, Optional
+import operator
+from typing import TypedDict, List, Optional, Annotated
 
-from langchain_openai import ChatOpenAI
+from services.llm_clients import llm_from_config
 from langchain_core.prompts import PromptTemplate
-from langgraph.graph import StateGraph, END
+from langgraph.graph import StateGraph, START, END
 import json
 import os
 from dotenv import load_dotenv
+from services.graph_runtime import llm_node
 load_dotenv()
 
+# Each skill extraction may take this long before the gap is computed without it
+SKILL_GAP_BRANCH_TIMEOUT_SECONDS = float(os.getenv("SKILL_GAP_BRANCH_TIMEOUT_SECONDS", "45"))
+
 class SkillGapState(TypedDict):
     resume_text: str
     jd_text: str
@@ -16,23 +21,12 @@ class SkillGapState(TypedDict):
     jd_skills: Optional[List[str]]
     gaps: Optional[dict]
     config: Optional[dict]
+    # Failed extraction branches; both branches may append in the same step
+    errors: Annotated[List[str], operator.add]
 
 def get_llm(config: Optional[dict]):
-    """Helper to initialize LLM from config or environment."""
-    if config and config.get("api_key"):
-        return ChatOpenAI(
-            model=config.get("model", "gpt-4o-mini"),
-            temperature=config.get("temperature", 0),
-            api_key=config.get("api_key"),
-            base_url=config.get("base_url", "https://openrouter.ai/api/v1")
-        )
-    # Fallback to .env
-    return ChatOpenAI(
-        model="gpt-4o-mini",
-        temperature=0,
-        api_key=os.getenv("OPEN_ROUTER_KEY"),
-        base_url="https://openrouter.ai/api/v1"
-    )
+    """Shared, pooled LLM client for the request's config (see services/llm_clients.py)."""
+    return llm_from_config(config, temperature=0)
 
 def clean_json_output(content: str) -> str:
     """Removes markdown code blocks (```json ... ```) from the string."""
@@ -45,8 +39,7 @@ def clean_json_output(content: str) -> str:
             content = content.rsplit("\n", 1)[0]
     return content.strip()
 
-def resume_skill_agent(state: SkillGapState):
-    llm = get_llm(state.get("config"))
+def _resume_skills_prompt(state: SkillGapState) -> str:
     prompt = PromptTemplate(
         input_variables=["resume"],
         template="""
@@ -61,20 +54,19 @@ Return ONLY valid JSON:
 }}
 """
     )
+    return prompt.format(resume=state["resume_text"])
 
-    response = llm.invoke(prompt.format(resume=state["resume_text"]))
+def _parse_resume_skills(state: SkillGapState, content: str):
     try:
-        clean_content = clean_json_output(response.content)
+        clean_content = clean_json_output(content)
         skills = json.loads(clean_content).get("skills", [])
     except json.JSONDecodeError:
-        print(f"Error parsing resume skills: {response.content}")
+        print(f"Error parsing resume skills: {content}")
         skills = [] # Fallback to empty list or handle error appropriately
 
     return {"resume_skills": skills}
 
-
-def jd_skill_agent(state: SkillGapState):
-    llm = get_llm(state.get("config"))
+def _jd_skills_prompt(state: SkillGapState) -> str:
     prompt = PromptTemplate(
         input_variables=["jd"],
         template="""
@@ -89,32 +81,54 @@ Return ONLY valid JSON:
 }}
 """
     )
+    return prompt.format(jd=state["jd_text"])
 
-    response = llm.invoke(prompt.format(jd=state["jd_text"]))
+def _parse_jd_skills(state: SkillGapState, content: str):
     try:
-        clean_content = clean_json_output(response.content)
+        clean_content = clean_json_output(content)
         skills = json.loads(clean_content).get("skills", [])
     except json.JSONDecodeError:
-        print(f"Error parsing JD skills: {response.content}")
+        print(f"Error parsing JD skills: {content}")
         skills = []
 
     return {"jd_skills": skills}
 
+def _branch_failed(field: str):
+    """on_error for an extraction branch: leave its skills unset and record why."""
+    def on_error(state: SkillGapState, e: Exception):
+        print(f"DEBUG: [skill_gap] {field} extraction failed: {e}")
+        return {field: None, "errors": [f"{field}: {type(e).__name__}: {e}"]}
+    return on_error
+
+# Sync for invoke(), async LLM client for ainvoke(); the two run concurrently
+resume_skill_agent = llm_node(get_llm, _resume_skills_prompt, _parse_resume_skills,
+                              on_error=_branch_failed("resume_skills"), timeout=SKILL_GAP_BRANCH_TIMEOUT_SECONDS)
+jd_skill_agent = llm_node(get_llm, _jd_skills_prompt, _parse_jd_skills,
+                          on_error=_branch_failed("jd_skills"), timeout=SKILL_GAP_BRANCH_TIMEOUT_SECONDS)
+
 def skill_gap_agent(state: SkillGapState):
-    resume_skills = set(s.lower() for s in state["resume_skills"])
-    jd_skills = set(s.lower() for s in state["jd_skills"])
+    # A failed branch leaves its skills as None: compare what is there and flag the result
+    resume_skills = set(s.lower() for s in state.get("resume_skills") or [])
+    jd_skills = set(s.lower() for s in state.get("jd_skills") or [])
 
     missing = sorted(jd_skills - resume_skills)
     recommended = missing[:5]
 
-    return {
-        "gaps": {
-            "missing_skills": missing,
-            "recommended": recommended
-        }
+    gaps = {
+        "missing_skills": missing,
+        "recommended": recommended
     }
+    if state.get("errors"):
+        gaps["partial"] = True
+    return {"gaps": gaps}
+
 
 
+def _extraction_branches(state: SkillGapState):
+    # JD skills may come precomputed (saved job definitions); then only the resume is extracted
+    if state.get("jd_skills") is not None:
+        return ["resume_skills"]
+    return ["resume_skills", "jd_skills"]
 
 def build_skill_gap_graph():
     graph = StateGraph(SkillGapState)
@@ -123,9 +137,9 @@ def build_skill_gap_graph():
     graph.add_node("jd_skills", jd_skill_agent)
     graph.add_node("compare", skill_gap_agent)
 
-    graph.set_entry_point("resume_skills")
-
-    graph.add_edge("resume_skills", "jd_skills")
+    # Fan out: the needed extractions start together; compare runs once after them
+    graph.add_conditional_edges(START, _extraction_branches, ["resume_skills", "jd_skills"])
+    graph.add_edge("resume_skills", "compare")
     graph.add_edge("jd_skills", "compare")
     graph.add_edge("compare", END)
 
@@ -0,0 +1,84 @@
+import offline_test_env
+
+import time
+
+from services.db.activity_writer import ActivityWriter
+from services.db.lancedb_client import store_resumes, log_activity, get_dashboard_stats, activity_writer
+
+def test_dashboard_stats_are_per_tenant():
+    user_id = "stats-user"
+    store_resumes([{"filename": f"r{i}.txt", "text": f"Resume {i}"} for i in range(3)], user_id)
+    store_resumes([{"filename": "other.txt", "text": "Another tenant"}], "stats-other")
+
+    log_activity(user_id, "screen", "r0.txt", 91, "SELECTED")
+    log_activity(user_id, "screen", "r1.txt", 40, "REJECTED")
+    log_activity(user_id, "skill_gap", "r2.txt", 70)
+    activity_writer.flush()
+    log_activity(user_id, "quality", "r2.txt", 85)
+    log_activity("stats-other", "screen", "other.txt", 99, "SELECTED")
+
+    # The last two events are still buffered and already counted
+    stats = get_dashboard_stats(user_id)
+    assert {k: v for k, v in stats.items() if k != "recent_activity"} == {
+        "total_resumes": 3, "auto_screened": 2, "high_matches": 2, "skill_gaps": 1, "quality_scored": 1
+    }
+    assert [a["type"] for a in stats["recent_activity"]] == ["quality", "skill_gap", "screen", "screen"]
+
+    empty = get_dashboard_stats("stats-nobody")
+    assert empty["total_resumes"] == 0 and empty["recent_activity"] == []
+
+class FlakyTable:
+    """Records every batch appended to it; fails while `down` is set."""
+
+    def __init__(self):
+        self.batches = []
+        self.down = False
+
+    def add(self, rows):
+        if self.down:
+            raise IOError("table unavailable")
+        self.batches.append([r["id"] for r in rows])
+
+def wait_until(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+def test_activity_writer_group_commits():
+    table = FlakyTable()
+    flushed_tables = []
+    writer = ActivityWriter(lambda: table, on_flush=flushed_tables.append,
+                            max_events=3, interval_seconds=60, max_pending=4)
+
+    # A full batch is committed in one append, without waiting for the interval
+    for i in range(3):
+        writer.add({"id": i, "user_id": "a" if i else "b"})
+    assert wait_until(lambda: table.batches == [[0, 1, 2]])
+    assert flushed_tables == [table]
+
+    # Below max_events nothing is written until the interval or an explicit flush
+    writer.add({"id": 3, "user_id": "a"})
+    writer.add({"id": 4, "user_id": "b"})
+    time.sleep(0.1)
+    assert len(table.batches) == 1
+    assert [r["id"] for r in writer.pending("b")] == [4]
+
+    # A failed flush keeps the events and backs off; overflow drops the oldest
+    table.down = True
+    assert writer.flush() == 0
+    for i in range(5, 8):
+        writer.add({"id": i, "user_id": "a"})
+    table.down = False
+    time.sleep(0.1)
+    assert len(table.batches) == 1
+    assert writer.flush() == 4
+    assert table.batches[1] == [4, 5, 6, 7]
+    assert writer.stats()["dropped"] == 1 and writer.stats()["pending"] == 0
+
+    # close() writes what is left and later events go straight through
+    writer.add({"id": 8, "user_id": "a"})
+    writer.close()
+    writer.add({"id": 9, "user_id": "a"})
+    assert table.batches[2:] == [[8], [9]]
+    assert writer.stats()["flushed"] == 10 - 1
@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import asyncio
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import offline_test_env
+os.environ["SKILL_GAP_BRANCH_TIMEOUT_SECONDS"] = "2"
+
+from services import graph_runtime
+from services.agent_controller import run_resume_pipeline, arun_resume_pipeline
+from services.llm_cache import llm_response_cache, bypass_llm_cache
+
+LLM_LATENCY = 0.5 # Seconds the fake LLM takes per completion
+PARALLEL_SCREENS = 8
+
+class FakeChatCompletions(BaseHTTPRequestHandler):
+    """
+    OpenAI-compatible /chat/completions answering screens, skill extractions and
+    job digests after LLM_LATENCY seconds; prompts containing SLOW take 3 seconds.
+    """
+    prompts = [] # Every prompt received, in arrival order
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = body["messages"][-1]["content"]
+        FakeChatCompletions.prompts.append(prompt)
+        time.sleep(3 if "SLOW" in prompt else LLM_LATENCY)
+        if "skills from the job description" in prompt:
+            content = json.dumps({"skills": ["Python", "Kubernetes", "Terraform"]})
+        elif "skills from the resume" in prompt:
+            content = json.dumps({"skills": ["Python", "Terraform"]})
+        elif "screening brief" in prompt:
+            content = "Senior platform engineer. Must have: Python, Kubernetes, Terraform."
+        else:
+            content = json.dumps({"decision": {"selected": True, "reason": "Strong match."}, "score": {"overall": 82}})
+        payload = json.dumps({
+            "id": "chatcmpl-test",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+        }).encode("utf-8")
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass # The caller timed out and hung up
+
+    def log_message(self, *args):
+        pass
+
+def fake_llm_config(server):
+    return {"api_key": "test-key", "model": "fake-model", "base_url": f"http://127.0.0.1:{server.server_port}/v1"}
+
+def screen_kwargs(config):
+    return dict(task="screen", resumes=["Python developer, 6 years"], query="Senior Python engineer",
+                llm_config=config, threshold=75)
+
+class FakeLLMServer(ThreadingHTTPServer):
+    # The default listen backlog (5) drops some of 8 simultaneous connects, adding 1s SYN retries
+    request_queue_size = 64
+
+def start_fake_llm():
+    server = FakeLLMServer(("127.0.0.1", 0), FakeChatCompletions)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def test_parallel_screens_take_about_as_long_as_one():
+    server = start_fake_llm()
+    config = fake_llm_config(server)
+
+    async def scenario():
+        # Warm-up: client construction and connection setup are not what is measured
+        await arun_resume_pipeline(**screen_kwargs(config))
+
+        start = time.perf_counter()
+        single = await arun_resume_pipeline(**screen_kwargs(config))
+        one = time.perf_counter() - start
+
+        # The event loop must keep ticking while the screens wait on the LLM
+        ticks = 0
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.05)
+                ticks += 1
+        tick_task = asyncio.create_task(ticker())
+
+        start = time.perf_counter()
+        outputs = await asyncio.gather(*[arun_resume_pipeline(**screen_kwargs(config)) for _ in range(PARALLEL_SCREENS)])
+        many = time.perf_counter() - start
+        tick_task.cancel()
+        return single, one, outputs, many, ticks
+
+    try:
+        # Every call must reach the fake LLM
+        with bypass_llm_cache():
+            single, one, outputs, many, ticks = asyncio.run(scenario())
+            # Sync entry point still works and gives the same answer
+            assert run_resume_pipeline(**screen_kwargs(config))["decision"] == single["decision"]
+    finally:
+        server.shutdown()
+
+    print(f"1 screen: {one:.2f}s, {PARALLEL_SCREENS} parallel screens: {many:.2f}s, loop ticks: {ticks}")
+    assert single["decision"]["selected"] is True and single["score"]["overall"] == 82
+    assert all(o["decision"] == single["decision"] for o in outputs)
+    # Sequential would be PARALLEL_SCREENS * LLM_LATENCY (4s)
+    assert many < 2 * one
+    assert ticks >= int(LLM_LATENCY / 0.05) // 2
+
+def test_repeated_screen_is_served_from_llm_cache():
+    server = start_fake_llm()
+    # A different fake model than above, so earlier calls cannot have filled the cache
+    config = {**fake_llm_config(server), "model": "fake-model-cached"}
+    kwargs = {**screen_kwargs(config), "resumes": ["Go developer, 3 years"]}
+    hits = llm_response_cache.stats()["hits"]
+
+    async def timed():
+        start = time.perf_counter()
+        output = await arun_resume_pipeline(**kwargs)
+        return output, time.perf_counter() - start
+
+    try:
+        first, cold = asyncio.run(timed())
+        second, warm = asyncio.run(timed())
+        with bypass_llm_cache():
+            _, bypassed = asyncio.run(timed())
+    finally:
+        server.shutdown()
+
+    print(f"cold: {cold:.3f}s, cached: {warm:.4f}s, bypassed: {bypassed:.3f}s")
+    assert second == first
+    assert cold >= LLM_LATENCY and bypassed >= LLM_LATENCY
+    assert warm < 0.1
+    assert llm_response_cache.stats()["hits"] == hits + 1
+
+def test_skill_gap_extractions_run_in_parallel():
+    server = start_fake_llm()
+    config = fake_llm_config(server)
+
+    async def timed(resume_text):
+        start = time.perf_counter()
+        output = await arun_resume_pipeline(task="skill_gap", resumes=[resume_text],
+                                            query="Platform engineer: Python, Kubernetes, Terraform", llm_config=config)
+        return output, time.perf_counter() - start
+
+    try:
+        with bypass_llm_cache():
+            asyncio.run(timed("Warm-up resume"))
+            output, elapsed = asyncio.run(timed("Python and Terraform developer"))
+            # The resume branch outlives SKILL_GAP_BRANCH_TIMEOUT_SECONDS; the JD branch still counts
+            partial, partial_elapsed = asyncio.run(timed("SLOW resume"))
+    finally:
+        server.shutdown()
+
+    print(f"gap: {elapsed:.2f}s, with a timed-out branch: {partial_elapsed:.2f}s")
+    # Sequential extraction would take 2 * LLM_LATENCY
+    assert elapsed < 1.5 * LLM_LATENCY
+    assert output["gaps"] == {"missing_skills": ["kubernetes"], "recommended": ["kubernetes"]}
+    assert output["errors"] == []
+
+    assert partial_elapsed < 3
+    assert partial["jd_skills"] == ["Python", "Kubernetes", "Terraform"]
+    assert partial["gaps"]["partial"] is True
+    assert len(partial["errors"]) == 1 and partial["errors"][0].startswith("resume_skills: TimeoutError")
+
+def test_skill_gap_with_precomputed_jd_skills_makes_one_call():
+    server = start_fake_llm()
+    config = fake_llm_config(server)
+    sent = len(FakeChatCompletions.prompts)
+
+    try:
+        with bypass_llm_cache():
+            output = run_resume_pipeline(task="skill_gap", resumes=["Python and Terraform developer"],
+                                         query="Platform engineer", llm_config=config,
+                                         jd_skills=["Python", "Kubernetes", "Terraform"])
+    finally:
+        server.shutdown()
+
+    # Only the resume is extracted; a saved job's skills are reused as they are
+    prompts = FakeChatCompletions.prompts[sent:]
+    assert len(prompts) == 1 and "skills from the resume" in prompts[0]
+    assert output["gaps"] == {"missing_skills": ["kubernetes"], "recommended": ["kubernetes"]}
+
+def test_sync_graph_on_a_full_blocking_pool_does_not_starve():
+    from concurrent.futures import ThreadPoolExecutor
+
+    server = start_fake_llm()
+    config = fake_llm_config(server)
+    # Every blocking worker is busy running the sync graph itself
+    blocking_executor = graph_runtime._blocking_executor
+    graph_runtime._blocking_executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        with bypass_llm_cache():
+            output = asyncio.run(graph_runtime.run_blocking(
+                run_resume_pipeline, task="skill_gap", resumes=["Python and Terraform developer"],
+                query="Platform engineer", llm_config=config
+            ))
+    finally:
+        graph_runtime._blocking_executor.shutdown(wait=False)
+        graph_runtime._blocking_executor = blocking_executor
+        server.shutdown()
+
+    # The timed extraction branches must not queue behind the worker waiting for them
+    assert output["errors"] == []
+    assert output["gaps"]["missing_skills"] == ["kubernetes"]
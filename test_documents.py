@@ -0,0 +1,101 @@
+from uuid import uuid4
+
+import offline_test_env
+
+import pyarrow as pa
+import pytest
+
+from services.db.lancedb_client import (
+    db, store_resumes, get_documents, get_chunks, get_document, get_or_create_table, migrate_to_documents,
+    chunk_text, text_hash, CHUNK_SIZE, EMBEDDING_DIM
+)
+
+RESUME = "Backend engineer. " * 120 # Several chunks long
+
+def test_unchanged_text_is_skipped_unless_forced():
+    user_id = "documents-user"
+    assert store_resumes([{"filename": "a.txt", "text": RESUME}], user_id, replace=True) == ["a.txt"]
+    first = get_documents(user_id)["a.txt"]
+
+    # Same text again: nothing is written, the stored rows stay as they were
+    assert store_resumes([{"filename": "a.txt", "text": RESUME}], user_id, replace=True) == []
+    assert get_documents(user_id)["a.txt"]["uploaded_at"] == first["uploaded_at"]
+
+    # force re-chunks and re-embeds, replacing (not duplicating) the chunks
+    assert store_resumes([{"filename": "a.txt", "text": RESUME}], user_id, replace=True, force=True) == ["a.txt"]
+    assert get_chunks(user_id, "a.txt").num_rows == first["num_chunks"] == len(chunk_text(RESUME))
+    assert get_documents(user_id)["a.txt"]["uploaded_at"] > first["uploaded_at"]
+
+    # Only changed files are reported as written
+    written = store_resumes([{"filename": "a.txt", "text": RESUME}, {"filename": "b.txt", "text": "Designer"}],
+                            user_id, replace=True)
+    assert written == ["b.txt"]
+
+def test_legacy_chunks_are_reassembled_into_documents():
+    user_id = "legacy-user"
+    text = "".join(f"line {i} of a long legacy resume\n" for i in range(200))
+    assert len(text) > 3 * CHUNK_SIZE
+    # Chunk table written before documents existed: no doc_id / chunk_index columns
+    legacy = pa.schema([
+        pa.field("id", pa.string()),
+        pa.field("user_id", pa.string()),
+        pa.field("filename", pa.string()),
+        pa.field("text", pa.string()),
+        pa.field("vector", pa.list_(pa.float32(), EMBEDDING_DIM))
+    ])
+    table = db.create_table(f"legacy_{uuid4().hex}", schema=legacy)
+    table.add([
+        {"id": str(uuid4()), "user_id": user_id, "filename": "old.txt", "text": chunk, "vector": [0.0] * EMBEDDING_DIM}
+        for chunk in chunk_text(text)
+    ])
+
+    assert migrate_to_documents(table) == {"documents": 1, "chunks": len(chunk_text(text))}
+    document = get_documents(user_id)["old.txt"]
+    assert document["content_hash"] == text_hash(text)
+    assert document["num_chars"] == len(text)
+    # Re-running touches nothing
+    assert migrate_to_documents(table) == {"documents": 0, "chunks": 0}
+
+def test_documents_are_fetched_by_key():
+    user_id = "fetch-user"
+    store_resumes([{"filename": "c.txt", "text": RESUME}], user_id)
+
+    chunks = get_chunks(user_id, "c.txt", columns=("text",))
+    assert chunks.column_names == ["chunk_index", "text"]
+    assert chunks["chunk_index"].to_pylist() == list(range(len(chunk_text(RESUME))))
+
+    # The whole resume comes back, not just the chunk nearest some vector
+    document = get_document(user_id, "c.txt")
+    assert document["text"] == RESUME
+    assert document["num_chunks"] == chunks.num_rows
+    assert get_document(user_id, "missing.txt") is None
+    assert get_document("fetch-other", "c.txt") is None
+
+def test_a_failed_replace_keeps_the_stored_resume():
+    user_id = "replace-user"
+    store_resumes([{"filename": "r.txt", "text": RESUME}], user_id, replace=True)
+    table = get_or_create_table()
+
+    def failing_add(rows):
+        raise IOError("disk full")
+    table.add = failing_add
+    try:
+        with pytest.raises(IOError):
+            store_resumes([{"filename": "r.txt", "text": "Rewritten resume"}], user_id, replace=True)
+    finally:
+        del table.add
+    assert get_document(user_id, "r.txt")["text"] == RESUME
+
+    store_resumes([{"filename": "r.txt", "text": "Rewritten resume"}], user_id, replace=True)
+    assert get_document(user_id, "r.txt")["text"] == "Rewritten resume"
+    assert get_chunks(user_id, "r.txt").num_rows == 1
+
+def test_a_filename_given_twice_is_stored_once():
+    user_id = "twice-user"
+    written = store_resumes([{"filename": "a.txt", "text": "First draft"}, {"filename": "a.txt", "text": RESUME}],
+                            user_id, replace=True)
+    assert written == ["a.txt"]
+    chunks = get_chunks(user_id, "a.txt")
+    assert chunks["chunk_index"].to_pylist() == list(range(len(chunk_text(RESUME))))
+    assert get_documents(user_id)["a.txt"]["num_chunks"] == chunks.num_rows
+    assert get_document(user_id, "a.txt")["text"] == RESUME
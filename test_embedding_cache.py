@@ -0,0 +1,53 @@
+import offline_test_env
+
+from services.db.embedding_cache import CachedEmbeddings, QueryEmbeddingCache, text_hash
+from services.db.embedding_providers import HashingEmbeddings
+from services.db.lancedb_client import embedding_cache
+from services.db.maintenance import database_report
+
+class CountingEmbeddings(HashingEmbeddings):
+    """Hashing embedder that records every text it is asked to embed."""
+
+    def __init__(self):
+        super().__init__(dim=64)
+        self.seen = []
+
+    def embed_documents(self, texts):
+        self.seen.extend(texts)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.seen.append(text)
+        return super().embed_query(text)
+
+def test_cache_lookups_are_indexed_and_served():
+    embeddings = CountingEmbeddings()
+    cached = CachedEmbeddings(embeddings, model="test:cache-model", cache=embedding_cache)
+    texts = ["python developer", "figma designer", "python developer"]
+
+    first = cached.embed_documents(texts)
+    assert embeddings.seen == ["python developer", "figma designer"]
+    assert cached.embed_documents(texts) == first
+    assert len(embeddings.seen) == 2
+    assert set(embedding_cache.get_many("test:cache-model", [text_hash(t) for t in texts])) == {text_hash(t) for t in texts}
+
+    table = embedding_cache._get_table()
+    assert {"text_hash_idx", "model_idx"} <= {idx.name for idx in table.list_indices()}
+    # Fragments added by put_many are compacted with the other tables
+    assert "embedding_cache" in [r["table"] for r in database_report()]
+
+def test_queries_are_embedded_as_typed():
+    embeddings = CountingEmbeddings()
+    cached = CachedEmbeddings(embeddings, model="test:query-model", cache=embedding_cache,
+                              query_cache=QueryEmbeddingCache())
+
+    # The model sees the original spelling; the normalized form is only the LRU key
+    assert cached.embed_query("Go  Developer") == embeddings.embed_query("Go  Developer")
+    embeddings.seen.clear()
+    cached.embed_query("go developer")
+    assert embeddings.seen == []
+
+    assert cached.embed_queries(["Kubernetes SRE", "kubernetes  sre", "Figma"]) == [
+        HashingEmbeddings(dim=64).embed_query(t) for t in ("Kubernetes SRE", "Kubernetes SRE", "Figma")
+    ]
+    assert embeddings.seen == ["Kubernetes SRE", "Figma"]
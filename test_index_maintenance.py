@@ -0,0 +1,97 @@
+import threading
+import time
+import warnings
+
+import offline_test_env
+
+from fastapi.testclient import TestClient
+
+from services.db import lancedb_client
+from services.db.lancedb_client import db, schedule_index_maintenance, index_maintenance_exclusive
+from services.db.maintenance import compact_table, table_report, needs_compaction, run_maintenance
+
+class RecordingMaintenance:
+    """Stands in for ensure_indexes: records table names and blocks until released."""
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+
+    def __call__(self, table, table_name):
+        with self.lock:
+            self.calls.append(table_name)
+        self.release.wait(5)
+
+    def wait_for(self, count):
+        deadline = time.time() + 5
+        while len(self.calls) < count and time.time() < deadline:
+            time.sleep(0.01)
+        return list(self.calls)
+
+def test_maintenance_requests_are_never_dropped():
+    recorder = RecordingMaintenance()
+    ensure_indexes = lancedb_client.ensure_indexes
+    lancedb_client.ensure_indexes = recorder
+    try:
+        schedule_index_maintenance(object(), "resumes")
+        # A different table is not blocked by the running resumes pass
+        schedule_index_maintenance(object(), "documents")
+        assert sorted(recorder.wait_for(2)) == ["documents", "resumes"]
+
+        # Requests arriving while resumes is busy collapse into one more pass
+        schedule_index_maintenance(object(), "resumes")
+        schedule_index_maintenance(object(), "resumes")
+        recorder.release.set()
+        assert recorder.wait_for(3).count("resumes") == 2
+
+        # Requests parked behind an exclusive holder run when it exits
+        recorder.release.clear()
+        with index_maintenance_exclusive("activity"):
+            schedule_index_maintenance(object(), "activity")
+            time.sleep(0.1)
+            assert "activity" not in recorder.calls
+        assert recorder.wait_for(4)[-1] == "activity"
+    finally:
+        recorder.release.set()
+        lancedb_client.ensure_indexes = ensure_indexes
+
+def test_compaction_folds_small_appends():
+    table = db.create_table("compaction_scratch", data=[{"id": 0, "text": "row"}])
+    for i in range(1, 20):
+        table.add([{"id": i, "text": "row"}])
+    before = table_report("compaction_scratch")
+    assert before["fragments"] == 20 and needs_compaction(before)
+
+    # Compaction waits for an index build holding the same table's lock
+    done = threading.Event()
+    def compact():
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            compact_table("compaction_scratch", retention_hours=0)
+        done.set()
+    with index_maintenance_exclusive("compaction_scratch"):
+        threading.Thread(target=compact, daemon=True).start()
+        assert not done.wait(0.2)
+    assert done.wait(10)
+
+    after = table_report("compaction_scratch")
+    assert after["rows"] == 20
+    assert after["fragments"] == 1 and after["versions"] == 1
+    assert after["disk_bytes"] < before["disk_bytes"]
+    # Below the thresholds, a scheduled run leaves the table alone
+    assert "compaction_scratch" not in [r["table"] for r in run_maintenance()]
+
+def test_admin_endpoints_are_off_without_a_token():
+    from backend import main
+
+    client = TestClient(main.app)
+    assert client.get("/api/admin/storage").status_code == 404
+
+    main.ADMIN_API_TOKEN = "s3cret"
+    try:
+        assert client.get("/api/admin/indexes").status_code == 403
+        assert client.get("/api/admin/indexes", headers={"X-Admin-Token": "wrong"}).status_code == 403
+        assert client.get("/api/admin/indexes", headers={"X-Admin-Token": "s3cret"}).status_code == 200
+    finally:
+        main.ADMIN_API_TOKEN = None
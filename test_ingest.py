@@ -0,0 +1,175 @@
+import offline_test_env
+
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from services.db import lancedb_client
+from services.db.lancedb_client import store_resumes, get_chunks, iter_embedding_batches, get_or_create_table, chunk_text
+from services.db.embedding_providers import HashingEmbeddings
+from services.db.filters import where_eq
+
+class CountingEmbeddings(HashingEmbeddings):
+    """Hashing embedder that records the size of every embed_documents call."""
+
+    def __init__(self, dim):
+        super().__init__(dim=dim)
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(len(texts))
+        return super().embed_documents(texts)
+
+def test_chunks_of_several_files_share_embedding_batches():
+    assert list(iter_embedding_batches(["a" * 10] * 5, batch_size=2)) == [(0, 2), (2, 4), (4, 5)]
+    # The character cap splits batches early, but never leaves one empty
+    assert list(iter_embedding_batches(["a" * 60, "b" * 60, "c" * 200], max_chars=100)) == [(0, 1), (1, 2), (2, 3)]
+
+    user_id = "batch-user"
+    documents = [{"filename": f"r{i}.txt", "text": f"Resume {i}. " + "Python and SQL. " * 150} for i in range(3)]
+    embeddings = CountingEmbeddings(get_or_create_table().schema.field("vector").type.list_size)
+    get_table_embeddings = lancedb_client.get_table_embeddings
+    lancedb_client.get_table_embeddings = lambda table, api_key=None: embeddings
+    try:
+        store_resumes(documents, user_id)
+    finally:
+        lancedb_client.get_table_embeddings = get_table_embeddings
+
+    total = sum(len(chunk_text(d["text"])) for d in documents)
+    # One request for all files instead of one per chunk
+    assert embeddings.calls == [total]
+    rows = get_or_create_table().search().where(where_eq(user_id=user_id), prefilter=True).select(["text", "vector"]).to_arrow()
+    assert rows.num_rows == total
+    for text, vector in zip(rows["text"].to_pylist(), rows["vector"].to_pylist()):
+        assert np.allclose(vector, embeddings.embed_query(text), atol=1e-6)
+    assert get_chunks("batch-user", "r2.txt").num_rows == len(chunk_text(documents[2]["text"]))
+
+def write_docx(path, text):
+    import docx
+    document = docx.Document()
+    document.add_paragraph(text)
+    document.save(path)
+
+def run_reindex(resume_dir, manifest_path, full=False, user_id="reindex-user"):
+    from reindex_resumes import reindex_all
+
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        reindex_all(resume_dir=resume_dir, workers=1, full=full, manifest_path=manifest_path, user_id=user_id)
+    report = output.getvalue()
+    return {key: int(report.split(f"\n{key}: ")[1].split()[0]) for key in ("Indexed", "Unchanged", "Deleted", "Errors")}
+
+def test_reindex_is_incremental_and_full_rewrites():
+    from services.db.lancedb_client import get_documents
+
+    resume_dir = tempfile.mkdtemp(dir=offline_test_env.TEST_DIR)
+    manifest_path = os.path.join(resume_dir, "manifest.json")
+    write_docx(os.path.join(resume_dir, "a.docx"), "Data engineer with Spark and Airflow.")
+    write_docx(os.path.join(resume_dir, "b.docx"), "Android developer with Kotlin.")
+
+    assert run_reindex(resume_dir, manifest_path) == {"Indexed": 2, "Unchanged": 0, "Deleted": 0, "Errors": 0}
+    first = get_documents("reindex-user")
+    assert sorted(first) == ["a.docx", "b.docx"]
+
+    # Fingerprints match: nothing is parsed or embedded
+    assert run_reindex(resume_dir, manifest_path) == {"Indexed": 0, "Unchanged": 2, "Deleted": 0, "Errors": 0}
+    # A new mtime with identical bytes is caught by the content hash
+    os.utime(os.path.join(resume_dir, "a.docx"))
+    assert run_reindex(resume_dir, manifest_path) == {"Indexed": 0, "Unchanged": 2, "Deleted": 0, "Errors": 0}
+
+    # --full re-chunks and re-embeds every file, even with unchanged text
+    assert run_reindex(resume_dir, manifest_path, full=True) == {"Indexed": 2, "Unchanged": 0, "Deleted": 0, "Errors": 0}
+    assert all(d["uploaded_at"] > first[name]["uploaded_at"] for name, d in get_documents("reindex-user").items())
+
+def test_reindex_keys_files_by_relative_path_and_purges_deleted_ones():
+    import reindex_resumes
+    from services.db.lancedb_client import get_documents
+
+    resume_dir = tempfile.mkdtemp(dir=offline_test_env.TEST_DIR)
+    manifest_path = os.path.join(resume_dir, "manifest.json")
+    os.makedirs(os.path.join(resume_dir, "team-a"))
+    write_docx(os.path.join(resume_dir, "cv.docx"), "Top-level resume: iOS developer.")
+    write_docx(os.path.join(resume_dir, "team-a", "cv.docx"), "Team A resume: Rust developer.")
+
+    # The key check follows the table's recorded model, not the env default
+    env_default = reindex_resumes.EMBEDDING_MODEL
+    reindex_resumes.EMBEDDING_MODEL = "text-embedding-3-small"
+    try:
+        assert run_reindex(resume_dir, manifest_path, user_id="tree-user")["Indexed"] == 2
+    finally:
+        reindex_resumes.EMBEDDING_MODEL = env_default
+    assert sorted(get_documents("tree-user")) == ["cv.docx", "team-a/cv.docx"]
+
+    # Deleted files are reported; only --full removes their rows and manifest entries
+    os.remove(os.path.join(resume_dir, "team-a", "cv.docx"))
+    assert run_reindex(resume_dir, manifest_path, user_id="tree-user") == {"Indexed": 0, "Unchanged": 1, "Deleted": 0, "Errors": 0}
+    assert "team-a/cv.docx" in get_documents("tree-user")
+    assert run_reindex(resume_dir, manifest_path, full=True, user_id="tree-user") == {"Indexed": 1, "Unchanged": 0, "Deleted": 1, "Errors": 0}
+    assert "team-a/cv.docx" not in get_documents("tree-user")
+    with open(manifest_path) as f:
+        assert sorted(json.load(f)["files"]) == ["cv.docx"]
+
+def test_ingest_job_reports_per_file_status():
+    from services.ingest_jobs import IngestJobManager
+    from services.db.lancedb_client import get_documents
+
+    upload_dir = tempfile.mkdtemp(dir=offline_test_env.TEST_DIR)
+    files = []
+    for name, text in (("ok1.docx", "QA engineer with Selenium."), ("ok2.docx", "SRE with Terraform.")):
+        write_docx(os.path.join(upload_dir, name), text)
+        files.append((name, os.path.join(upload_dir, name)))
+    with open(os.path.join(upload_dir, "broken.pdf"), "wb") as f:
+        f.write(b"not a pdf")
+    files.insert(1, ("broken.pdf", os.path.join(upload_dir, "broken.pdf")))
+
+    manager = IngestJobManager(max_workers=1, parse_processes=1)
+    try:
+        job = manager.submit("ingest-user", files)
+        deadline = time.time() + 60
+        while not job.done and time.time() < deadline:
+            time.sleep(0.1)
+        status = job.to_dict()
+        # Jobs are only visible to their owner
+        assert manager.get(job.id, user_id="someone-else") is None
+        assert manager.get(job.id, user_id="ingest-user") is job
+    finally:
+        manager.shutdown()
+
+    assert status["status"] == "completed"
+    assert [f["status"] for f in status["files"]] == ["indexed", "error", "indexed"]
+    assert status["counts"] == {"indexed": 2, "error": 1}
+    assert "error" in status["files"][1] and all("path" not in f for f in status["files"])
+    assert sorted(get_documents("ingest-user")) == ["ok1.docx", "ok2.docx"]
+
+def test_uploads_with_the_same_name_stay_separate():
+    from fastapi.testclient import TestClient
+    from backend import main
+    from services.db.lancedb_client import get_document
+
+    client = TestClient(main.app)
+    def upload(text, token=None, names=("cv.docx",)):
+        content = io.BytesIO()
+        write_docx(content, text)
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        files = [("files", (name, content.getvalue())) for name in names]
+        return client.post("/api/resumes/upload", files=files, headers=headers), headers
+
+    first, guest = upload("Guest tenant: Rust systems engineer.")
+    second, recruiter = upload("Recruiter tenant: Scala data engineer.", token="recruiter-token")
+    for response, headers in ((first, guest), (second, recruiter)):
+        job_id = response.json()["job_id"]
+        deadline = time.time() + 60
+        while client.get(f"/api/jobs/{job_id}", headers=headers).json()["status"] != "completed" and time.time() < deadline:
+            time.sleep(0.1)
+
+    assert "Rust" in get_document("user_alex_chen_123", "cv.docx")["text"]
+    assert "Scala" in get_document("user_recruiter_456", "cv.docx")["text"]
+    assert client.get("/api/resumes/download/cv.docx").status_code == 200
+
+    response, _ = upload("Twice", names=("dup.docx", "dup.docx"))
+    assert response.status_code == 400 and "dup.docx" in response.json()["detail"]
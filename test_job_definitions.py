@@ -0,0 +1,148 @@
+import offline_test_env
+
+from datetime import datetime
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from services import llm_clients, job_definitions
+from services.db.lancedb_client import store_resumes, get_or_create_table, get_table_embeddings
+from services.job_definitions import get_job_definition, save_job_definition, job_vector, job_definitions_schema
+from test_async_pipeline import FakeChatCompletions, start_fake_llm
+
+# get_current_user resolves requests without a recruiter token to this tenant
+USER_ID = "user_alex_chen_123"
+HEADERS = {"X-OpenRouter-Key": "test-key", "X-LLM-Model": "fake-model", "X-Cache-Bypass": "true"}
+DESCRIPTION = "Senior platform engineer. Python, Kubernetes and Terraform; on-call for production clusters."
+
+LLM_BASE_URL = llm_clients.LLM_BASE_URL
+
+def fake_llm_client():
+    """TestClient whose default LLM endpoint is a fake server; call stop_fake_llm(server) after."""
+    from backend import main
+
+    server = start_fake_llm()
+    llm_clients.LLM_BASE_URL = f"http://127.0.0.1:{server.server_port}/v1"
+    return TestClient(main.app), server
+
+def stop_fake_llm(server):
+    server.shutdown()
+    llm_clients.LLM_BASE_URL = LLM_BASE_URL
+
+def prompts_since(start):
+    return FakeChatCompletions.prompts[start:]
+
+def save_stored_job(job_id, skills, digest):
+    now = datetime.now().isoformat()
+    table = get_or_create_table()
+    job = {
+        "job_id": job_id, "user_id": USER_ID, "title": "Platform Engineer", "description": DESCRIPTION,
+        "status": "active", "content_hash": None, "skills": skills, "digest": digest,
+        "vector": get_table_embeddings(table).embed_documents([DESCRIPTION])[0],
+        "embedding_model": job_definitions.get_embedding_layout(table)["model"],
+        "errors": [], "created_at": now, "updated_at": now
+    }
+    assert set(job) == set(job_definitions_schema.names)
+    save_job_definition(job)
+    return job
+
+def test_job_definition_crud_round_trip():
+    client, server = fake_llm_client()
+    try:
+        start = len(FakeChatCompletions.prompts)
+        created = client.post("/api/job-definitions", headers=HEADERS,
+                              json={"title": "Platform Engineer", "description": DESCRIPTION}).json()
+        # Skills and digest are extracted once, when the job is saved
+        assert len(prompts_since(start)) == 2
+        assert created["skills"] == ["Python", "Kubernetes", "Terraform"]
+        assert created["digest"].startswith("Senior platform engineer.")
+        assert created["status"] == "active" and created["errors"] == [] and "vector" not in created
+        job_id = created["job_id"]
+
+        assert client.get(f"/api/job-definitions/{job_id}").json() == created
+        assert [j["job_id"] for j in client.get("/api/job-definitions").json()["jobs"]] == [job_id]
+        stored = get_job_definition(USER_ID, job_id, with_vector=True)
+        assert np.allclose(stored["vector"], get_table_embeddings(get_or_create_table()).embed_documents([DESCRIPTION])[0])
+
+        # A status change keeps the computed fields without calling the LLM again
+        start = len(FakeChatCompletions.prompts)
+        paused = client.put(f"/api/job-definitions/{job_id}", headers=HEADERS, json={"status": "paused"}).json()
+        assert prompts_since(start) == []
+        assert paused["status"] == "paused" and paused["skills"] == created["skills"]
+        assert paused["updated_at"] > created["updated_at"]
+        assert client.put(f"/api/job-definitions/{job_id}", json={"status": "archived"}).status_code == 400
+
+        # A new description is re-extracted
+        edited = client.put(f"/api/job-definitions/{job_id}", headers=HEADERS,
+                            json={"description": DESCRIPTION + " Go is a plus."}).json()
+        assert len(prompts_since(start)) == 2
+        assert edited["content_hash"] != created["content_hash"]
+
+        assert client.delete(f"/api/job-definitions/{job_id}").json() == {"success": True}
+        assert client.get(f"/api/job-definitions/{job_id}").status_code == 404
+        assert client.delete(f"/api/job-definitions/{job_id}").status_code == 404
+        assert client.post("/api/analyze/gap", json={"resume_text": "x", "job_id": job_id}).status_code == 404
+    finally:
+        stop_fake_llm(server)
+
+def test_candidates_use_the_stored_vector():
+    from backend import main
+
+    store_resumes([
+        {"filename": "platform.txt", "text": "Platform engineer: Python, Kubernetes, Terraform, production on-call."},
+        {"filename": "designer.txt", "text": "Product designer with Figma and user research."},
+    ], USER_ID)
+    job = save_stored_job("job-candidates", skills=["Python"], digest="Platform engineer")
+
+    def no_embeddings(*args, **kwargs):
+        raise AssertionError("candidates must reuse the job's stored embedding")
+    job_definitions.get_table_embeddings = no_embeddings
+    try:
+        response = TestClient(main.app).get(f"/api/job-definitions/{job['job_id']}/candidates")
+    finally:
+        job_definitions.get_table_embeddings = get_table_embeddings
+    assert TestClient(main.app).get(f"/api/job-definitions/{job['job_id']}/candidates?limit=100000").status_code == 422
+    # Other tests store resumes for the same default tenant
+    filenames = [r["filename"] for r in response.json()["results"]]
+    assert filenames[0] == "platform.txt"
+    assert filenames.index("designer.txt") > 0
+
+def test_job_vector_follows_the_table_layout():
+    table = get_or_create_table()
+    fresh = get_table_embeddings(table).embed_documents([DESCRIPTION])[0]
+    job = {"job_id": "job-layout", "description": DESCRIPTION, "vector": [1.0] * len(fresh),
+           "embedding_model": job_definitions.get_embedding_layout(table)["model"]}
+    assert job_vector(job) == job["vector"]
+
+    # Saved before a migration: another model or dimension is re-embedded in the current layout
+    for stale in ({"embedding_model": "text-embedding-3-small"}, {"vector": [1.0] * (len(fresh) // 2)}, {"vector": None}):
+        assert np.allclose(job_vector({**job, **stale}), fresh)
+
+def test_analyses_use_precomputed_fields_or_fall_back():
+    client, server = fake_llm_client()
+    resume = {"resume_text": "Python developer, 6 years of Terraform."}
+    try:
+        save_stored_job("job-ready", skills=["Python", "Kubernetes", "Terraform"], digest="DIGEST: platform role")
+        save_stored_job("job-bare", skills=None, digest=None)
+
+        # Precomputed skills: only the resume is extracted
+        start = len(FakeChatCompletions.prompts)
+        gap = client.post("/api/analyze/gap", headers=HEADERS, json={**resume, "job_id": "job-ready"}).json()
+        assert gap["gaps"]["missing_skills"] == ["kubernetes"]
+        assert not any("skills from the job description" in p for p in prompts_since(start))
+
+        # Extraction failed when the job was saved: the description is extracted now
+        start = len(FakeChatCompletions.prompts)
+        gap = client.post("/api/analyze/gap", headers=HEADERS, json={**resume, "job_id": "job-bare"}).json()
+        assert gap["gaps"]["missing_skills"] == ["kubernetes"]
+        assert sum("skills from the job description" in p for p in prompts_since(start)) == 1
+
+        # Screens prompt with the digest, or the full description without one
+        start = len(FakeChatCompletions.prompts)
+        client.post("/api/analyze/screen", headers=HEADERS, json={**resume, "job_id": "job-ready"})
+        client.post("/api/analyze/screen", headers=HEADERS, json={**resume, "job_id": "job-bare"})
+        ready, bare = prompts_since(start)
+        assert "DIGEST: platform role" in ready and DESCRIPTION not in ready
+        assert DESCRIPTION in bare
+    finally:
+        stop_fake_llm(server)
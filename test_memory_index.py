@@ -0,0 +1,33 @@
+import offline_test_env
+
+import numpy as np
+
+from services.db.lancedb_client import get_or_create_table, search_by_vector, memory_engine, EMBEDDING_DIM
+from services.db.memory_index import MEMORY_INDEX_MAX_CHUNKS
+
+def test_memory_engine_matches_lancedb():
+    assert MEMORY_INDEX_MAX_CHUNKS == 0 and not memory_engine.enabled
+
+    user_id = "memory-user"
+    rng = np.random.default_rng(7)
+    # Rows of varying length, like the re-projected layouts of vector_migration.py: cosine and L2 rank them differently
+    vectors = rng.normal(size=(200, EMBEDDING_DIM)).astype(np.float32) * rng.uniform(0.2, 3, size=(200, 1))
+    get_or_create_table().add([
+        {"id": f"m{i}", "user_id": user_id, "filename": f"r{i // 4}.txt", "text": f"chunk {i}",
+         "vector": v.tolist(), "doc_id": f"doc-{i // 4}", "chunk_index": i % 4}
+        for i, v in enumerate(vectors)
+    ])
+    queries = [rng.normal(size=EMBEDDING_DIM).astype(np.float32) * 3 for _ in range(5)]
+
+    lance = [search_by_vector(q.tolist(), user_id, 8, columns=["id"], use_memory=False) for q in queries]
+    memory_engine.max_chunks = 1000
+    try:
+        memory = [search_by_vector(q.tolist(), user_id, 8, columns=["id"]) for q in queries]
+        assert memory_engine.stats()["tenants"] == 1
+    finally:
+        memory_engine.max_chunks = 0
+        memory_engine.clear()
+
+    for a, b in zip(lance, memory):
+        assert a["id"].to_pylist() == b["id"].to_pylist()
+        assert np.allclose(a["_distance"].to_numpy(), b["_distance"].to_numpy(), rtol=1e-4, atol=1e-3)
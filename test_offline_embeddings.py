@@ -0,0 +1,70 @@
+import json
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+import offline_test_env
+
+from services.db import embedding_providers
+from services.db.embedding_providers import HashingEmbeddings, EMBEDDING_PROVIDERS
+from services.db.lancedb_client import store_resume, search_resumes_semantic, count_documents, get_or_create_table, get_embeddings_model
+
+class StandInEmbeddingServer(BaseHTTPRequestHandler):
+    """Minimal OpenAI-compatible /embeddings endpoint backed by the hashing embedder."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        vectors = HashingEmbeddings(dim=body.get("dimensions") or 64).embed_documents(texts)
+        payload = json.dumps({
+            "object": "list",
+            "model": body["model"],
+            "data": [{"object": "embedding", "index": i, "embedding": v} for i, v in enumerate(vectors)],
+            "usage": {"prompt_tokens": 0, "total_tokens": 0}
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+def test_store_and_search_offline():
+    resumes = [
+        ("react_dev.txt", "Senior React Developer with experience in TypeScript, Redux, and Tailwind CSS."),
+        ("python_dev.txt", "Backend Engineer specializing in Python, FastAPI, and PostgreSQL. Experience with LangChain."),
+        ("ui_designer.txt", "Creative UI/UX Designer proficient in Figma, Adobe XD, and user research.")
+    ]
+    for filename, text in resumes:
+        store_resume(filename, text, "offline-user")
+
+    assert count_documents("offline-user") == 3
+    assert get_or_create_table().schema.field("vector").type.list_size == 256
+
+    results = search_resumes_semantic("Python backend engineer with FastAPI", "offline-user", limit=2)
+    assert results.iloc[0]["filename"] == "python_dev.txt"
+
+def test_openai_compatible_provider_against_local_server():
+    server = HTTPServer(("127.0.0.1", 0), StandInEmbeddingServer)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = embedding_providers.EMBEDDING_BASE_URL
+    embedding_providers.EMBEDDING_BASE_URL = f"http://127.0.0.1:{server.server_port}/v1"
+    try:
+        client = EMBEDDING_PROVIDERS["openai"]["create"]("stand-in-model", 64, None)
+        texts = ["python developer", "figma designer"]
+        expected = HashingEmbeddings(dim=64).embed_documents(texts)
+        for got, want in zip(client.embed_documents(texts), expected):
+            assert max(abs(a - b) for a, b in zip(got, want)) < 1e-6
+    finally:
+        embedding_providers.EMBEDDING_BASE_URL = base_url
+        server.shutdown()
+
+def test_unserved_table_model_is_an_error():
+    # A table built with an OpenAI model must not be queried with hashing vectors of the same size
+    try:
+        get_embeddings_model(model="text-embedding-3-small", dimensions=256)
+    except ValueError as e:
+        assert "not served by provider 'hashing'" in str(e) and "openrouter" in str(e)
+    else:
+        raise AssertionError("expected a ValueError")
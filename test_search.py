@@ -0,0 +1,148 @@
+import offline_test_env
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from services.db import lancedb_client
+from services.db.embedding_providers import HashingEmbeddings
+from services.db.filters import sql_literal, where_eq, where_in, where_all
+from services.db.lancedb_client import (
+    store_resumes, get_documents, delete_resumes, get_or_create_table, get_or_create_documents_table,
+    group_chunks_by_document, fuse_rrf, search_resumes, search_resumes_semantic_batch, RRF_K, MAX_BATCH_QUERIES
+)
+
+def test_filter_values_are_quoted():
+    assert sql_literal("O'Brien") == "'O''Brien'"
+    assert sql_literal(None) == "NULL" and sql_literal(True) == "TRUE" and sql_literal(3) == "3"
+    assert where_eq(user_id="u1", filename="a'b.pdf") == "user_id = 'u1' AND filename = 'a''b.pdf'"
+    assert where_in("filename", []) == "FALSE"
+    assert where_in("filename", ["x", "y'z"]) == "filename IN ('x', 'y''z')"
+    assert where_all("a = 1", "", None, "b = 2") == "(a = 1) AND (b = 2)"
+
+def test_quotes_in_tenant_and_filenames_cannot_escape_the_filter():
+    victim, attacker = "victim-user", "x' OR '1'='1"
+    store_resumes([{"filename": "secret.txt", "text": "Victim resume"}], victim)
+    store_resumes([{"filename": "o'brien.txt", "text": "Attacker resume"}], attacker)
+
+    assert sorted(get_documents(attacker)) == ["o'brien.txt"]
+    assert sorted(get_documents(victim, ["secret.txt", "x' OR '1'='1"])) == ["secret.txt"]
+    delete_resumes(attacker, ["o'brien.txt", "secret.txt' OR '1'='1"])
+    assert get_documents(attacker) == {}
+    assert sorted(get_documents(victim)) == ["secret.txt"]
+
+    # Tenant and file filters are backed by scalar indexes
+    assert {"user_id_idx", "filename_idx"} <= {i.name for i in get_or_create_table().list_indices()}
+    assert "user_id_idx" in {i.name for i in get_or_create_documents_table().list_indices()}
+
+def test_group_chunks_by_document_reducers():
+    # similarity = 1 - _distance / 2: a = [0.9, 0.55, 0.5], b = [0.8], c = [0.85, 0.85]
+    chunks = pa.table({
+        "filename": ["a", "a", "a", "b", "c", "c"],
+        "text": ["a1", "a2", "a3", "b1", "c1", "c2"],
+        "_distance": [0.2, 0.9, 1.0, 0.4, 0.3, 0.3],
+    })
+
+    best = group_chunks_by_document(chunks, reducer="max")
+    assert best["filename"].tolist() == ["a", "c", "b"]
+    assert np.allclose(best["score"], [0.9, 0.85, 0.8])
+    assert best["num_chunks"].tolist() == [3, 2, 1]
+    # Snippets are each document's best chunks, in rank order
+    assert best["snippets"].tolist() == [["a1", "a2"], ["c1", "c2"], ["b1"]]
+    assert best["text"].iloc[0] == "a1\n...\na2"
+
+    # One strong chunk no longer carries a document whose other chunks are weak
+    mean = group_chunks_by_document(chunks, reducer="mean_top_n", top_n=2)
+    assert mean["filename"].tolist() == ["c", "b", "a"]
+    assert np.allclose(mean["score"], [0.85, 0.8, 0.725])
+
+    # Global ranks: a1=0, c1=1, c2=2, b1=3, a2=4, a3=5
+    rrf = group_chunks_by_document(chunks, reducer="rrf", limit=2)
+    assert rrf["filename"].tolist() == ["a", "c"]
+    assert np.isclose(rrf["score"].iloc[0], sum(1 / (RRF_K + r) for r in (1, 5, 6)))
+
+    assert group_chunks_by_document(None).empty
+    with pytest.raises(ValueError):
+        group_chunks_by_document(chunks, reducer="median")
+
+def test_fuse_rrf_rewards_agreement_between_rankings():
+    vector_hits = pa.table({"id": ["x", "y", "z"], "text": ["X", "Y", "Z"], "_distance": [0.1, 0.2, 0.3]})
+    keyword_hits = pa.table({"id": ["z", "y", "w"], "text": ["Z", "Y", "W"], "_score": [5.0, 4.0, 3.0]})
+
+    fused = fuse_rrf([vector_hits, keyword_hits], limit=3)
+    # z (ranks 3 and 1) and y (2 and 2) beat x, which only one ranking found
+    assert fused["id"].to_pylist() == ["z", "y", "x"]
+    assert fused.column_names == ["id", "text", "_relevance_score"]
+    assert np.isclose(fused["_relevance_score"][0].as_py(), 1 / (RRF_K + 3) + 1 / (RRF_K + 1))
+    assert fuse_rrf([None, keyword_hits.slice(0, 0)], limit=3) is None
+
+def test_keyword_search_needs_no_embedding_call():
+    store_resumes([
+        {"filename": "kotlin.txt", "text": "Android developer with Kotlin and Jetpack Compose."},
+        {"filename": "spark.txt", "text": "Data engineer with Airflow and Spark."},
+    ], "keyword-user")
+
+    get_table_embeddings = lancedb_client.get_table_embeddings
+    def no_embeddings(*args, **kwargs):
+        raise AssertionError("keyword search must not embed the query")
+    lancedb_client.get_table_embeddings = no_embeddings
+    try:
+        keyword = search_resumes("Airflow Spark", "keyword-user", mode="keyword")
+        assert search_resumes("Airflow", "someone-else", mode="keyword").empty
+    finally:
+        lancedb_client.get_table_embeddings = get_table_embeddings
+    assert keyword["filename"].tolist() == ["spark.txt"]
+
+    hybrid = search_resumes("Airflow Spark", "keyword-user", mode="hybrid")
+    assert hybrid["filename"].tolist() == ["spark.txt", "kotlin.txt"]
+    with pytest.raises(ValueError):
+        search_resumes("Airflow", "keyword-user", mode="fuzzy")
+
+class CountingEmbeddings(HashingEmbeddings):
+    """Hashing embedder that counts its embedding calls."""
+
+    def __init__(self, dim):
+        super().__init__(dim=dim)
+        self.calls = 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        return super().embed_query(text)
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        return super().embed_documents(texts)
+
+def test_batch_search_matches_single_searches():
+    user_id = "batch-search-user"
+    store_resumes([
+        {"filename": "go.txt", "text": "Backend engineer with Go and gRPC."},
+        {"filename": "figma.txt", "text": "Product designer with Figma."},
+        {"filename": "spark.txt", "text": "Data engineer with Spark and Airflow."},
+    ], user_id)
+    queries = ["Go backend", "Figma designer", "Spark pipelines"]
+    singles = [search_resumes(q, user_id, limit=2) for q in queries]
+
+    embeddings = CountingEmbeddings(get_or_create_table().schema.field("vector").type.list_size)
+    get_table_embeddings = lancedb_client.get_table_embeddings
+    lancedb_client.get_table_embeddings = lambda table, api_key=None: embeddings
+    try:
+        batch = search_resumes_semantic_batch(queries, user_id, limit=2)
+        assert embeddings.calls == 1
+        one = search_resumes_semantic_batch(queries[:1], user_id, limit=2)
+        chunks = search_resumes_semantic_batch(queries, user_id, limit=3, group_by_document=False)
+    finally:
+        lancedb_client.get_table_embeddings = get_table_embeddings
+
+    assert len(batch) == 3
+    for single, batched in zip(singles, batch):
+        assert batched["filename"].tolist() == single["filename"].tolist()
+        assert np.allclose(batched["score"], single["score"], atol=1e-5)
+    assert one[0]["filename"].tolist() == singles[0]["filename"].tolist()
+    assert all(len(c) == 3 and set(c["user_id"]) == {user_id} for c in chunks)
+
+    assert search_resumes_semantic_batch([], user_id) == []
+    # A huge limit is clamped to MAX_SEARCH_LIMIT instead of reaching LanceDB
+    assert [len(r) for r in search_resumes_semantic_batch(queries[:2], user_id, limit=10 ** 7)] == [3, 3]
+    with pytest.raises(ValueError):
+        search_resumes_semantic_batch(["q"] * (MAX_BATCH_QUERIES + 1), user_id)
@@ -0,0 +1,60 @@
+import offline_test_env
+
+from fastapi.testclient import TestClient
+
+from services.db.lancedb_client import store_resumes, delete_resumes, tenant_generation
+from services.db.search_cache import search_cache
+
+# get_current_user resolves requests without a recruiter token to this tenant
+USER_ID = "user_alex_chen_123"
+
+def test_search_cache_follows_tenant_generation():
+    from backend import main
+
+    client = TestClient(main.app)
+    def search():
+        response = client.post("/api/search", json={"query": "Airflow", "mode": "keyword"})
+        assert response.status_code == 200
+        return sorted(r["filename"] for r in response.json()["results"])
+
+    store_resumes([{"filename": "airflow.txt", "text": "Data engineer with Airflow."}], USER_ID)
+    generation = tenant_generation(USER_ID)
+    assert search() == ["airflow.txt"]
+    hits = search_cache.stats()["hits"]
+    assert search() == ["airflow.txt"]
+    assert search_cache.stats()["hits"] == hits + 1
+
+    # Another tenant's upload leaves this tenant's entries valid
+    store_resumes([{"filename": "other.txt", "text": "Airflow operator."}], "cache-other")
+    assert tenant_generation(USER_ID) == generation
+    assert search() == ["airflow.txt"]
+    assert search_cache.stats()["hits"] == hits + 2
+
+    # Uploads, replacements and deletes each move the generation, so stale results are never served
+    store_resumes([{"filename": "airflow2.txt", "text": "Airflow and dbt."}], USER_ID)
+    assert tenant_generation(USER_ID) != generation
+    assert search() == ["airflow.txt", "airflow2.txt"]
+
+    generation = tenant_generation(USER_ID)
+    store_resumes([{"filename": "airflow2.txt", "text": "Now a Kotlin developer."}], USER_ID, replace=True)
+    assert tenant_generation(USER_ID) != generation
+    assert search() == ["airflow.txt"]
+
+    delete_resumes(USER_ID, ["airflow.txt"])
+    assert search() == []
+
+def test_search_limits_are_bounded():
+    from backend import main
+    from services.db.lancedb_client import search_resumes, MAX_SEARCH_LIMIT
+
+    client = TestClient(main.app)
+    for limit in (0, MAX_SEARCH_LIMIT + 1, 10 ** 7, None):
+        response = client.post("/api/search", json={"query": "Airflow", "mode": "keyword", "limit": limit})
+        assert response.status_code == 422
+        response = client.post("/api/search/batch", json={"queries": ["Airflow"], "limit": limit})
+        assert response.status_code == 422
+
+    # Direct callers are clamped rather than rejected
+    store_resumes([{"filename": f"bulk{i}.txt", "text": f"Airflow engineer {i}"} for i in range(MAX_SEARCH_LIMIT + 5)],
+                  "limit-user")
+    assert len(search_resumes("Airflow", "limit-user", limit=10 ** 7, mode="keyword")) == MAX_SEARCH_LIMIT
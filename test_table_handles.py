@@ -0,0 +1,35 @@
+import offline_test_env
+
+import pyarrow as pa
+
+from services.db import lancedb_client
+from services.db.lancedb_client import db, open_table, invalidate_table
+
+schema = pa.schema([pa.field("id", pa.int64()), pa.field("text", pa.string())])
+
+def test_table_handles_are_opened_once():
+    created, opened = [], []
+    first = open_table("handles_scratch", schema, on_create=created.append, on_open=opened.append)
+    assert created == [first] and opened == []
+
+    # Cached: no table listing, no hooks, and writes are visible through the same handle
+    table_names = db.table_names
+    def no_listing():
+        raise AssertionError("a cached handle must not list tables")
+    db.table_names = no_listing
+    try:
+        again = open_table("handles_scratch", schema, on_create=created.append, on_open=opened.append)
+        assert again is first
+        again.add([{"id": 1, "text": "row"}])
+        assert len(first) == 1
+    finally:
+        db.table_names = table_names
+
+    # After invalidation the existing table is reopened, not recreated
+    invalidate_table("handles_scratch")
+    reopened = open_table("handles_scratch", schema, on_create=created.append, on_open=opened.append)
+    assert reopened is not first and len(reopened) == 1
+    assert created == [first] and opened == [reopened]
+
+    invalidate_table()
+    assert "handles_scratch" not in lancedb_client._tables
@@ -0,0 +1,49 @@
+import offline_test_env
+
+import numpy as np
+import pytest
+
+from services.db.lancedb_client import (
+    store_resumes, get_or_create_table, get_embedding_layout, get_table_embeddings, get_document, EMBEDDING_DIM
+)
+from services.db.vector_migration import migrate_vector_layout, reproject_vectors
+from services.db.filters import where_eq
+
+def tenant_rows(user_id):
+    rows = (
+        get_or_create_table().search()
+        .where(where_eq(user_id=user_id), prefilter=True)
+        .select(["id", "text", "vector"])
+        .to_arrow()
+        .sort_by("id")
+    )
+    return rows["id"].to_pylist(), rows["text"].to_pylist(), np.array(rows["vector"].to_pylist(), dtype=np.float32)
+
+def test_layout_migration_reprojects_and_reembeds():
+    user_id = "migration-user"
+    resume = "Platform engineer with Kubernetes, Go and Terraform. " * 40
+    store_resumes([{"filename": "m.txt", "text": resume}], user_id)
+    original = get_embedding_layout(get_or_create_table())
+    ids, texts, vectors = tenant_rows(user_id)
+
+    with pytest.raises(ValueError):
+        migrate_vector_layout(EMBEDDING_DIM * 2)
+
+    # Re-projection: the same rows with shortened, renormalised half-precision vectors
+    result = migrate_vector_layout(EMBEDDING_DIM // 2, dtype="float16")
+    table = get_or_create_table()
+    assert result["to"] == get_embedding_layout(table) == {**original, "dim": EMBEDDING_DIM // 2, "dtype": "float16"}
+    assert result["rows"] == len(table)
+    new_ids, new_texts, new_vectors = tenant_rows(user_id)
+    assert (new_ids, new_texts) == (ids, texts)
+    assert np.allclose(new_vectors, reproject_vectors(vectors, EMBEDDING_DIM // 2), atol=1e-3)
+    assert {"user_id_idx", "filename_idx", "text_idx"} <= {i.name for i in table.list_indices()}
+    assert get_document(user_id, "m.txt")["text"] == resume
+
+    # Re-embedding restores the original layout with vectors computed from the text
+    migrate_vector_layout(EMBEDDING_DIM, dtype="float32", reembed=True)
+    table = get_or_create_table()
+    assert get_embedding_layout(table) == original
+    embeddings = get_table_embeddings(table)
+    _, texts, vectors = tenant_rows(user_id)
+    assert np.allclose(vectors, embeddings.embed_documents(texts), atol=1e-6)